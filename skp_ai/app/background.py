@@ -2,96 +2,272 @@
 from __future__ import annotations
 
 import json
+import os
+import socket
 import threading
+import time
 import uuid
-from concurrent.futures import Future, ThreadPoolExecutor
-from datetime import datetime
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from .config import session_file
+from .config import JOB_POLL_SECONDS, session_file
+from .jobqueue import PRIORITY_CLASSES, AdmissionError, Job, JobCancelled, JobInterrupted, JobQueue, Standing
+from .retriever.store import generation_file
 from .schema.models import SessionStage, SessionState
+from .state_store import SessionStateStore
+from .telemetry import BUILD_ADMISSIONS, BUILD_CANCELLATIONS, BUILD_QUEUE_DEPTH, BUILD_QUEUE_WAIT
+from .utils.files import atomic_write_text
 from .utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+# returns whether the job succeeded; a failure that leaves the session usable returns False
+Handler = Callable[[SessionState, Job], bool]
+
+# interrupted jobs of these kinds leave a usable READY session behind
+_REFRESH_KINDS = ("refresh", "kb_refresh")
+# how long shutdown waits for running jobs to reach a step where they can stop
+_STOP_TIMEOUT = 20.0
+
+
 class JobRegistry:
-    """Track active jobs and session state."""
-
-    def __init__(self) -> None:
-        self._jobs: Dict[str, Future] = {}
-        self._states: Dict[str, SessionState] = {}
-        self._lock = threading.RLock()
-        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="skp-build")
-
-    def create_session(self, topic: str) -> SessionState:
-        session_id = str(uuid.uuid4())
-        state = SessionState(session_id=session_id, topic=topic)
-        self._states[session_id] = state
-        self._persist_state(state)
-        return state
-
-    def submit(self, session_id: str, fn: Callable[[SessionState], None]) -> Future:
-        with self._lock:
-            if session_id in self._jobs:
-                raise ValueError(f"Session {session_id} already running")
-            future = self._executor.submit(self._run_job, session_id, fn)
-            self._jobs[session_id] = future
-            return future
-
-    def _run_job(self, session_id: str, fn: Callable[[SessionState], None]) -> None:
-        state = self._states[session_id]
+    """Track session state and run build jobs from the durable job queue.
+
+    Builds are enqueued by kind with :meth:`submit` and executed by the
+    handler registered for that kind, on worker threads started with
+    :meth:`start` in this process or in ``python -m app.worker`` processes.
+    Session state lives in a :class:`SessionStateStore`, whose
+    ``state.json`` files are shared with the other processes.
+
+    Jobs carry the submitting client and a priority class, which the queue
+    uses for fair ordering and admission control. :meth:`cancel` stops a
+    queued job at once; a running job stops at its next
+    :meth:`check_cancelled`, which the pipeline calls between steps. The
+    same check stops a job whose lease this worker lost, or that is still
+    running at :meth:`shutdown`, leaving it for another worker.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None, states: Optional[SessionStateStore] = None) -> None:
+        self.queue = queue or JobQueue()
+        self.states = states or SessionStateStore()
+        self._handlers: Dict[str, Handler] = {}
+        self._running: Dict[str, Job] = {}
+        self._lost: Dict[str, threading.Event] = {}  # set when a running job's lease is gone
+        self._workers: List[threading.Thread] = []
+        self._worker_ids: List[str] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    def handler(self, kind: str) -> Handler:
+        return self._handlers[kind]
+
+    def create_session(self, topic: str, session_id: Optional[str] = None, kb_id: Optional[str] = None) -> SessionState:
+        session_id = session_id or str(uuid.uuid4())
+        return self.states.create(SessionState(session_id=session_id, topic=topic, kb_id=kb_id))
+
+    def is_running(self, session_id: str) -> bool:
+        """Whether the session has a queued or running job, in any process."""
+        return self.queue.is_active(session_id)
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session's in-memory state; its files are removed by the caller."""
+        self.states.forget(session_id)
+
+    def submit(self, session_id: str, kind: str, client: str = "", priority: str = "interactive") -> int:
+        """Enqueue a ``kind`` job for the session.
+
+        Raises ``ValueError`` if the session already has one and
+        ``AdmissionError`` if ``client`` or the queue is at capacity.
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"No handler registered for {kind!r} jobs")
         try:
-            fn(state)
+            job_id = self.queue.enqueue(session_id, kind, client=client, priority=PRIORITY_CLASSES.index(priority))
+        except AdmissionError:
+            BUILD_ADMISSIONS.labels("rejected").inc()
+            raise
+        BUILD_ADMISSIONS.labels("accepted").inc()
+        self._observe_depth()
+        self._wakeup.set()
+        return job_id
+
+    def promote(self, session_id: str, priority: str) -> None:
+        """Raise the session's queued job to ``priority``, e.g. when an interactive session joins a bulk build."""
+        self.queue.promote(session_id, PRIORITY_CLASSES.index(priority))
+
+    def standing(self, session_id: str) -> Optional[Standing]:
+        return self.queue.standing(session_id)
+
+    def cancel(self, session_id: str) -> Optional[str]:
+        """Cancel the session's job; return ``"queued"`` or ``"running"`` for what it was, ``None`` if none."""
+        cancelled = self.queue.cancel(session_id)
+        if cancelled is None:
+            return None
+        job, status = cancelled
+        BUILD_CANCELLATIONS.labels(status).inc()
+        if status == "queued":
+            self._mark_cancelled(job)
+            self._observe_depth()
+        else:
+            logger.info("Cancellation requested for running job %s of %s", job.id, session_id)
+        return status
+
+    def check_cancelled(self, session_id: str) -> None:
+        """Raise ``JobCancelled`` if the job running the session here has been cancelled.
+
+        Raises ``JobInterrupted`` instead if this worker lost the job's lease
+        or is shutting down.
+        """
+        job = self._running.get(session_id)
+        if job is None:
+            return
+        lost = self._lost.get(session_id)
+        if self._stop.is_set() or (lost is not None and lost.is_set()):
+            raise JobInterrupted(session_id)
+        if self.queue.cancel_requested(job.id):
+            raise JobCancelled(session_id)
+
+    def _observe_depth(self) -> None:
+        depth = self.queue.depth()
+        for priority, name in enumerate(PRIORITY_CLASSES):
+            BUILD_QUEUE_DEPTH.labels(name).set(depth.get(priority, 0))
+
+    def checkpoint(self, job: Job, **data: Any) -> None:
+        """Record progress that a retry of ``job`` after a crash can resume from."""
+        job.checkpoint.update(data)
+        if not self.queue.save_checkpoint(job.id, job.worker, job.checkpoint):
+            logger.warning("Job %s for %s lost its lease; checkpoint not saved", job.id, job.session_id)
+
+    def start(self, workers: int, name: str = "api") -> None:
+        """Start ``workers`` threads that claim and run queued jobs."""
+        self._stop.clear()
+        for idx in range(workers):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{name}-{idx}"
+            thread = threading.Thread(target=self._work, args=(worker_id,), name=f"skp-build-{idx}", daemon=True)
+            self._worker_ids.append(worker_id)
+            self._workers.append(thread)
+            thread.start()
+        if workers:
+            logger.info("Started %s build workers", workers)
+
+    def shutdown(self) -> None:
+        """Stop claiming jobs and requeue the ones still running here so another worker resumes them.
+
+        Running jobs stop at their next :meth:`check_cancelled`; they are
+        requeued once their threads exit, or after ``_STOP_TIMEOUT``.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + _STOP_TIMEOUT
+        for thread in self._workers:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        stuck = [thread.name for thread in self._workers if thread.is_alive()]
+        if stuck:
+            logger.warning("Build workers %s did not stop in time; requeueing their jobs anyway", ", ".join(stuck))
+        requeued = sum(self.queue.release(worker_id) for worker_id in self._worker_ids)
+        if requeued:
+            logger.info("Requeued %s running build jobs", requeued)
+        self._workers.clear()
+        self._worker_ids.clear()
+        self.states.flush()
+
+    def _work(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                job, exhausted = self.queue.claim(worker_id)
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Claiming a build job failed: %s", exc)
+                job, exhausted = None, []
+            for lost in exhausted:
+                self._abandon(lost)
+            if job is None:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            if job.attempts == 1:
+                BUILD_QUEUE_WAIT.labels(job.priority_class).observe(max(0.0, time.time() - job.created_at))
+                self._observe_depth()
+            self._run_job(job)
+
+    def _abandon(self, job: Job) -> None:
+        if job.cancel_requested:
+            self._mark_cancelled(job)
+            return
+        logger.error("Job %s for %s was interrupted %s times; giving up", job.id, job.session_id, job.attempts)
+        if self.get_state(job.session_id) is None:
+            return
+        if job.kind in _REFRESH_KINDS:
+            self.update_state(job.session_id, detail="Refresh interrupted", refreshing=False)
+        else:
+            self.update_state(job.session_id, stage=SessionStage.FAILED, detail="Build interrupted", eta_seconds=None)
+
+    def _mark_cancelled(self, job: Job) -> None:
+        logger.info("Job %s for %s cancelled", job.id, job.session_id)
+        if self.get_state(job.session_id) is None:
+            return
+        if job.kind in _REFRESH_KINDS:
+            self.update_state(job.session_id, detail="Refresh cancelled", refreshing=False)
+        else:
+            self.update_state(job.session_id, stage=SessionStage.CANCELLED, detail="Cancelled", eta_seconds=None)
+
+    def _heartbeat(self, job: Job, done: threading.Event, lost: threading.Event) -> None:
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(job.id, job.worker):
+                logger.warning("Job %s for %s lost its lease; stopping it here", job.id, job.session_id)
+                lost.set()
+                return
+
+    def _run_job(self, job: Job) -> None:
+        state = self.get_state(job.session_id)
+        if state is None:
+            logger.warning("Dropping job %s: session %s no longer exists", job.id, job.session_id)
+            self.queue.finish(job.id, job.worker, error="session not found")
+            return
+        done, lost = threading.Event(), threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job, done, lost), name="skp-heartbeat", daemon=True).start()
+        error: Optional[str] = None
+        cancelled = interrupted = False
+        self._lost[job.session_id] = lost
+        self._running[job.session_id] = job
+        try:
+            self._handlers[job.kind](state, job)
+        except JobInterrupted:
+            interrupted = True
+            logger.info("Job %s for %s stopped; it stays queued for another worker", job.id, job.session_id)
+            if lost.is_set():
+                # the new owner writes this session's state now; drop ours unwritten
+                self.states.forget(job.session_id)
+        except JobCancelled:
+            cancelled = True
+            self._mark_cancelled(job)
         except Exception as exc:  # pragma: no cover - defensive
-            logger.exception("Session %s failed: %s", session_id, exc)
-            state.stage = SessionStage.FAILED
-            state.detail = str(exc)
+            logger.exception("Session %s failed: %s", job.session_id, exc)
+            error = str(exc) or type(exc).__name__
+            if job.kind not in _REFRESH_KINDS:
+                self.update_state(job.session_id, stage=SessionStage.FAILED, detail=error)
         finally:
-            state.updated_at = datetime.utcnow()
-            self._persist_state(state)
-            with self._lock:
-                self._jobs.pop(session_id, None)
+            done.set()
+            self._running.pop(job.session_id, None)
+            self._lost.pop(job.session_id, None)
+            if not interrupted:
+                # the final state must be on disk before the job is marked finished
+                self.states.flush(job.session_id)
+                self.queue.finish(job.id, job.worker, error=error, cancelled=cancelled)
 
     def get_state(self, session_id: str) -> Optional[SessionState]:
-        with self._lock:
-            if session_id in self._states:
-                return self._states[session_id]
-        # fallback to disk
-        path = session_file(session_id, "state.json")
-        if path.exists():
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            state = SessionState.parse_obj(data)
-            with self._lock:
-                self._states[session_id] = state
-            return state
-        return None
+        return self.states.get(session_id)
 
     def update_state(self, session_id: str, **kwargs) -> SessionState:
-        with self._lock:
-            state = self._states[session_id]
-            for key, value in kwargs.items():
-                setattr(state, key, value)
-            state.updated_at = datetime.utcnow()
-            state.elapsed_seconds = (state.updated_at - state.created_at).total_seconds()
-            self._persist_state(state)
-            return state
-
-    def _persist_state(self, state: SessionState) -> None:
-        path = session_file(state.session_id, "state.json")
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(state.dict(), f, default=str, indent=2)
-
-    def save_manifest(self, session_id: str, manifest: Dict[str, Any]) -> None:
-        path = session_file(session_id, "manifest.json")
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(manifest, f, indent=2)
+        return self.states.update(session_id, **kwargs)
+
+    def save_manifest(self, session_id: str, manifest: Dict[str, Any], generation: int = 0) -> None:
+        atomic_write_text(generation_file(session_id, generation, "manifest.json"), json.dumps(manifest, indent=2))
 
     def save_skp(self, session_id: str, skp: Dict[str, Any]) -> None:
-        path = session_file(session_id, "skp.json")
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(skp, f, indent=2)
+        atomic_write_text(session_file(session_id, "skp.json"), json.dumps(skp, indent=2))
 
 
 job_registry = JobRegistry()
@@ -107,12 +283,13 @@ def estimate_eta(stage: SessionStage, documents: int) -> float:
         SessionStage.SYNTHESIZE: 25,
         SessionStage.READY: 0,
         SessionStage.FAILED: 0,
+        SessionStage.CANCELLED: 0,
     }
     return float(stage_weights.get(stage, 30))
 
 
-def load_manifest(session_id: str) -> Optional[Dict[str, Any]]:
-    path = session_file(session_id, "manifest.json")
+def load_manifest(session_id: str, generation: int = 0) -> Optional[Dict[str, Any]]:
+    path = generation_file(session_id, generation, "manifest.json")
     if not path.exists():
         return None
     with path.open("r", encoding="utf-8") as f:
@@ -0,0 +1,30 @@
+"""Shared OpenAI client instances."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from .config import DEFAULT_TIMEOUT, OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MAX_CONNECTIONS
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    """Return the process-wide client so HTTP connections are pooled across calls."""
+    return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL or None, timeout=DEFAULT_TIMEOUT)
+
+
+@lru_cache(maxsize=1)
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return the async client used on the request path, backed by one bounded connection pool."""
+    limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS)
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL or None,
+        timeout=DEFAULT_TIMEOUT,
+        http_client=httpx.AsyncClient(limits=limits, timeout=DEFAULT_TIMEOUT),
+    )
+
+
+__all__ = ["get_openai_client", "get_async_openai_client"]
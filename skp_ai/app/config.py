@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
 from pathlib import Path
 from typing import Any, Dict
 
@@ -21,6 +22,8 @@ CACHE_DIR.mkdir(parents=True, exist_ok=True)
 ROBOTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
 PORT = int(os.getenv("PORT", "8000"))
 SAFE_SCRAPE = os.getenv("SAFE_SCRAPE", "true").lower() == "true"
 RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "3"))
@@ -29,11 +32,61 @@ TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", "12"))
 MODEL_EMBED = os.getenv("MODEL_EMBED", "text-embedding-3-large")
 MODEL_SUMMARY = os.getenv("MODEL_SUMMARY", "gpt-4o-mini")
 MODEL_CHAT = os.getenv("MODEL_CHAT", "gpt-5")
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_STORE_BATCH = int(os.getenv("EMBED_STORE_BATCH", "1000"))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", str(DATA_DIR / "embed_cache.sqlite3")))
+EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB", "2048"))
+VECTOR_STORE_POOL_SIZE = int(os.getenv("VECTOR_STORE_POOL_SIZE", "64"))
+VECTOR_STORE_IDLE_SECONDS = float(os.getenv("VECTOR_STORE_IDLE_SECONDS", "900"))
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "4096"))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+ANSWER_CACHE_PER_SESSION = int(os.getenv("ANSWER_CACHE_PER_SESSION", "128"))
 SKP_CACHE_PATH = Path(os.getenv("SKP_CACHE_PATH", str(CACHE_DIR)))
 ROBOTS_CACHE_PATH = Path(os.getenv("ROBOTS_CACHE_PATH", str(ROBOTS_CACHE_DIR)))
+ROBOTS_TTL_SECONDS = float(os.getenv("ROBOTS_TTL_SECONDS", "86400"))
+CRAWL_MAX_IN_FLIGHT = int(os.getenv("CRAWL_MAX_IN_FLIGHT", "32"))
+CRAWL_PER_HOST_CONNECTIONS = int(os.getenv("CRAWL_PER_HOST_CONNECTIONS", "4"))
+CRAWL_HOST_RPS = float(os.getenv("CRAWL_HOST_RPS", "1"))
+CRAWL_HOST_BURST = int(os.getenv("CRAWL_HOST_BURST", "2"))
+# fraction of the crawl budgets above this process may use; worker pools split them between processes
+CRAWL_BUDGET_SHARE = float(os.getenv("CRAWL_BUDGET_SHARE", "1"))
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+SCRAPE_TIME_BUDGET = float(os.getenv("SCRAPE_TIME_BUDGET", "120"))
+SCRAPE_FRONTIER_SIZE = int(os.getenv("SCRAPE_FRONTIER_SIZE", "5000"))
+KB_SHARING_ENABLED = os.getenv("KB_SHARING_ENABLED", "true").lower() == "true"
+KB_TTL_SECONDS = float(os.getenv("KB_TTL_SECONDS", "3600"))
+KB_COLLECT_SECONDS = float(os.getenv("KB_COLLECT_SECONDS", "300"))
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_PATH = Path(os.getenv("PAGE_CACHE_PATH", str(DATA_DIR / "page_cache")))
+PAGE_CACHE_MAX_MB = int(os.getenv("PAGE_CACHE_MAX_MB", "1024"))
+SPILL_HTML = os.getenv("SPILL_HTML", "false").lower() == "true"
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_MAX_PENDING = int(os.getenv("EXTRACT_MAX_PENDING", str(2 * max(1, EXTRACT_WORKERS))))
+HTML_SPILL_PATH = Path(os.getenv("HTML_SPILL_PATH", str(DATA_DIR / "html_spill")))
+JOB_QUEUE_PATH = Path(os.getenv("JOB_QUEUE_PATH", str(SKP_CACHE_PATH / "jobs.sqlite3")))
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", "4"))
+BUILD_PROCESSES = int(os.getenv("BUILD_PROCESSES", "0"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+BUILD_CLIENT_MAX_ACTIVE = int(os.getenv("BUILD_CLIENT_MAX_ACTIVE", "5"))
+BUILD_QUEUE_MAX = int(os.getenv("BUILD_QUEUE_MAX", "200"))
+STATE_FLUSH_SECONDS = float(os.getenv("STATE_FLUSH_SECONDS", "0.5"))
+STATE_CACHE_SIZE = int(os.getenv("STATE_CACHE_SIZE", "1000"))
+STATE_CACHE_TTL_SECONDS = float(os.getenv("STATE_CACHE_TTL_SECONDS", "1800"))
 
 SKP_CACHE_PATH.mkdir(parents=True, exist_ok=True)
 ROBOTS_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+if SPILL_HTML:
+    HTML_SPILL_PATH.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_TIMEOUT = 30
 
@@ -53,6 +106,11 @@ def get_session_dir(session_id: str) -> Path:
     return session_dir
 
 
+def delete_session_dir(session_id: str) -> None:
+    """Remove a session's directory and everything in it."""
+    shutil.rmtree(SKP_CACHE_PATH / f"skp_{session_id}", ignore_errors=True)
+
+
 def session_file(session_id: str, name: str) -> Path:
     """Return path to a named file in the session directory."""
     return get_session_dir(session_id) / name
@@ -60,6 +118,8 @@ def session_file(session_id: str, name: str) -> Path:
 
 __all__ = [
     "OPENAI_API_KEY",
+    "OPENAI_BASE_URL",
+    "OPENAI_MAX_CONNECTIONS",
     "PORT",
     "SAFE_SCRAPE",
     "RATE_LIMIT_RPS",
@@ -68,10 +128,58 @@ __all__ = [
     "MODEL_EMBED",
     "MODEL_SUMMARY",
     "MODEL_CHAT",
+    "EMBED_BATCH_TOKENS",
+    "EMBED_CONCURRENCY",
+    "EMBED_MAX_RETRIES",
+    "EMBED_STORE_BATCH",
+    "EMBED_CACHE_ENABLED",
+    "EMBED_CACHE_PATH",
+    "EMBED_CACHE_MAX_MB",
+    "VECTOR_STORE_POOL_SIZE",
+    "VECTOR_STORE_IDLE_SECONDS",
+    "QUERY_EMBED_CACHE_SIZE",
+    "RETRIEVAL_WORKERS",
+    "RETRIEVAL_MODE",
+    "HYBRID_CANDIDATES",
+    "RRF_K",
+    "ANSWER_CACHE_SIMILARITY",
+    "ANSWER_CACHE_MAX_ENTRIES",
+    "ANSWER_CACHE_PER_SESSION",
     "SKP_CACHE_PATH",
     "ROBOTS_CACHE_PATH",
+    "ROBOTS_TTL_SECONDS",
+    "CRAWL_MAX_IN_FLIGHT",
+    "CRAWL_PER_HOST_CONNECTIONS",
+    "CRAWL_HOST_RPS",
+    "CRAWL_HOST_BURST",
+    "CRAWL_BUDGET_SHARE",
+    "SCRAPE_CONCURRENCY",
+    "SCRAPE_TIME_BUDGET",
+    "SCRAPE_FRONTIER_SIZE",
+    "KB_SHARING_ENABLED",
+    "KB_TTL_SECONDS",
+    "KB_COLLECT_SECONDS",
+    "PAGE_CACHE_ENABLED",
+    "PAGE_CACHE_PATH",
+    "PAGE_CACHE_MAX_MB",
+    "SPILL_HTML",
+    "HTML_SPILL_PATH",
+    "EXTRACT_WORKERS",
+    "EXTRACT_MAX_PENDING",
+    "JOB_QUEUE_PATH",
+    "BUILD_PROCESSES",
+    "BUILD_WORKERS",
+    "JOB_LEASE_SECONDS",
+    "JOB_MAX_ATTEMPTS",
+    "JOB_POLL_SECONDS",
+    "BUILD_CLIENT_MAX_ACTIVE",
+    "BUILD_QUEUE_MAX",
+    "STATE_FLUSH_SECONDS",
+    "STATE_CACHE_SIZE",
+    "STATE_CACHE_TTL_SECONDS",
     "DEFAULT_TIMEOUT",
     "load_allowlist",
     "get_session_dir",
     "session_file",
+    "delete_session_dir",
 ]
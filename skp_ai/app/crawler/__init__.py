@@ -0,0 +1,18 @@
+"""Crawler exports."""
+from .frontier import Frontier, normalize_url
+from .pages import CachedPage, PageCache, page_cache
+from .robots import RobotsCache, robots_cache
+from .service import CrawlerService, FetchResult, crawler
+
+__all__ = [
+    "CachedPage",
+    "CrawlerService",
+    "FetchResult",
+    "Frontier",
+    "PageCache",
+    "RobotsCache",
+    "crawler",
+    "normalize_url",
+    "page_cache",
+    "robots_cache",
+]
@@ -0,0 +1,96 @@
+"""Priority-ordered crawl frontier for link-following discovery."""
+from __future__ import annotations
+
+import heapq
+import itertools
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urldefrag, urljoin, urlparse, urlunparse
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "and", "are", "for", "how", "in", "is", "of", "on", "or", "the", "to", "vs", "what", "with"}
+_SKIPPED_SUFFIXES = (
+    ".css", ".js", ".json", ".xml", ".rss", ".pdf", ".zip", ".gz", ".png", ".jpg", ".jpeg", ".gif", ".svg",
+    ".webp", ".ico", ".mp3", ".mp4", ".mov", ".avi", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+)
+SEED_SCORE = float("inf")
+
+
+def _tokens(text: str) -> Set[str]:
+    return {token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS and len(token) > 1}
+
+
+def normalize_url(url: str, base: str = "") -> Optional[str]:
+    """Canonical absolute form used for dedup, or ``None`` for links that are not crawlable pages."""
+    url, _ = urldefrag(urljoin(base, url.strip()) if base else url.strip())
+    parts = urlparse(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    if parts.path.lower().endswith(_SKIPPED_SUFFIXES):
+        return None
+    netloc = parts.hostname.lower()
+    if parts.port and not (parts.scheme == "http" and parts.port == 80 or parts.scheme == "https" and parts.port == 443):
+        netloc = f"{netloc}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query) if not key.lower().startswith("utm_")))
+    return urlunparse((parts.scheme.lower(), netloc, path, "", query, ""))
+
+
+class Frontier:
+    """Bounded max-priority queue of URLs to fetch, restricted to ``allowed_hosts``.
+
+    Links are scored by how many topic tokens appear in their anchor text
+    (weighted double) and URL; seeds always come first. Every URL is queued
+    at most once per frontier. Once more than twice ``max_size`` URLs are
+    waiting, the queue is trimmed back to the best ``max_size``.
+    """
+
+    def __init__(self, topic: str, allowed_hosts: Iterable[str], max_size: int = 5000) -> None:
+        self.topic_tokens = _tokens(topic)
+        self.allowed_hosts = {host.lower() for host in allowed_hosts if host}
+        self.max_size = max(1, max_size)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seen: Set[str] = set()
+        self._counter = itertools.count()
+
+    def score(self, url: str, anchor: str = "") -> float:
+        if not self.topic_tokens:
+            return 0.0
+        anchor_hits = len(self.topic_tokens & _tokens(anchor))
+        url_hits = len(self.topic_tokens & _tokens(urlparse(url).path))
+        return (2 * anchor_hits + url_hits) / (3 * len(self.topic_tokens))
+
+    def add_seed(self, url: str) -> bool:
+        return self._push(normalize_url(url), SEED_SCORE)
+
+    def add_link(self, url: str, anchor: str = "", base: str = "") -> bool:
+        normalized = normalize_url(url, base)
+        if normalized is None:
+            return False
+        return self._push(normalized, self.score(normalized, anchor))
+
+    def _push(self, url: Optional[str], score: float) -> bool:
+        if url is None or url in self._seen:
+            return False
+        if self.allowed_hosts and urlparse(url).netloc not in self.allowed_hosts:
+            return False
+        self._seen.add(url)
+        heapq.heappush(self._heap, (-score, next(self._counter), url))
+        if len(self._heap) > 2 * self.max_size:
+            # amortized trim back to the best max_size entries
+            self._heap = heapq.nsmallest(self.max_size, self._heap)
+            heapq.heapify(self._heap)
+        return True
+
+    def pop(self) -> Optional[str]:
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+__all__ = ["Frontier", "normalize_url"]
@@ -0,0 +1,122 @@
+"""Persistent page cache used for conditional GETs."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import PAGE_CACHE_ENABLED, PAGE_CACHE_MAX_MB, PAGE_CACHE_PATH
+from ..utils.files import atomic_write_text
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# seconds between directory scans for pruning, per process
+_PRUNE_INTERVAL = 60.0
+
+
+@dataclass
+class CachedPage:
+    url: str
+    title: str
+    text: str
+    source: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    links: List[Tuple[str, str]] = field(default_factory=list)
+
+    def validators(self) -> Dict[str, str]:
+        """Request headers that make the next fetch of this page conditional."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Validators and extracted text per URL, one JSON file each under ``path``.
+
+    Only pages served with an ``ETag`` or ``Last-Modified`` header are stored,
+    since nothing else can be revalidated. Once the files exceed
+    ``max_bytes`` the least recently written are deleted down to 90% of the
+    budget; :meth:`put` checks at most every ``_PRUNE_INTERVAL`` seconds.
+    """
+
+    def __init__(self, path: Path = PAGE_CACHE_PATH, max_bytes: int = PAGE_CACHE_MAX_MB * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, url: str) -> Path:
+        return self.path / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        cache_file = self._file(url)
+        if not cache_file.exists():
+            return None
+        try:
+            page = CachedPage(**json.loads(cache_file.read_text(encoding="utf-8")))
+            page.links = [(href, anchor) for href, anchor in page.links]
+        except (OSError, TypeError, ValueError) as exc:
+            logger.debug("Ignoring unreadable page cache entry for %s: %s", url, exc)
+            return None
+        return page if page.url == url else None
+
+    def put(self, page: CachedPage) -> None:
+        if not (page.etag or page.last_modified):
+            return
+        page.fetched_at = time.time()
+        atomic_write_text(self._file(page.url), json.dumps(asdict(page)))
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + _PRUNE_INTERVAL
+        self.prune()
+
+    def prune(self) -> int:
+        """Delete the least recently written pages if the cache is over budget; return how many."""
+        # the directory is the only record shared by every process using the cache
+        entries: List[Tuple[float, int, str]] = []
+        total = 0
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        logger.info("Pruned %s cached pages", removed)
+        return removed
+
+
+page_cache: Optional[PageCache] = PageCache() if PAGE_CACHE_ENABLED else None
+
+
+__all__ = ["CachedPage", "PageCache", "page_cache"]
@@ -0,0 +1,111 @@
+"""Process-wide cache of parsed robots.txt files."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.robotparser import RobotFileParser
+
+from ..config import ROBOTS_CACHE_PATH, ROBOTS_TTL_SECONDS
+from ..utils.files import atomic_write_text
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Fetcher = Callable[[str], Awaitable[Optional[str]]]
+
+
+@dataclass
+class _RobotsEntry:
+    parser: RobotFileParser
+    expires: float
+
+
+class RobotsCache:
+    """Parsed robots.txt per domain, backed by ``ROBOTS_CACHE_PATH`` files.
+
+    Parsed files are kept in memory until ``ttl`` expires. On-disk copies older
+    than ``ttl`` are refetched. Concurrent lookups for the same domain on one
+    event loop share a single fetch.
+    """
+
+    def __init__(self, path: Path = ROBOTS_CACHE_PATH, ttl: float = ROBOTS_TTL_SECONDS) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, _RobotsEntry] = {}
+        self._lock = threading.Lock()
+        # futures are bound to their loop, so in-flight fetches are tracked per loop
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _cache_file(self, domain: str) -> Path:
+        return self.path / f"{domain.replace(':', '_')}.txt"
+
+    def _cached(self, domain: str) -> Optional[RobotFileParser]:
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is not None and entry.expires > time.time():
+                return entry.parser
+        return None
+
+    async def get(self, domain: str, fetch: Fetcher) -> RobotFileParser:
+        parser = self._cached(domain)
+        if parser is not None:
+            return parser
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._inflight.setdefault(loop, {})
+        task = inflight.get(domain)
+        if task is None:
+            task = inflight[domain] = loop.create_task(self._load(domain, fetch))
+            task.add_done_callback(lambda _: inflight.pop(domain, None))
+        # shielded so one cancelled caller does not abort the fetch for the others
+        return await asyncio.shield(task)
+
+    def _read(self, cache_file: Path) -> Tuple[Optional[str], bool]:
+        """``(text, fresh)`` of an on-disk copy; ``(None, False)`` if there is none."""
+        try:
+            text = cache_file.read_text(encoding="utf-8")
+            age = time.time() - cache_file.stat().st_mtime
+        except FileNotFoundError:
+            return None, False
+        return text, age < self.ttl
+
+    async def _load(self, domain: str, fetch: Fetcher) -> RobotFileParser:
+        cache_file = self._cache_file(domain)
+        loop = asyncio.get_running_loop()
+        # file I/O runs off the loop, which is shared by every crawl in the process
+        stale, fresh = await loop.run_in_executor(None, self._read, cache_file)
+        text = stale if fresh else None
+        if text is None:
+            text = await self._download(domain, fetch)
+            if text is None and stale is not None:
+                logger.debug("Refreshing robots.txt for %s failed; keeping cached copy", domain)
+                text = stale
+            else:
+                await loop.run_in_executor(None, atomic_write_text, cache_file, text or "")
+        parser = RobotFileParser()
+        parser.set_url(f"https://{domain}/robots.txt")
+        parser.parse((text or "").splitlines())
+        with self._lock:
+            self._entries[domain] = _RobotsEntry(parser=parser, expires=time.time() + self.ttl)
+        return parser
+
+    @staticmethod
+    async def _download(domain: str, fetch: Fetcher) -> Optional[str]:
+        for scheme in ("https", "http"):
+            text = await fetch(f"{scheme}://{domain}/robots.txt")
+            if text is not None:
+                return text
+        return None
+
+
+robots_cache = RobotsCache()
+
+
+__all__ = ["RobotsCache", "robots_cache"]
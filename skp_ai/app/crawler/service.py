@@ -0,0 +1,213 @@
+"""Process-wide crawl client running on a dedicated event loop."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Awaitable, Dict, Mapping, Optional, TypeVar
+from urllib.parse import urlparse
+
+import aiohttp
+
+from ..config import (
+    CRAWL_BUDGET_SHARE,
+    CRAWL_HOST_BURST,
+    CRAWL_HOST_RPS,
+    CRAWL_MAX_IN_FLIGHT,
+    CRAWL_PER_HOST_CONNECTIONS,
+    DEFAULT_TIMEOUT,
+)
+from ..telemetry import CRAWL_HOST_LATENCY, CRAWL_IN_FLIGHT, CRAWL_QUEUE_DEPTH
+from ..utils.logger import get_logger
+from .robots import RobotsCache, robots_cache
+
+logger = get_logger(__name__)
+
+USER_AGENT = "SKP-AI"
+HEADERS = {"User-Agent": "SessionKnowledgeProfileAI/1.0"}
+
+T = TypeVar("T")
+
+
+@dataclass
+class FetchResult:
+    status: int
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class _HostBucket:
+    """Token bucket spacing requests to one host; waiters are served in FIFO order."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CrawlerService:
+    """Shared HTTP client for all builds.
+
+    One ``aiohttp`` session on a background loop keeps DNS, TLS and keep-alive
+    connections warm across builds. ``max_in_flight`` caps concurrent fetches
+    process-wide. Each host gets a token bucket refilled at ``host_rps``, or
+    at the robots.txt ``Crawl-delay`` when that is slower.
+
+    These budgets are per process. When builds run in several processes,
+    each gets ``budget_share`` of them (``CRAWL_BUDGET_SHARE``, set by
+    :class:`~app.worker.WorkerPool`) so together they stay within the
+    configured rates; every limit keeps a floor of one request.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = CRAWL_MAX_IN_FLIGHT,
+        per_host_connections: int = CRAWL_PER_HOST_CONNECTIONS,
+        host_rps: float = CRAWL_HOST_RPS,
+        host_burst: int = CRAWL_HOST_BURST,
+        robots: RobotsCache = robots_cache,
+        budget_share: float = CRAWL_BUDGET_SHARE,
+    ) -> None:
+        self.budget_share = min(1.0, budget_share) if budget_share > 0 else 1.0
+        self.max_in_flight = max(1, int(max_in_flight * self.budget_share))
+        self.per_host_connections = max(1, int(per_host_connections * self.budget_share))
+        self.host_rps = host_rps * self.budget_share
+        self.host_burst = max(1, int(host_burst * self.budget_share))
+        self.robots = robots
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="skp-crawler", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        """Schedule ``coro`` on the crawler loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())  # type: ignore[arg-type]
+
+    def _client(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_in_flight, limit_per_host=self.per_host_connections, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(headers=HEADERS, connector=connector)
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def _get(self, url: str, headers: Optional[Mapping[str, str]] = None) -> Optional[FetchResult]:
+        session = self._client()
+        assert self._slots is not None
+        CRAWL_QUEUE_DEPTH.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            CRAWL_QUEUE_DEPTH.dec()
+        CRAWL_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            async with session.get(
+                url, headers=headers, timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT), allow_redirects=True
+            ) as resp:
+                if resp.status == 304:
+                    return FetchResult(status=304, text="")
+                if resp.status >= 400:
+                    logger.debug("Failed to fetch %s: %s", url, resp.status)
+                    return None
+                return FetchResult(
+                    status=resp.status,
+                    text=await resp.text(),
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                )
+        except Exception as exc:  # pragma: no cover - network issues
+            logger.debug("Error fetching %s: %s", url, exc)
+            return None
+        finally:
+            CRAWL_HOST_LATENCY.labels(urlparse(url).netloc).observe(time.perf_counter() - start)
+            CRAWL_IN_FLIGHT.dec()
+            self._slots.release()
+
+    async def _get_text(self, url: str) -> Optional[str]:
+        result = await self._get(url)
+        return result.text if result is not None else None
+
+    def _bucket(self, host: str, crawl_delay: Optional[float]) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, burst = self.host_rps, self.host_burst
+            if crawl_delay:
+                rate, burst = min(rate, self.budget_share / float(crawl_delay)), 1
+            bucket = self._buckets[host] = _HostBucket(rate, burst)
+        return bucket
+
+    async def fetch(self, url: str, headers: Optional[Mapping[str, str]] = None) -> Optional[FetchResult]:
+        """Fetch ``url`` politely; ``None`` if robots.txt disallows it or the request fails.
+
+        Pass validator ``headers`` (``If-None-Match``/``If-Modified-Since``) for a
+        conditional GET; an unchanged page comes back with status 304 and no text.
+        Must run on the crawler loop (see :meth:`submit`).
+        """
+        host = urlparse(url).netloc
+        parser = await self.robots.get(host, self._get_text)
+        if not parser.can_fetch(USER_AGENT, url):
+            logger.debug("Blocked by robots.txt: %s", url)
+            return None
+        bucket = self._bucket(host, parser.crawl_delay(USER_AGENT))
+        CRAWL_QUEUE_DEPTH.inc()
+        try:
+            await bucket.acquire()
+        finally:
+            CRAWL_QUEUE_DEPTH.dec()
+        return await self._get(url, headers)
+
+    async def _close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def shutdown(self) -> None:
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=10)
+        except Exception as exc:  # pragma: no cover - best effort on shutdown
+            logger.debug("Failed to close crawler session: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=10)
+        loop.close()
+        self._buckets.clear()
+
+
+crawler = CrawlerService()
+
+
+__all__ = ["CrawlerService", "FetchResult", "crawler"]
@@ -0,0 +1,6 @@
+"""Embedding exports."""
+from .cache import EmbeddingCache, embedding_cache
+from .engine import EmbeddingEngine, embedding_engine, pseudo_embedding
+from .query import embed_query
+
+__all__ = ["EmbeddingCache", "embedding_cache", "EmbeddingEngine", "embedding_engine", "pseudo_embedding", "embed_query"]
@@ -0,0 +1,143 @@
+"""Persistent content-addressed embedding cache shared across sessions."""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import EMBED_CACHE_ENABLED, EMBED_CACHE_MAX_MB, EMBED_CACHE_PATH
+from ..telemetry import EMBED_CACHE_HITS, EMBED_CACHE_MISSES
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_EVICT_BATCH = 512
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed map of (model, chunk hash) -> vector with LRU eviction by total size.
+
+    Vectors are stored as float32 blobs. Once the stored vectors exceed
+    ``max_bytes`` the least recently used entries are evicted down to 90% of
+    the budget. The total size lives in the database, kept current by
+    triggers, so every process sharing the file sees the same figure.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS embeddings_added AFTER INSERT ON embeddings "
+            "BEGIN UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector); END"
+        )
+        self._conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS embeddings_removed AFTER DELETE ON embeddings "
+            "BEGIN UPDATE cache_size SET bytes = bytes - LENGTH(OLD.vector); END"
+        )
+        self._conn.commit()
+
+    def _size(self) -> int:
+        return int(self._conn.execute("SELECT bytes FROM cache_size").fetchone()[0])
+
+    def _existing(self, model: str, hashes: Sequence[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        # stay well below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [model, *batch],
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            rows = self._existing(model, unique)
+            if rows:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, key) for key in rows],
+                )
+                self._conn.commit()
+        EMBED_CACHE_HITS.inc(len(rows))
+        EMBED_CACHE_MISSES.inc(len(unique) - len(rows))
+        return {key: np.frombuffer(blob, dtype=np.float32).tolist() for key, blob in rows.items()}
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            # entries are content-addressed, so an existing row never needs rewriting
+            existing = self._existing(model, list(items))
+            rows = [
+                (model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in items.items()
+                if key not in existing
+            ]
+            # the insert takes the write lock, so the size read and any
+            # eviction happen in the same transaction
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            size = self._size()
+            if size > self.max_bytes:
+                self._evict(size, int(self.max_bytes * 0.9))
+            self._conn.commit()
+
+    def _evict(self, size: int, target: int) -> None:
+        evicted = 0
+        while size > target:
+            rows = self._conn.execute(
+                "SELECT model, hash, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for model, key, length in rows:
+                victims.append((model, key))
+                size -= length
+                if size <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND hash = ?", victims)
+            evicted += len(victims)
+        logger.info("Evicted %s cached embeddings", evicted)
+
+
+embedding_cache: Optional[EmbeddingCache] = (
+    EmbeddingCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_MB * 1024 * 1024) if EMBED_CACHE_ENABLED else None
+)
+
+
+__all__ = ["EmbeddingCache", "content_hash", "embedding_cache"]
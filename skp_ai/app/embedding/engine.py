@@ -0,0 +1,168 @@
+"""Batched, concurrent embedding engine shared by all session builds."""
+from __future__ import annotations
+
+import hashlib
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from ..clients import get_openai_client
+from ..config import (
+    EMBED_BATCH_TOKENS,
+    EMBED_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+    MODEL_EMBED,
+    OPENAI_API_KEY,
+)
+from ..telemetry import EMBED_BATCH_LATENCY
+from ..utils.logger import get_logger
+from ..utils.text import estimate_tokens
+from .cache import EmbeddingCache, content_hash, embedding_cache
+
+logger = get_logger(__name__)
+
+MAX_BATCH_INPUTS = 2048  # API limit on inputs per embeddings request
+_RETRYABLE = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+
+def pseudo_embedding(text: str, dimensions: int = 1536) -> List[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    repeat = (dimensions + len(digest) - 1) // len(digest)
+    data = (digest * repeat)[:dimensions]
+    vector = np.frombuffer(data, dtype=np.uint8).astype(float)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return vector.tolist()
+    return (vector / norm).tolist()
+
+
+def pack_batches(texts: Sequence[str], max_tokens: int, max_inputs: int = MAX_BATCH_INPUTS) -> List[List[int]]:
+    """Greedily pack text indices into batches bounded by token budget and input count."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    budget = 0
+    for idx, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (budget + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, budget = [], 0
+        current.append(idx)
+        budget += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingEngine:
+    """Embed texts in token-budgeted batches with bounded parallelism.
+
+    The worker pool is shared by every caller, so concurrent builds together
+    never have more than ``concurrency`` requests in flight. When a cache is
+    configured, identical texts are embedded at most once per model.
+    """
+
+    def __init__(
+        self,
+        model: str = MODEL_EMBED,
+        batch_tokens: int = EMBED_BATCH_TOKENS,
+        concurrency: int = EMBED_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> None:
+        self.model = model
+        self.batch_tokens = batch_tokens
+        self.max_retries = max_retries
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="skp-embed")
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        client = get_openai_client().with_options(max_retries=0)
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                with EMBED_BATCH_LATENCY.time():
+                    response = client.embeddings.create(model=self.model, input=texts)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except _RETRYABLE as exc:
+                if attempt == self.max_retries:
+                    raise
+                wait = delay + random.uniform(0, delay / 2)
+                logger.warning("Embedding batch failed (%s); retrying in %.1fs", exc, wait)
+                time.sleep(wait)
+                delay = min(delay * 2, 30.0)
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not OPENAI_API_KEY:
+            return [pseudo_embedding(text) for text in texts]
+        keys = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, keys) if self.cache is not None else {}
+        by_key = dict(zip(keys, texts))
+        missing = [key for key in by_key if key not in vectors]
+        if missing:
+            fresh = dict(zip(missing, self._request([by_key[key] for key in missing])))
+            if self.cache is not None:
+                self.cache.put_many(self.model, fresh)
+            vectors.update(fresh)
+        return [vectors[key] for key in keys]
+
+    def submit(self, texts: List[str]) -> Future:
+        """Dispatch one pre-packed batch (cache-aware); the future resolves to its vectors in order."""
+        return self._executor.submit(self._embed_batch, texts)
+
+    def embed_iter(self, texts: Sequence[str], use_cache: bool = True) -> Iterator[Tuple[List[int], List[List[float]]]]:
+        """Yield ``(indices, vectors)`` per batch as batches complete, in completion order.
+
+        ``use_cache=False`` neither reads nor writes the persistent cache, for
+        one-off texts that would only evict build chunks from it.
+        """
+        cache = self.cache if use_cache else None
+        if not texts:
+            return
+        if not OPENAI_API_KEY:
+            logger.warning("OPENAI_API_KEY not set; using deterministic embeddings")
+            yield list(range(len(texts))), [pseudo_embedding(text) for text in texts]
+            return
+        # identical texts share one hash, so each unique text is requested once
+        groups: Dict[str, List[int]] = {}
+        for idx, text in enumerate(texts):
+            groups.setdefault(content_hash(text), []).append(idx)
+        if cache is not None:
+            cached = cache.get_many(self.model, list(groups))
+            if cached:
+                hits = [(idx, vector) for key, vector in cached.items() for idx in groups.pop(key)]
+                yield [idx for idx, _ in hits], [vector for _, vector in hits]
+        pending = list(groups)
+        futures = {}
+        for batch in pack_batches([texts[groups[key][0]] for key in pending], self.batch_tokens):
+            keys = [pending[position] for position in batch]
+            futures[self._executor.submit(self._request, [texts[groups[key][0]] for key in keys])] = keys
+        for future in as_completed(futures):
+            keys = futures[future]
+            vectors = future.result()
+            if cache is not None:
+                cache.put_many(self.model, dict(zip(keys, vectors)))
+            indices: List[int] = []
+            expanded: List[List[float]] = []
+            for key, vector in zip(keys, vectors):
+                for idx in groups[key]:
+                    indices.append(idx)
+                    expanded.append(vector)
+            yield indices, expanded
+
+    def embed(self, texts: Sequence[str], use_cache: bool = True) -> List[List[float]]:
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for indices, batch_vectors in self.embed_iter(texts, use_cache=use_cache):
+            for idx, vector in zip(indices, batch_vectors):
+                vectors[idx] = vector
+        return vectors  # type: ignore[return-value]
+
+
+embedding_engine = EmbeddingEngine(cache=embedding_cache)
+
+
+__all__ = ["EmbeddingEngine", "embedding_engine", "pack_batches", "pseudo_embedding"]
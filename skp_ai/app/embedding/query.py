@@ -0,0 +1,53 @@
+"""Query embedding with an in-memory LRU cache."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from ..config import QUERY_EMBED_CACHE_SIZE
+from ..telemetry import QUERY_EMBED_CACHE_HITS, QUERY_EMBED_CACHE_MISSES
+from ..utils.text import normalize_whitespace
+from .engine import EmbeddingEngine, embedding_engine
+
+
+class QueryEmbeddingCache:
+    """Embed questions through the build-time engine, memoizing normalized questions.
+
+    Questions bypass the engine's persistent cache: they rarely repeat across
+    restarts, and writing each one there would evict build chunks' vectors.
+    """
+
+    def __init__(self, engine: EmbeddingEngine, max_size: int = QUERY_EMBED_CACHE_SIZE) -> None:
+        self.engine = engine
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, question: str) -> List[float]:
+        text = normalize_whitespace(question)
+        key = (self.engine.model, text.casefold())
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                QUERY_EMBED_CACHE_HITS.inc()
+                return vector
+        QUERY_EMBED_CACHE_MISSES.inc()
+        vector = self.engine.embed([text], use_cache=False)[0]
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vector
+
+
+query_embedding_cache = QueryEmbeddingCache(embedding_engine)
+
+
+def embed_query(question: str) -> List[float]:
+    return query_embedding_cache.embed(question)
+
+
+__all__ = ["QueryEmbeddingCache", "embed_query", "query_embedding_cache"]
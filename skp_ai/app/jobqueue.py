@@ -0,0 +1,349 @@
+"""Durable SQLite-backed queue of session build jobs."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import BUILD_CLIENT_MAX_ACTIVE, BUILD_QUEUE_MAX, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_QUEUE_PATH
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_PRUNE_AFTER_SECONDS = 7 * 86400
+# assumed build duration until some builds have completed
+_DEFAULT_BUILD_SECONDS = 120.0
+_DURATION_SAMPLE = 20
+
+# claimed in this order; a job's priority is its index
+PRIORITY_CLASSES = ("interactive", "bulk")
+
+_COLUMNS = "id, session_id, kind, attempts, checkpoint, client, priority, created_at, cancel_requested"
+
+
+class AdmissionError(Exception):
+    """A job was refused because its client or the whole queue is at capacity."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job whose cancellation was requested."""
+
+
+class JobInterrupted(JobCancelled):
+    """Raised inside a running job its worker must give up: the lease was lost or the worker is stopping.
+
+    Unlike a cancellation the job is not finished; it stays with the queue
+    and another worker resumes it from its checkpoint.
+    """
+
+
+@dataclass
+class Job:
+    id: int
+    session_id: str
+    kind: str
+    attempts: int
+    checkpoint: Dict[str, Any] = field(default_factory=dict)
+    client: str = ""
+    priority: int = 0
+    created_at: float = 0.0
+    cancel_requested: bool = False
+    worker: str = ""
+
+    @classmethod
+    def from_row(cls, row: Tuple[Any, ...]) -> "Job":
+        return cls(
+            id=row[0],
+            session_id=row[1],
+            kind=row[2],
+            attempts=row[3],
+            checkpoint=json.loads(row[4]),
+            client=row[5],
+            priority=row[6],
+            created_at=row[7],
+            cancel_requested=bool(row[8]),
+        )
+
+    @property
+    def priority_class(self) -> str:
+        return PRIORITY_CLASSES[min(self.priority, len(PRIORITY_CLASSES) - 1)]
+
+
+@dataclass
+class Standing:
+    """Where a session's active job stands: ``position`` queued jobs will be claimed before it."""
+
+    status: str
+    position: int
+    eta_seconds: float
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``, rolled back if the block raises."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._conn.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+
+
+class JobQueue:
+    """Jobs persisted in SQLite so queued and interrupted builds survive restarts.
+
+    Workers in any process :meth:`claim` the next queued job under a lease
+    of ``lease_seconds`` and renew it with :meth:`heartbeat`. A running job
+    whose lease lapsed, because its worker died, is claimed again by the next
+    worker, with its last :meth:`save_checkpoint` data, until it has been
+    claimed ``max_attempts`` times. A session has at most one queued or
+    running job.
+
+    Queued jobs are claimed by priority class, then from the client with
+    the fewest running jobs, then oldest first, so one client's backlog
+    cannot hold back everyone else's builds. :meth:`enqueue` refuses a
+    client's job beyond ``max_per_client`` queued or running ones, and any
+    job beyond ``max_queued`` queued ones.
+    """
+
+    def __init__(
+        self,
+        path: Path = JOB_QUEUE_PATH,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        max_per_client: int = BUILD_CLIENT_MAX_ACTIVE,
+        max_queued: int = BUILD_QUEUE_MAX,
+    ) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.max_per_client = max_per_client
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit; read-then-write operations open a _Transaction
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, kind TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_expires REAL, "
+            "checkpoint TEXT NOT NULL DEFAULT '{}', error TEXT, client TEXT NOT NULL DEFAULT '', "
+            "priority INTEGER NOT NULL DEFAULT 0, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, started_at REAL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS jobs_active ON jobs (session_id) WHERE status IN ('queued', 'running')"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_client ON jobs (client, status)")
+
+    def enqueue(self, session_id: str, kind: str, client: str = "", priority: int = 0) -> int:
+        """Queue a job; raises ``ValueError`` if the session has one, ``AdmissionError`` if over capacity."""
+        now = time.time()
+        with self._lock, _Transaction(self._conn):
+            if self.max_per_client > 0 and client:
+                (active,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE client = ? AND status IN ('queued', 'running')", (client,)
+                ).fetchone()
+                if active >= self.max_per_client:
+                    raise AdmissionError(f"Client already has {active} builds queued or running")
+            if self.max_queued > 0:
+                (queued,) = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+                if queued >= self.max_queued:
+                    raise AdmissionError(f"Build queue is full ({queued} builds waiting)")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (session_id, kind, status, client, priority, created_at, updated_at) "
+                    "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                    (session_id, kind, client, priority, now, now),
+                )
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(f"Session {session_id} already running") from exc
+        return int(cursor.lastrowid)
+
+    def promote(self, session_id: str, priority: int) -> None:
+        """Raise a queued job to ``priority`` if that is more urgent than its own."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET priority = ?, updated_at = ? WHERE session_id = ? AND status = 'queued' AND priority > ?",
+                (priority, time.time(), session_id, priority),
+            )
+
+    def claim(self, worker: str) -> Tuple[Optional[Job], List[Job]]:
+        """Lease the next runnable job to ``worker``.
+
+        Interrupted jobs are resumed before queued ones are started. Returns
+        the job, or ``None`` when there is nothing to do, and the jobs whose
+        worker died that were just given up: interrupted ``max_attempts``
+        times (failed) or with a cancellation pending (cancelled).
+        """
+        now = time.time()
+        with self._lock, _Transaction(self._conn):
+            lost = [
+                Job.from_row(row)
+                for row in self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM jobs WHERE status = 'running' AND lease_expires < ? "
+                    "AND (attempts >= ? OR cancel_requested)",
+                    (now, self.max_attempts),
+                )
+            ]
+            if lost:
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, error = ?, worker = NULL, updated_at = ? WHERE id = ?",
+                    [
+                        ("cancelled", "cancelled", now, job.id)
+                        if job.cancel_requested
+                        else ("failed", "interrupted", now, job.id)
+                        for job in lost
+                    ],
+                )
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs AS j "
+                "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY status = 'queued', priority, "
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.client = j.client AND r.status = 'running' "
+                "AND r.lease_expires >= ?), id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            job = None
+            if row is not None:
+                job = Job.from_row(row)
+                job.attempts += 1
+                job.worker = worker
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, attempts = ?, "
+                    "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                    (worker, now + self.lease_seconds, job.attempts, now, now, job.id),
+                )
+            else:
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?",
+                    (now - _PRUNE_AFTER_SECONDS,),
+                )
+        if job is not None and job.attempts > 1:
+            logger.warning("Resuming interrupted job %s for %s (attempt %s)", job.id, job.session_id, job.attempts)
+        return job, lost
+
+    def _update_owned(self, job_id: int, worker: str, assignments: str, params: Tuple[Any, ...]) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (*params, time.time(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend the lease; ``False`` means the job is no longer ``worker``'s."""
+        return self._update_owned(job_id, worker, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def save_checkpoint(self, job_id: int, worker: str, checkpoint: Dict[str, Any]) -> bool:
+        return self._update_owned(job_id, worker, "checkpoint = ?", (json.dumps(checkpoint),))
+
+    def finish(self, job_id: int, worker: str, error: Optional[str] = None, cancelled: bool = False) -> bool:
+        status = "cancelled" if cancelled else "failed" if error is not None else "done"
+        return self._update_owned(job_id, worker, "status = ?, error = ?, worker = NULL", (status, error))
+
+    def cancel(self, session_id: str) -> Optional[Tuple[Job, str]]:
+        """Cancel the session's active job; return it with the status it had, or ``None`` if it has none.
+
+        A queued job is cancelled outright; a running one gets
+        ``cancel_requested`` set and is stopped by its worker, which polls
+        :meth:`cancel_requested` between steps.
+        """
+        with self._lock, _Transaction(self._conn):
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS}, status FROM jobs WHERE session_id = ? AND status IN ('queued', 'running')",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job.from_row(row)
+            if row[-1] == "queued":
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', error = 'cancelled', updated_at = ? WHERE id = ?",
+                    (time.time(), job.id),
+                )
+            else:
+                job.cancel_requested = True
+                self._conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (time.time(), job.id)
+                )
+        return job, row[-1]
+
+    def cancel_requested(self, job_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def release(self, worker: str) -> int:
+        """Requeue ``worker``'s running jobs, e.g. on shutdown, so they resume without waiting for the lease."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE worker = ? AND status = 'running'",
+                (time.time(), worker),
+            )
+        return cursor.rowcount
+
+    def is_active(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE session_id = ? AND status IN ('queued', 'running')", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def standing(self, session_id: str) -> Optional[Standing]:
+        """Queue position and estimated seconds until the session's active job completes.
+
+        The position counts queued jobs of a more urgent class, or of the
+        same class and older; client fairness can reorder those, so it is an
+        estimate. Jobs ahead are assumed to run ``running`` at a time and to
+        take as long as the recent average build.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, priority, started_at FROM jobs WHERE session_id = ? AND status IN ('queued', 'running')",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, status, priority, started_at = row
+            (running,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND lease_expires >= ?", (now,)
+            ).fetchone()
+            position = 0
+            if status == "queued":
+                (position,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND id < ?))",
+                    (priority, priority, job_id),
+                ).fetchone()
+            (average,) = self._conn.execute(
+                "SELECT AVG(updated_at - started_at) FROM (SELECT updated_at, started_at FROM jobs "
+                "WHERE status = 'done' AND started_at IS NOT NULL ORDER BY id DESC LIMIT ?)",
+                (_DURATION_SAMPLE,),
+            ).fetchone()
+        duration = float(average) if average else _DEFAULT_BUILD_SECONDS
+        if status == "running":
+            return Standing(status=status, position=0, eta_seconds=max(0.0, duration - (now - (started_at or now))))
+        capacity = max(1, running)
+        # running jobs are on average half done; each batch of `capacity` jobs ahead takes one build
+        wait = duration * (position // capacity + (0.5 if running else 0.0))
+        return Standing(status=status, position=position, eta_seconds=wait + duration)
+
+    def depth(self) -> Dict[int, int]:
+        """Queued jobs per priority."""
+        with self._lock:
+            rows = self._conn.execute("SELECT priority, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY priority")
+            return {priority: count for priority, count in rows}
+
+
+__all__ = ["AdmissionError", "Job", "JobCancelled", "JobInterrupted", "JobQueue", "PRIORITY_CLASSES", "Standing"]
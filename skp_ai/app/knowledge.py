@@ -0,0 +1,243 @@
+"""Topic-level knowledge bases shared by sessions on the same topic."""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .background import job_registry
+from .config import KB_COLLECT_SECONDS, KB_TTL_SECONDS, SKP_CACHE_PATH, session_file
+from .jobqueue import AdmissionError, Job
+from .pipelines.answer import answer_cache
+from .retriever.pool import vector_store_pool
+from .schema.models import SessionStage, SessionState
+from .telemetry import KB_SESSIONS
+from .utils.files import atomic_write_text
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# collected knowledge base directories are renamed to this prefix, then removed
+_DELETED_PREFIX = ".deleted_"
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", topic.casefold()).split())
+
+
+def kb_id_for(topic: str) -> str:
+    return "kb_" + hashlib.sha1(normalize_topic(topic).encode("utf-8")).hexdigest()[:20]
+
+
+def is_knowledge_base(session_id: str) -> bool:
+    """Whether ``session_id`` names a shared knowledge base rather than a user's session."""
+    return session_id.startswith("kb_")
+
+
+def build_state(state: SessionState) -> SessionState:
+    """State of the build backing ``state``: its knowledge base's, or its own for a private session."""
+    if state.kb_id:
+        return job_registry.get_state(state.kb_id) or state
+    return state
+
+
+class KnowledgeBaseRegistry:
+    """Resolve sessions to one shared, read-only knowledge base per normalized topic.
+
+    A knowledge base is built like a session, under its own ``kb_...`` id and
+    directory. Sessions for a topic whose base is still building attach to
+    that build instead of starting another. Bases older than ``ttl`` are
+    refreshed incrementally when a new session attaches. ``kb.json`` records
+    the attached sessions; once none remain, a stale base is deleted by
+    :meth:`collect`, which runs on every detach and periodically once
+    :meth:`start` is called.
+
+    Builds run as ``kb_build``/``kb_refresh`` jobs, possibly in a worker
+    process, so ``kb.json`` is re-read for every change rather than cached,
+    and every read-modify-write holds ``kb.lock``, a file lock shared by all
+    processes on the data directory.
+    """
+
+    def __init__(self, ttl: float = KB_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._lock_file: Optional[TextIO] = None
+        self._depth = 0
+        self._stop = threading.Event()
+        self._collector: Optional[threading.Thread] = None
+        job_registry.register("kb_build", lambda state, job: self._run(state, job, refresh=False))
+        job_registry.register("kb_refresh", lambda state, job: self._run(state, job, refresh=True))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold this process's lock and, across processes, ``kb.lock``; reentrant."""
+        with self._lock:
+            if self._depth == 0:
+                if self._lock_file is None:
+                    SKP_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+                    self._lock_file = open(SKP_CACHE_PATH / "kb.lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _record(self, kb_id: str, topic: str = "") -> Dict[str, Any]:
+        path = session_file(kb_id, "kb.json")
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+        return {"kb_id": kb_id, "topic": topic, "built_at": None, "sessions": []}
+
+    def _save(self, record: Dict[str, Any]) -> None:
+        atomic_write_text(session_file(record["kb_id"], "kb.json"), json.dumps(record, indent=2))
+
+    def _is_fresh(self, record: Dict[str, Any]) -> bool:
+        return record["built_at"] is not None and time.time() - record["built_at"] < self.ttl
+
+    def attach(self, session_id: str, topic: str, client: str = "", priority: str = "interactive") -> str:
+        """Attach ``session_id`` to the knowledge base for ``topic``, building or refreshing it if needed.
+
+        Builds and refreshes are submitted on behalf of ``client``. A build
+        refused by admission control raises ``AdmissionError`` and nothing
+        is attached.
+        """
+        kb_id = kb_id_for(topic)
+        with self._locked():
+            record = self._record(kb_id, topic)
+            state = job_registry.get_state(kb_id)
+            running = job_registry.is_running(kb_id)
+            if state is None or (state.stage != SessionStage.READY and not running):
+                # new, or its last build failed, was cancelled or was never admitted
+                state = job_registry.create_session(topic, session_id=kb_id)
+                # saved first: if admission control refuses the build, collect
+                # still finds the directory and removes it
+                self._save(record)
+                job_registry.submit(kb_id, "kb_build", client=client, priority=priority)
+                outcome = "built"
+            elif running:
+                job_registry.promote(kb_id, priority)
+                outcome = "attached_building"
+            elif self._is_fresh(record):
+                outcome = "attached_ready"
+            else:
+                # sessions keep answering from the current index meanwhile, and
+                # a refresh refused by admission control is retried on next attach
+                try:
+                    job_registry.submit(kb_id, "kb_refresh", client=client, priority="bulk")
+                    outcome = "refreshed"
+                except AdmissionError:
+                    outcome = "attached_stale"
+            if session_id not in record["sessions"]:
+                record["sessions"].append(session_id)
+            self._save(record)
+        KB_SESSIONS.labels(outcome).inc()
+        logger.info("Session %s uses knowledge base %s (%s)", session_id, kb_id, outcome)
+        return kb_id
+
+    def _run(self, state: SessionState, job: Job, refresh: bool) -> bool:
+        if not job_registry.handler("refresh" if refresh else "build")(state, job):
+            # a failed refresh leaves the base READY but as stale as before
+            return False
+        with self._locked():
+            record = self._record(state.session_id, state.topic)
+            record["built_at"] = time.time()
+            self._save(record)
+        return True
+
+    def sessions(self, kb_id: str) -> List[str]:
+        with self._locked():
+            return list(self._record(kb_id)["sessions"])
+
+    def detach(self, session_id: str, kb_id: str) -> None:
+        with self._locked():
+            record = self._record(kb_id)
+            if session_id in record["sessions"]:
+                record["sessions"].remove(session_id)
+            self._save(record)
+        self.collect()
+
+    def collect(self) -> List[str]:
+        """Delete stale knowledge bases that no session references; return their ids."""
+        removed: List[str] = []
+        doomed: List[Path] = []
+        with self._locked():
+            for path in SKP_CACHE_PATH.glob("skp_kb_*/kb.json"):
+                kb_id = path.parent.name[len("skp_") :]
+                record = self._record(kb_id)
+                if record["sessions"] or self._is_fresh(record) or job_registry.is_running(kb_id):
+                    continue
+                doomed.append(self._unlink(kb_id))
+                removed.append(kb_id)
+        # also sweeps directories left behind by a collection that was interrupted
+        for path in SKP_CACHE_PATH.glob(f"{_DELETED_PREFIX}*"):
+            shutil.rmtree(path, ignore_errors=True)
+        for kb_id in removed:
+            logger.info("Deleted unreferenced knowledge base %s", kb_id)
+        return removed
+
+    def start(self, interval: float = KB_COLLECT_SECONDS) -> None:
+        """Collect now, then every ``interval`` seconds (never again if it is 0) until :meth:`shutdown`."""
+        if self._collector is not None:
+            return
+        self._stop.clear()
+        self._collector = threading.Thread(
+            target=self._collect_loop, args=(interval,), name="skp-kb-collect", daemon=True
+        )
+        self._collector.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._collector is not None:
+            self._collector.join()
+            self._collector = None
+
+    def _collect_loop(self, interval: float) -> None:
+        while True:
+            try:
+                self.collect()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Collecting knowledge bases failed: %s", exc)
+            if interval <= 0 or self._stop.wait(interval):
+                return
+
+    def _unlink(self, kb_id: str) -> Path:
+        """Forget ``kb_id`` and move its directory aside for deletion; caller must hold the lock.
+
+        The rename is instant, so the lock is not held while the files are
+        removed, and a base recreated under the same id starts from scratch.
+        """
+        vector_store_pool.discard(kb_id)
+        answer_cache.invalidate(kb_id)
+        job_registry.forget(kb_id)
+        doomed = SKP_CACHE_PATH / f"{_DELETED_PREFIX}{kb_id}_{uuid.uuid4().hex}"
+        os.replace(SKP_CACHE_PATH / f"skp_{kb_id}", doomed)
+        return doomed
+
+    def refresh(self, kb_id: str, client: str = "") -> None:
+        """Refresh a READY knowledge base now, regardless of its age."""
+        job_registry.submit(kb_id, "kb_refresh", client=client)
+
+
+knowledge_bases = KnowledgeBaseRegistry()
+
+
+__all__ = [
+    "KnowledgeBaseRegistry",
+    "build_state",
+    "is_knowledge_base",
+    "kb_id_for",
+    "knowledge_bases",
+    "normalize_topic",
+]
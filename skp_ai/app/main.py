@@ -4,10 +4,16 @@ from __future__ import annotations
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .background import job_registry
+from .config import BUILD_PROCESSES, BUILD_WORKERS
+from .crawler import crawler
+from .knowledge import knowledge_bases
+from .pipelines import scrape
 from .rate_limit import rate_limit_dependency
 from .routers import build, chat, health
 from .telemetry import register_telemetry
 from .utils.logger import configure_logging
+from .worker import WorkerPool
 
 configure_logging()
 
@@ -23,9 +29,28 @@ app.add_middleware(
 
 register_telemetry(app)
 
+worker_pool = WorkerPool(BUILD_PROCESSES)
+
 app.include_router(health.router)
 app.include_router(build.router, dependencies=[Depends(rate_limit_dependency)])
 app.include_router(chat.router, dependencies=[Depends(rate_limit_dependency)])
 
 
+@app.on_event("startup")
+def _start_workers() -> None:
+    # BUILD_WORKERS=0 leaves builds to separate `python -m app.worker` processes
+    job_registry.start(BUILD_WORKERS)
+    worker_pool.start()
+    knowledge_bases.start()
+
+
+@app.on_event("shutdown")
+def _shutdown_workers() -> None:
+    knowledge_bases.shutdown()
+    worker_pool.shutdown()
+    job_registry.shutdown()
+    crawler.shutdown()
+    scrape.shutdown_extract_pool()
+
+
 __all__ = ["app"]
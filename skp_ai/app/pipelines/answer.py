@@ -1,18 +1,127 @@
 """Answer generation pipeline using retrieval augmented generation."""
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Dict, List, Tuple
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import numpy as np
+from openai import AsyncOpenAI
 
-from ..config import MODEL_CHAT, OPENAI_API_KEY
+from ..clients import get_async_openai_client
+from ..config import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_PER_SESSION,
+    ANSWER_CACHE_SIMILARITY,
+    MODEL_CHAT,
+    OPENAI_API_KEY,
+    RETRIEVAL_WORKERS,
+)
+from ..embedding import embed_query
 from ..retriever.search import retrieve
 from ..schema.models import AnswerContract, Citation
+from ..telemetry import ANSWER_CACHE_ENTRIES, ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Chroma queries and query embedding are blocking; keep them off the event loop
+# in a bounded pool so a burst of questions cannot exhaust the default executor.
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="skp-retrieve")
+
+
+@dataclass
+class _CachedAnswers:
+    vectors: np.ndarray
+    answers: List[AnswerContract]
+
+
+class SemanticAnswerCache:
+    """Per-session answers keyed by question embedding.
+
+    A lookup hits when the cosine similarity between the new question and a
+    cached one reaches ``threshold``. Sessions are evicted LRU once the total
+    entry count exceeds ``max_entries``; each session keeps at most
+    ``per_session`` answers. ``invalidate`` bumps the session generation so
+    answers computed against a previous build are never stored.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_SIMILARITY,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        per_session: int = ANSWER_CACHE_PER_SESSION,
+    ) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.per_session = max(1, per_session)
+        self._sessions: "OrderedDict[str, _CachedAnswers]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def generation(self, session_id: str) -> int:
+        with self._lock:
+            return self._generations.get(session_id, 0)
+
+    def lookup(self, session_id: str, vector: List[float]) -> Optional[AnswerContract]:
+        if self.max_entries <= 0:
+            return None
+        query = self._normalize(vector)
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and len(entry.answers):
+                similarities = entry.vectors @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._sessions.move_to_end(session_id)
+                    ANSWER_CACHE_HITS.inc()
+                    return entry.answers[best]
+        ANSWER_CACHE_MISSES.inc()
+        return None
+
+    def store(self, session_id: str, generation: int, vector: List[float], answer: AnswerContract) -> None:
+        if self.max_entries <= 0:
+            return
+        row = self._normalize(vector)[None, :]
+        with self._lock:
+            if self._generations.get(session_id, 0) != generation:
+                return
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = _CachedAnswers(vectors=row, answers=[answer])
+            else:
+                entry.vectors = np.vstack([entry.vectors, row])[-self.per_session :]
+                entry.answers = (entry.answers + [answer])[-self.per_session :]
+            self._sessions.move_to_end(session_id)
+            self._size = sum(len(item.answers) for item in self._sessions.values())
+            while self._size > self.max_entries and len(self._sessions) > 1:
+                _, evicted = self._sessions.popitem(last=False)
+                self._size -= len(evicted.answers)
+            ANSWER_CACHE_ENTRIES.set(self._size)
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+            evicted = self._sessions.pop(session_id, None)
+            if evicted is not None:
+                self._size -= len(evicted.answers)
+            ANSWER_CACHE_ENTRIES.set(self._size)
+
+
+answer_cache = SemanticAnswerCache()
+
 
 def _format_context(passages: List[Tuple[str, Dict]]) -> str:
     formatted = []
@@ -23,20 +132,21 @@ def _format_context(passages: List[Tuple[str, Dict]]) -> str:
     return "\n\n".join(formatted)
 
 
-def _call_model(question: str, topic: str, context: str, citations: List[Citation]) -> AnswerContract:
-    if not OPENAI_API_KEY:
-        logger.warning("OPENAI_API_KEY not set; generating heuristic answer")
-        summary = f"{question} relates to {topic}. Data unavailable."
-        return AnswerContract(
-            summary=summary,
-            reasoning_points=["Insufficient data"],
-            next_steps=["Provide an OpenAI API key to enable full synthesis."],
-            risks=["Information incomplete"],
-            citations=citations,
-            assumptions=["No authoritative data retrieved"],
-            confidence=0.1,
-        )
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def _heuristic_answer(question: str, topic: str, citations: List[Citation]) -> AnswerContract:
+    logger.warning("OPENAI_API_KEY not set; generating heuristic answer")
+    summary = f"{question} relates to {topic}. Data unavailable."
+    return AnswerContract(
+        summary=summary,
+        reasoning_points=["Insufficient data"],
+        next_steps=["Provide an OpenAI API key to enable full synthesis."],
+        risks=["Information incomplete"],
+        citations=citations,
+        assumptions=["No authoritative data retrieved"],
+        confidence=0.1,
+    )
+
+
+def _build_messages(question: str, topic: str, context: str, citations: List[Citation]) -> List[Dict]:
     instructions = (
         "You are Session Knowledge Profile AI. Answer using only the provided context. "
         "Respond with valid JSON matching the AnswerContract schema. "
@@ -47,16 +157,23 @@ def _call_model(question: str, topic: str, context: str, citations: List[Citatio
         f"Citations:\n{json.dumps([c.dict() for c in citations], indent=2)}\n\n"
         "Return a JSON object with keys summary, reasoning_points, next_steps, risks, citations, assumptions, confidence."
     )
-    messages = [
+    return [
         {"role": "system", "content": instructions},
         {"role": "user", "content": prompt},
     ]
-    response = client.chat.completions.create(model=MODEL_CHAT, messages=messages, temperature=0.2)
+
+
+async def _call_model(question: str, topic: str, context: str, citations: List[Citation]) -> AnswerContract:
+    if not OPENAI_API_KEY:
+        return _heuristic_answer(question, topic, citations)
+    client = get_async_openai_client()
+    messages = _build_messages(question, topic, context, citations)
+    response = await client.chat.completions.create(model=MODEL_CHAT, messages=messages, temperature=0.2)
     content = response.choices[0].message.content
-    return _parse_answer(content, citations, client, messages)
+    return await _parse_answer(content, citations, client, messages)
 
 
-def _parse_answer(content: str, citations: List[Citation], client: OpenAI, messages: List[Dict]) -> AnswerContract:
+async def _parse_answer(content: str, citations: List[Citation], client: AsyncOpenAI, messages: List[Dict]) -> AnswerContract:
     try:
         data = json.loads(content)
         data["citations"] = [citation.dict() for citation in citations]
@@ -68,17 +185,141 @@ def _parse_answer(content: str, citations: List[Citation], client: OpenAI, messa
         )
         messages.append({"role": "assistant", "content": content})
         messages.append({"role": "user", "content": repair_prompt})
-        retry = client.chat.completions.create(model=MODEL_CHAT, messages=messages, temperature=0.1)
+        retry = await client.chat.completions.create(model=MODEL_CHAT, messages=messages, temperature=0.1)
         data = json.loads(retry.choices[0].message.content)
         data["citations"] = [citation.dict() for citation in citations]
         return AnswerContract.parse_obj(data)
 
 
-def answer_question(session_id: str, topic: str, question: str, citations: List[Citation]) -> AnswerContract:
-    passages = retrieve(session_id, question)
+class SummaryTokenStream:
+    """Incrementally decode the ``summary`` string value from streamed JSON text."""
+
+    _KEY = re.compile(r'"summary"\s*:\s*"')
+    _ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self._done = False
+
+    def feed(self, delta: str) -> str:
+        """Append raw model output and return any newly decoded summary text."""
+        self._buffer += delta
+        if self._done:
+            return ""
+        if self._pos is None:
+            match = self._KEY.search(self._buffer)
+            if match is None:
+                return ""
+            self._pos = match.end()
+        buffer, idx, out = self._buffer, self._pos, []
+        while idx < len(buffer):
+            char = buffer[idx]
+            if char == '"':
+                self._done = True
+                idx += 1
+                break
+            if char != "\\":
+                out.append(char)
+                idx += 1
+                continue
+            if idx + 1 >= len(buffer):
+                break  # wait for the rest of the escape sequence
+            escape = buffer[idx + 1]
+            if escape != "u":
+                out.append(self._ESCAPES.get(escape, escape))
+                idx += 2
+                continue
+            if idx + 6 > len(buffer):
+                break
+            code = int(buffer[idx + 2 : idx + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # surrogate pair: wait for the low half before decoding
+                if idx + 12 > len(buffer):
+                    break
+                low = int(buffer[idx + 8 : idx + 12], 16)
+                out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                idx += 12
+                continue
+            out.append(chr(code))
+            idx += 6
+        self._pos = idx
+        return "".join(out)
+
+    @property
+    def content(self) -> str:
+        return self._buffer
+
+
+async def retrieve_async(session_id: str, question: str, generation: int = 0) -> List[Tuple[str, Dict]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _retrieval_executor, lambda: retrieve(session_id, question, generation=generation)
+    )
+
+
+async def _embed_question(question: str) -> List[float]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_retrieval_executor, embed_query, question)
+
+
+async def answer_question(
+    session_id: str, topic: str, question: str, citations: List[Citation], index_generation: int = 0
+) -> AnswerContract:
+    generation = answer_cache.generation(session_id)
+    vector = await _embed_question(question)
+    cached = answer_cache.lookup(session_id, vector)
+    if cached is not None:
+        return cached
+    passages = await retrieve_async(session_id, question, index_generation)
     context = _format_context(passages)
-    answer = _call_model(question, topic, context, citations)
+    answer = await _call_model(question, topic, context, citations)
+    answer_cache.store(session_id, generation, vector, answer)
     return answer
 
 
-__all__ = ["answer_question"]
+async def stream_answer(
+    session_id: str, topic: str, question: str, citations: List[Citation], index_generation: int = 0
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield ``(event, payload)`` pairs: ``citations`` once, ``token`` per summary delta, then ``answer``."""
+    generation = answer_cache.generation(session_id)
+    vector = await _embed_question(question)
+    cached = answer_cache.lookup(session_id, vector)
+    if cached is not None:
+        yield "citations", [citation.dict() for citation in cached.citations]
+        yield "token", cached.summary
+        yield "answer", cached
+        return
+    passages = await retrieve_async(session_id, question, index_generation)
+    # the same citations answer_question attaches, so both endpoints agree
+    yield "citations", [citation.dict() for citation in citations]
+    if not OPENAI_API_KEY:
+        answer = _heuristic_answer(question, topic, citations)
+        yield "token", answer.summary
+    else:
+        client = get_async_openai_client()
+        messages = _build_messages(question, topic, _format_context(passages), citations)
+        summary = SummaryTokenStream()
+        stream = await client.chat.completions.create(
+            model=MODEL_CHAT, messages=messages, temperature=0.2, stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            text = summary.feed(delta)
+            if text:
+                yield "token", text
+        answer = await _parse_answer(summary.content, citations, client, messages)
+    answer_cache.store(session_id, generation, vector, answer)
+    yield "answer", answer
+
+
+__all__ = [
+    "answer_cache",
+    "answer_question",
+    "retrieve_async",
+    "stream_answer",
+    "SemanticAnswerCache",
+    "SummaryTokenStream",
+]
@@ -1,37 +1,52 @@
 """Cleaning pipeline to deduplicate and filter documents."""
 from __future__ import annotations
 
-from typing import List
+from dataclasses import replace
+from typing import List, Optional
 
 import textdistance
 
 from ..utils.logger import get_logger
+from ..utils.minhash import MinHashIndex
 from ..utils.text import normalize_whitespace
 from .scrape import RawDocument
 
 logger = get_logger(__name__)
 
+MIN_WORDS = 150
+DUPLICATE_THRESHOLD = 0.9
+
+
+class Deduplicator:
+    """Incremental filter that drops short documents and near-duplicates of earlier ones."""
+
+    def __init__(self) -> None:
+        self._index = MinHashIndex()
+        self._texts: List[str] = []
+
+    def accept(self, doc: RawDocument) -> Optional[RawDocument]:
+        """Return the cleaned document, or ``None`` if it is too short or a duplicate."""
+        text = normalize_whitespace(doc.text)
+        if len(text.split()) < MIN_WORDS:
+            return None
+        signature = self._index.signature(text)
+        # only LSH candidates pay for the exact similarity check
+        for candidate in self._index.candidates(signature):
+            if textdistance.sorensen(text, self._texts[candidate]) > DUPLICATE_THRESHOLD:
+                return None
+        self._index.add(len(self._texts), signature)
+        self._texts.append(text)
+        # scraped text is already normalized, so this is usually the same object
+        return doc if text == doc.text else replace(doc, text=text)
+
 
 def run(documents: List[RawDocument]) -> List[RawDocument]:
     if not documents:
         return []
-    cleaned: List[RawDocument] = []
-    texts: List[str] = []
-    for doc in documents:
-        text = normalize_whitespace(doc.text)
-        if len(text.split()) < 150:
-            continue
-        duplicate = False
-        for existing in texts:
-            similarity = textdistance.sorensen(text, existing)
-            if similarity > 0.9:
-                duplicate = True
-                break
-        if not duplicate:
-            cleaned.append(RawDocument(url=doc.url, title=doc.title, text=text, html=doc.html, source=doc.source))
-            texts.append(text)
+    deduplicator = Deduplicator()
+    cleaned = [doc for doc in map(deduplicator.accept, documents) if doc is not None]
     logger.info("Cleaned %s -> %s documents", len(documents), len(cleaned))
     return cleaned
 
 
-__all__ = ["run"]
+__all__ = ["Deduplicator", "run"]
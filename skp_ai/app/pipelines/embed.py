@@ -1,68 +1,249 @@
 """Embedding pipeline using OpenAI embeddings."""
 from __future__ import annotations
 
-import hashlib
-from typing import Any, Dict, List, Tuple
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
-import numpy as np
-from openai import OpenAI
-
-from ..config import MODEL_EMBED, OPENAI_API_KEY
-from ..retriever.store import SessionVectorStore
+from ..config import EMBED_CONCURRENCY, EMBED_STORE_BATCH
+from ..embedding import embedding_engine
+from ..embedding.cache import content_hash
+from ..embedding.engine import MAX_BATCH_INPUTS
+from ..retriever.lexical import INDEX_FILE, LexicalIndexBuilder
+from ..retriever.pool import vector_store_pool
+from ..retriever.store import SessionVectorStore, generation_file
+from ..telemetry import EMBED_CHUNKS, EMBED_THROUGHPUT
 from ..utils.logger import get_logger
-from ..utils.text import chunk_text
+from ..utils.text import chunk_text, estimate_tokens
 from .rank import RankedDocument
+from .scrape import RawDocument
 
 logger = get_logger(__name__)
 
 
-def _pseudo_embedding(text: str, dimensions: int = 1536) -> List[float]:
-    digest = hashlib.sha256(text.encode("utf-8")).digest()
-    repeat = (dimensions + len(digest) - 1) // len(digest)
-    data = (digest * repeat)[:dimensions]
-    vector = np.frombuffer(data, dtype=np.uint8).astype(float)
-    norm = np.linalg.norm(vector)
-    if norm == 0:
-        return vector.tolist()
-    return (vector / norm).tolist()
+def chunk_ids(url: str, chunks: List[str]) -> List[str]:
+    """Content-stable chunk ids: unchanged chunks of a page keep their id across builds."""
+    ids: List[str] = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        base = content_hash(f"{url}\n{chunk}")[:32]
+        # a chunk repeated within one page gets a numbered id
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        ids.append(base if occurrence == 0 else f"{base}-{occurrence}")
+    return ids
+
+
+def _flush(
+    store: SessionVectorStore,
+    buffer: List[Tuple[int, List[float]]],
+    chunk_records: List[Dict[str, str]],
+    metadata_records: List[Dict[str, Any]],
+) -> None:
+    if not buffer:
+        return
+    store.upsert(
+        ids=[chunk_records[idx]["id"] for idx, _ in buffer],
+        documents=[chunk_records[idx]["text"] for idx, _ in buffer],
+        metadatas=[metadata_records[idx] for idx, _ in buffer],
+        embeddings=[vector for _, vector in buffer],
+    )
+    buffer.clear()
 
 
-def _embed_openai(chunks: List[str]) -> List[List[float]]:
-    if not OPENAI_API_KEY:
-        logger.warning("OPENAI_API_KEY not set; using deterministic embeddings")
-        return [_pseudo_embedding(chunk) for chunk in chunks]
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.embeddings.create(model=MODEL_EMBED, input=chunks)
-    return [item.embedding for item in response.data]
+def save_lexical_index(session_id: str, builder: LexicalIndexBuilder, generation: int = 0) -> None:
+    """Persist the BM25 index of index ``generation`` next to its manifest."""
+    builder.build().save(generation_file(session_id, generation, INDEX_FILE))
 
 
 def run(session_id: str, ranked_documents: List[RankedDocument]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
-    store = SessionVectorStore(session_id)
     chunk_records: List[Dict[str, str]] = []
     metadata_records: List[Dict[str, Any]] = []
-    for idx, ranked in enumerate(ranked_documents):
+    lexical = LexicalIndexBuilder()
+    for ranked in ranked_documents:
         doc = ranked.document
         chunks = chunk_text(doc.text)
-        if not chunks:
-            continue
-        embeddings = _embed_openai(chunks)
-        ids = [f"{session_id}_{idx}_{i}" for i in range(len(chunks))]
-        metadatas = [
-            {
-                "url": doc.url,
-                "title": doc.title,
-                "cluster": ranked.cluster,
-                "rank_score": ranked.score,
-                "chunk_index": i,
-            }
-            for i in range(len(chunks))
-        ]
-        store.add(ids=ids, documents=chunks, metadatas=metadatas, embeddings=embeddings)
-        for chunk_id, chunk_text_value, metadata in zip(ids, chunks, metadatas):
-            chunk_records.append({"id": chunk_id, "text": chunk_text_value})
-            metadata_records.append(metadata)
-    logger.info("Embedded %s chunks", len(chunk_records))
+        for i, (chunk_id, chunk) in enumerate(zip(chunk_ids(doc.url, chunks), chunks)):
+            chunk_records.append({"id": chunk_id, "text": chunk})
+            lexical.add(chunk_id, chunk)
+            metadata_records.append(
+                {
+                    "url": doc.url,
+                    "title": doc.title,
+                    "cluster": ranked.cluster,
+                    "rank_score": ranked.score,
+                    "chunk_index": i,
+                }
+            )
+    save_lexical_index(session_id, lexical)
+    if not chunk_records:
+        logger.info("Embedded 0 chunks")
+        return chunk_records, metadata_records
+
+    started = time.perf_counter()
+    # batches complete out of order; buffer them so the store sees few large inserts
+    buffer: List[Tuple[int, List[float]]] = []
+    with vector_store_pool.lease(session_id) as store:
+        for indices, vectors in embedding_engine.embed_iter([record["text"] for record in chunk_records]):
+            buffer.extend(zip(indices, vectors))
+            if len(buffer) >= EMBED_STORE_BATCH:
+                _flush(store, buffer, chunk_records, metadata_records)
+        _flush(store, buffer, chunk_records, metadata_records)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    EMBED_CHUNKS.inc(len(chunk_records))
+    EMBED_THROUGHPUT.set(len(chunk_records) / elapsed)
+    logger.info(
+        "Embedded %s chunks in %.2fs (%.1f chunks/s)", len(chunk_records), elapsed, len(chunk_records) / elapsed
+    )
     return chunk_records, metadata_records
 
 
-__all__ = ["run"]
+class StreamingEmbedder:
+    """Chunk documents as they arrive and embed them in background batches.
+
+    Chunks accumulate until a token-budgeted batch is full, which is then
+    dispatched to the shared embedding engine; at most ``max_in_flight``
+    batches are outstanding before ``add`` blocks. Finished vectors are
+    written to index ``generation`` of the session store in
+    ``EMBED_STORE_BATCH`` inserts. Rank score
+    and cluster are unknown while streaming and are filled in by
+    :meth:`apply_ranking`.
+
+    For a refresh, ``stored`` maps the ids already in the store to their
+    metadata. Chunks with a stored id are not re-embedded, and
+    :meth:`remove_stale` deletes chunks in the store that no longer occur.
+
+    Every chunk, reused or not, also goes into :attr:`lexical`, the
+    session's BM25 index, which is complete once the stream ends.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        max_in_flight: int = 2 * EMBED_CONCURRENCY,
+        stored: Optional[Dict[str, Dict[str, Any]]] = None,
+        generation: int = 0,
+    ) -> None:
+        self.session_id = session_id
+        self.generation = generation
+        self.chunk_records: List[Dict[str, str]] = []
+        self.metadata_records: List[Dict[str, Any]] = []
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.embedded = 0
+        self.reused = 0
+        self.lexical = LexicalIndexBuilder()
+        self._stored = stored or {}
+        self._max_in_flight = max(1, max_in_flight)
+        self._doc_chunks: Dict[str, List[int]] = {}
+        self._pending: List[int] = []
+        self._pending_tokens = 0
+        self._in_flight: Deque[Tuple[Future, List[int]]] = deque()
+        self._ready: List[Tuple[int, List[float]]] = []
+        self._started = time.perf_counter()
+
+    def add(self, doc: RawDocument) -> int:
+        """Queue ``doc`` for embedding and return its number of chunks."""
+        if doc.url in self._doc_chunks:
+            return 0
+        chunks = chunk_text(doc.text)
+        ids = chunk_ids(doc.url, chunks)
+        self.documents[doc.url] = {"hash": content_hash(doc.text), "chunk_ids": ids}
+        self._doc_chunks[doc.url] = []
+        for i, (chunk_id, chunk) in enumerate(zip(ids, chunks)):
+            record_idx = len(self.chunk_records)
+            self.chunk_records.append({"id": chunk_id, "text": chunk})
+            self.lexical.add(chunk_id, chunk)
+            self._doc_chunks[doc.url].append(record_idx)
+            stored = self._stored.get(chunk_id)
+            if stored is not None:
+                self.metadata_records.append(dict(stored))
+                self.reused += 1
+                continue
+            self.metadata_records.append(
+                {"url": doc.url, "title": doc.title, "cluster": -1, "rank_score": 0.0, "chunk_index": i}
+            )
+            self._pending.append(record_idx)
+            self._pending_tokens += estimate_tokens(chunk)
+            if self._pending_tokens >= embedding_engine.batch_tokens or len(self._pending) >= MAX_BATCH_INPUTS:
+                self._submit()
+        self._collect(block=False)
+        return len(chunks)
+
+    def _submit(self) -> None:
+        if not self._pending:
+            return
+        while len(self._in_flight) >= self._max_in_flight:
+            self._collect_oldest()
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        future = embedding_engine.submit([self.chunk_records[idx]["text"] for idx in batch])
+        self._in_flight.append((future, batch))
+
+    def _collect_oldest(self) -> None:
+        future, batch = self._in_flight.popleft()
+        self._ready.extend(zip(batch, future.result()))
+
+    def _collect(self, block: bool) -> None:
+        while self._in_flight and (block or self._in_flight[0][0].done()):
+            self._collect_oldest()
+        if len(self._ready) >= EMBED_STORE_BATCH or (block and self._ready):
+            with vector_store_pool.lease(self.session_id, self.generation) as store:
+                written = len(self._ready)
+                _flush(store, self._ready, self.chunk_records, self.metadata_records)
+            self.embedded += written
+
+    def finish(self) -> None:
+        """Embed and store everything still pending."""
+        self._submit()
+        self._collect(block=True)
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        EMBED_CHUNKS.inc(self.embedded)
+        EMBED_THROUGHPUT.set(self.embedded / elapsed)
+        logger.info(
+            "Embedded %s chunks (%s reused) in %.2fs (%.1f chunks/s)",
+            self.embedded,
+            self.reused,
+            elapsed,
+            self.embedded / elapsed,
+        )
+
+    def remove_stale(self) -> int:
+        """Delete stored chunks that this build did not produce; return how many.
+
+        Compares against what the store actually holds rather than the old
+        manifest, so chunks left by an interrupted build are removed too.
+        Call it only once the new manifest and lexical index are saved: until
+        then the old ones may still reference these chunks.
+        """
+        current = {record["id"] for record in self.chunk_records}
+        with vector_store_pool.lease(self.session_id, self.generation) as store:
+            stale = [chunk_id for chunk_id in store.stored_metadata() if chunk_id not in current]
+            for start in range(0, len(stale), EMBED_STORE_BATCH):
+                store.delete(stale[start : start + EMBED_STORE_BATCH])
+        return len(stale)
+
+    def apply_ranking(self, ranked_documents: List[RankedDocument]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        """Write rank score and cluster onto stored chunks; return records ordered by rank."""
+        order: List[int] = []
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for ranked in ranked_documents:
+            for record_idx in self._doc_chunks.get(ranked.document.url, []):
+                metadata = self.metadata_records[record_idx]
+                chunk_id = self.chunk_records[record_idx]["id"]
+                metadata["title"] = ranked.document.title
+                metadata["cluster"] = ranked.cluster
+                metadata["rank_score"] = ranked.score
+                order.append(record_idx)
+                # a refresh only rewrites metadata that actually changed
+                if metadata != self._stored.get(chunk_id):
+                    ids.append(chunk_id)
+                    metadatas.append(metadata)
+        with vector_store_pool.lease(self.session_id, self.generation) as store:
+            for start in range(0, len(ids), EMBED_STORE_BATCH):
+                end = start + EMBED_STORE_BATCH
+                store.update_metadata(ids=ids[start:end], metadatas=metadatas[start:end])
+        return [self.chunk_records[idx] for idx in order], [self.metadata_records[idx] for idx in order]
+
+
+__all__ = ["StreamingEmbedder", "chunk_ids", "run", "save_lexical_index"]
@@ -2,18 +2,29 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional
 
-from rank_bm25 import BM25Okapi
+import numpy as np
+from scipy import sparse
 from sklearn.cluster import MiniBatchKMeans
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 
+from ..config import session_file
+from ..embedding.cache import content_hash
+from ..utils.files import atomic_save_npz
 from ..utils.logger import get_logger
-from ..utils.text import normalize_whitespace
 from .scrape import RawDocument
 
 logger = get_logger(__name__)
 
+MATRIX_FILE = "rank_matrix.npz"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# stateless, so rows hashed in one build stay valid in the next
+_vectorizer = HashingVectorizer(n_features=2**18, alternate_sign=False, norm=None, dtype=np.float32)
+
 
 @dataclass
 class RankedDocument:
@@ -22,45 +33,105 @@ class RankedDocument:
     cluster: int
 
 
-def _bm25_scores(documents: List[RawDocument]) -> List[float]:
-    tokenized_corpus = [normalize_whitespace(doc.text).split() for doc in documents]
-    bm25 = BM25Okapi(tokenized_corpus)
-    query = documents[0].text.split() if documents else []
-    if not query:
-        return [0.0] * len(documents)
-    scores = bm25.get_scores(query)
-    normalized = scores.astype(float)
-    max_score = float(normalized.max()) if normalized.size else 1.0
-    if max_score == 0:
-        return [0.0] * len(documents)
-    return (normalized / max_score).tolist()
+class TermMatrix:
+    """Hashed term counts, one CSR row per document, keyed by content hash.
+
+    The same matrix feeds BM25 scoring and TF-IDF clustering. Saved to a
+    session's ``rank_matrix.npz``, it lets a rebuild reuse the rows of
+    unchanged documents instead of tokenizing them again.
+    """
+
+    def __init__(self, hashes: List[str], matrix: sparse.csr_matrix) -> None:
+        self.hashes = hashes
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, documents: List[RawDocument], previous: Optional["TermMatrix"] = None) -> "TermMatrix":
+        hashes = [content_hash(doc.text) for doc in documents]
+        known: Dict[str, int] = {key: row for row, key in enumerate(previous.hashes)} if previous else {}
+        missing = [idx for idx, key in enumerate(hashes) if key not in known]
+        stacked = [previous.matrix] if previous else []
+        if missing:
+            stacked.append(_vectorizer.transform([documents[idx].text for idx in missing]))
+        offset = previous.matrix.shape[0] if previous else 0
+        rows = np.fromiter((known.get(key, -1) for key in hashes), dtype=np.int64, count=len(hashes))
+        rows[missing] = offset + np.arange(len(missing))
+        if previous is not None:
+            logger.debug("Term matrix reused %s of %s rows", len(hashes) - len(missing), len(hashes))
+        return cls(hashes, sparse.vstack(stacked, format="csr")[rows])
+
+    def bm25_scores(self, query: str, k1: float = BM25_K1, b: float = BM25_B) -> np.ndarray:
+        """Okapi BM25 of every row against ``query``, each distinct query term counted once."""
+        n_docs = self.matrix.shape[0]
+        terms = np.unique(_vectorizer.transform([query]).indices)
+        if not n_docs or not terms.size:
+            return np.zeros(n_docs)
+        lengths = np.asarray(self.matrix.sum(axis=1)).ravel()
+        average = lengths.mean() or 1.0
+        columns = self.matrix[:, terms].tocoo()
+        df = np.bincount(columns.col, minlength=terms.size)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        tf = columns.data.astype(np.float64)
+        norm = k1 * (1 - b + b * lengths[columns.row] / average)
+        weights = idf[columns.col] * tf * (k1 + 1) / (tf + norm)
+        return np.bincount(columns.row, weights=weights, minlength=n_docs)
+
+    def clusters(self, n_clusters: int) -> List[int]:
+        tfidf = TfidfTransformer().fit_transform(self.matrix)
+        labels = MiniBatchKMeans(n_clusters=min(n_clusters, self.matrix.shape[0]), random_state=42).fit_predict(tfidf)
+        return [int(label) for label in labels]
+
+    def save(self, path: Path) -> None:
+        # uncompressed: zlib would cost more than re-hashing the documents it saves
+        atomic_save_npz(
+            path,
+            compress=False,
+            hashes=np.array(self.hashes, dtype=str),
+            data=np.minimum(self.matrix.data, np.iinfo(np.uint16).max).astype(np.uint16),
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.array(self.matrix.shape),
+        )
 
+    @classmethod
+    def load(cls, path: Path) -> Optional["TermMatrix"]:
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["shape"][1]) != _vectorizer.n_features:
+                return None
+            counts = data["data"].astype(np.float32)
+            matrix = sparse.csr_matrix((counts, data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+            return cls(data["hashes"].tolist(), matrix)
 
-def _cluster_documents(documents: List[RawDocument], n_clusters: int = 3) -> List[int]:
-    texts = [doc.text for doc in documents]
-    vectorizer = TfidfVectorizer(max_features=5000)
-    matrix = vectorizer.fit_transform(texts)
-    clusters = MiniBatchKMeans(n_clusters=min(n_clusters, len(documents)), random_state=42)
-    labels = clusters.fit_predict(matrix)
-    return list(labels)
 
+def run(documents: List[RawDocument], topic: str = "", session_id: Optional[str] = None) -> List[RankedDocument]:
+    """Rank ``documents`` by BM25 relevance to ``topic`` plus source authority, and cluster them.
 
-def run(documents: List[RawDocument]) -> List[RankedDocument]:
+    With a ``session_id`` the term matrix is loaded from and saved to the
+    session directory, so unchanged documents are not re-tokenized.
+    """
     if not documents:
         return []
-    bm25_scores = _bm25_scores(documents)
-    clusters = _cluster_documents(documents, n_clusters=min(5, len(documents)))
+    path = session_file(session_id, MATRIX_FILE) if session_id else None
+    terms = TermMatrix.build(documents, TermMatrix.load(path) if path else None)
+    if path:
+        terms.save(path)
+    scores = terms.bm25_scores(topic)
+    max_score = float(scores.max())
+    relevance = scores / max_score if max_score > 0 else scores
+    clusters = terms.clusters(n_clusters=min(5, len(documents)))
     ranked: List[RankedDocument] = []
     for idx, doc in enumerate(documents):
         authority = 0.8
         if "gov" in doc.url or "edu" in doc.url:
             authority = 0.95
         recency = 0.5
-        composite = 0.6 * bm25_scores[idx] + 0.3 * authority + 0.1 * recency
+        composite = 0.6 * relevance[idx] + 0.3 * authority + 0.1 * recency
         ranked.append(RankedDocument(document=doc, score=float(composite), cluster=clusters[idx]))
     ranked.sort(key=lambda item: item.score, reverse=True)
     logger.info("Ranked %s documents", len(ranked))
     return ranked
 
 
-__all__ = ["RankedDocument", "run"]
+__all__ = ["RankedDocument", "TermMatrix", "run"]
@@ -2,114 +2,200 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hashlib
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
-from urllib.robotparser import RobotFileParser
-
-import aiohttp
-import trafilatura
 
 from ..config import (
-    DEFAULT_TIMEOUT,
+    EXTRACT_MAX_PENDING,
+    EXTRACT_WORKERS,
+    HTML_SPILL_PATH,
     MAX_SCRAPE_DOCS,
     ROBOTS_CACHE_PATH,
     SAFE_SCRAPE,
+    SCRAPE_CONCURRENCY,
+    SCRAPE_FRONTIER_SIZE,
+    SCRAPE_TIME_BUDGET,
+    SPILL_HTML,
     load_allowlist,
 )
+from ..crawler import CachedPage, Frontier, crawler, page_cache
+from ..telemetry import PAGE_CACHE_HITS, PAGE_CACHE_MISSES
+from ..utils.html import extract_article, extract_page
 from ..utils.logger import get_logger
-from ..utils.text import normalize_whitespace
 
 logger = get_logger(__name__)
 
+Anchor = Tuple[str, str]
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
 
-@dataclass
+
+@dataclass(slots=True)
 class RawDocument:
+    """Extracted page text and metadata; raw HTML is dropped after extraction.
+
+    When ``SPILL_HTML`` is enabled the HTML is written to ``HTML_SPILL_PATH``
+    for debugging and ``html_path`` points at it.
+    """
+
     url: str
     title: str
     text: str
-    html: str
     source: str
+    html_path: Optional[str] = None
 
 
-async def _fetch(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+def _spill_html(url: str, html: str) -> Optional[str]:
+    path = HTML_SPILL_PATH / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
     try:
-        async with session.get(url, timeout=DEFAULT_TIMEOUT, allow_redirects=True) as resp:
-            if resp.status >= 400:
-                logger.debug("Failed to fetch %s: %s", url, resp.status)
-                return None
-            return await resp.text()
-    except Exception as exc:  # pragma: no cover - network issues
-        logger.debug("Error fetching %s: %s", url, exc)
+        path.write_text(html, encoding="utf-8")
+    except OSError as exc:  # pragma: no cover - debugging aid only
+        logger.debug("Failed to spill HTML for %s: %s", url, exc)
         return None
+    return str(path)
 
 
-async def _load_robots(session: aiohttp.ClientSession, domain: str) -> RobotFileParser:
-    cache_file = ROBOTS_CACHE_PATH / f"{domain.replace(':', '_')}.txt"
-    if cache_file.exists():
-        text = cache_file.read_text(encoding="utf-8")
-    else:
-        text = ""
-        for scheme in ("https", "http"):
-            robots_url = f"{scheme}://{domain}/robots.txt"
-            html = await _fetch(session, robots_url)
-            if html is not None:
-                text = html
-                break
-        cache_file.write_text(text, encoding="utf-8")
-    parser = RobotFileParser()
-    parser.set_url(f"https://{domain}/robots.txt")
-    parser.parse(text.splitlines())
-    return parser
-
-
-async def _is_allowed(session: aiohttp.ClientSession, url: str, user_agent: str = "SKP-AI") -> bool:
-    domain = urlparse(url).netloc
-    parser = await _load_robots(session, domain)
-    allowed = parser.can_fetch(user_agent, url)
-    if not allowed:
-        logger.debug("Blocked by robots.txt: %s", url)
-    return allowed
-
-
-async def _extract(url: str, html: str) -> Optional[RawDocument]:
-    metadata = trafilatura.extract(html, include_links=True, include_comments=False, include_tables=False, output_format="json")
-    if metadata:
-        data = json.loads(metadata)
-        text = normalize_whitespace(data.get("text", ""))
-        if not text:
-            return None
-        title = data.get("title") or data.get("sitename") or url
-        return RawDocument(url=url, title=title, text=text, html=html, source=data.get("source-url", url))
-    text = trafilatura.extract(html) or ""
-    text = normalize_whitespace(text)
-    if not text:
-        return None
-    return RawDocument(url=url, title=url, text=text, html=html, source=url)
+def extract_document(url: str, html: str) -> Optional[RawDocument]:
+    return _to_document(url, extract_article(html))
 
 
-async def _fetch_allowed(session: aiohttp.ClientSession, url: str) -> Optional[RawDocument]:
-    if not await _is_allowed(session, url):
-        return None
-    html = await _fetch(session, url)
-    if html is None:
+def _to_document(url: str, article: Optional[Tuple[Optional[str], str, Optional[str]]]) -> Optional[RawDocument]:
+    if article is None:
         return None
-    return await _extract(url, html)
+    title, text, source = article
+    return RawDocument(url=url, title=title or url, text=text, source=source or url)
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # spawn, not fork: the API process runs several thread pools
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extract_pool
+
+
+def _reset_extract_pool(broken: ProcessPoolExecutor) -> None:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is broken:
+            _extract_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_extract_pool() -> None:
+    global _extract_pool
+    with _extract_pool_lock:
+        pool, _extract_pool = _extract_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
 
+async def _extract(url: str, html: str, slots: asyncio.Semaphore) -> Tuple[Optional[RawDocument], List[Anchor]]:
+    """Parse ``html`` off the event loop; ``slots`` bounds pages queued for extraction."""
+    async with slots:
+        loop = asyncio.get_running_loop()
+        if EXTRACT_WORKERS <= 0:
+            article, anchors = await loop.run_in_executor(None, extract_page, html)
+        else:
+            pool = _get_extract_pool()
+            try:
+                article, anchors = await loop.run_in_executor(pool, extract_page, html)
+            except BrokenProcessPool:
+                logger.warning("Extraction worker died while parsing %s; restarting pool", url)
+                _reset_extract_pool(pool)
+                return None, []
+    doc = _to_document(url, article)
+    if doc is not None and SPILL_HTML:
+        doc.html_path = _spill_html(url, html)
+    return doc, anchors
 
-async def _scrape_urls(urls: Iterable[str]) -> List[RawDocument]:
-    headers = {"User-Agent": "SessionKnowledgeProfileAI/1.0"}
-    connector = aiohttp.TCPConnector(limit_per_host=4)
-    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
-        tasks = [_fetch_allowed(session, url) for url in urls]
-        results = await asyncio.gather(*tasks)
-    documents = [doc for doc in results if doc is not None]
-    logger.info("Scraped %s documents", len(documents))
-    return documents
+
+async def _fetch_and_extract(url: str, slots: asyncio.Semaphore) -> Tuple[Optional[RawDocument], List[Anchor]]:
+    # the page cache reads and writes files; keep that off the shared crawler loop
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, page_cache.get, url) if page_cache is not None else None
+    result = await crawler.fetch(url, cached.validators() if cached is not None else None)
+    if result is None:
+        return None, []
+    if result.status == 304 and cached is not None:
+        PAGE_CACHE_HITS.inc()
+        return RawDocument(url=url, title=cached.title, text=cached.text, source=cached.source), cached.links
+    PAGE_CACHE_MISSES.inc()
+    doc, anchors = await _extract(url, result.text, slots)
+    if doc is not None and page_cache is not None:
+        await loop.run_in_executor(
+            None,
+            page_cache.put,
+            CachedPage(
+                url=url,
+                title=doc.title,
+                text=doc.text,
+                source=doc.source,
+                etag=result.etag,
+                last_modified=result.last_modified,
+                links=anchors,
+            ),
+        )
+    return doc, anchors
+
+
+async def _crawl(frontier: Frontier, on_document: Callable[[RawDocument], None]) -> int:
+    """Fetch the best-scored frontier URLs on the crawler loop until a budget runs out.
+
+    Links found on each page are fed back into the frontier, and each
+    document goes to ``on_document`` as soon as it is extracted. The crawl
+    stops at ``MAX_SCRAPE_DOCS`` documents, after ``SCRAPE_TIME_BUDGET``
+    seconds, or when the frontier is exhausted.
+    """
+    slots = asyncio.Semaphore(max(1, EXTRACT_MAX_PENDING))
+    deadline = time.monotonic() + SCRAPE_TIME_BUDGET
+    in_flight: Dict["asyncio.Task[Tuple[Optional[RawDocument], List[Anchor]]]", str] = {}
+    scraped = fetched = 0
+    try:
+        while True:
+            # fetches already in flight may still yield documents, so only launch what the budget allows
+            while len(in_flight) < SCRAPE_CONCURRENCY and scraped + len(in_flight) < MAX_SCRAPE_DOCS:
+                url = frontier.pop()
+                if url is None:
+                    break
+                in_flight[asyncio.ensure_future(_fetch_and_extract(url, slots))] = url
+            if not in_flight:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.info("Scrape time budget of %ss exhausted", SCRAPE_TIME_BUDGET)
+                break
+            done, _ = await asyncio.wait(in_flight, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url = in_flight.pop(task)
+                fetched += 1
+                doc, anchors = task.result()
+                for href, anchor in anchors:
+                    frontier.add_link(href, anchor, base=url)
+                if doc is not None and scraped < MAX_SCRAPE_DOCS:
+                    scraped += 1
+                    on_document(doc)
+    finally:
+        for task in in_flight:
+            task.cancel()
+    logger.info("Scraped %s documents from %s fetched pages (%s queued)", scraped, fetched, len(frontier))
+    return scraped
 
 
 def _candidate_urls(topic: str, allowlist: Dict[str, Any]) -> List[str]:
+    """Seed URLs: the allowlist's ``seed_urls`` then each allowlisted domain's homepage."""
     seed_urls = allowlist.get("seed_urls", [])
     domains = [entry.get("domain") for entry in allowlist.get("domains", []) if entry.get("domain")]
     candidates: List[str] = []
@@ -128,33 +214,51 @@ def _candidate_urls(topic: str, allowlist: Dict[str, Any]) -> List[str]:
     return ordered[:MAX_SCRAPE_DOCS]
 
 
-def run(topic: str) -> List[RawDocument]:
+def _stream_live(frontier: Frontier) -> Iterator[RawDocument]:
+    """Crawl on the shared crawler loop and yield documents as they arrive."""
+    results: "queue.Queue[Optional[RawDocument]]" = queue.Queue()
+    future = crawler.submit(_crawl(frontier, results.put))
+    future.add_done_callback(lambda _: results.put(None))
+    try:
+        while True:
+            doc = results.get()
+            if doc is None:
+                break
+            yield doc
+    finally:
+        # stop fetching if the consumer goes away early
+        future.cancel()
+    future.result()
+
+
+def stream(topic: str) -> Iterator[RawDocument]:
+    """Yield scraped documents in completion order so later stages can start early."""
     allowlist = load_allowlist()
     urls = _candidate_urls(topic, allowlist)
     if not urls:
         logger.warning("Allowlist provided no candidate URLs; skipping scrape")
-        return []
+        return
     allowed_domains = {entry.get("domain") for entry in allowlist.get("domains", [])}
     filtered_urls = [url for url in urls if not allowed_domains or urlparse(url).netloc in allowed_domains]
     if SAFE_SCRAPE:
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            documents = loop.run_until_complete(_scrape_urls(filtered_urls))
-        finally:
-            loop.run_until_complete(loop.shutdown_asyncgens())
-            loop.close()
-            asyncio.set_event_loop(None)
-        return documents
+        # links are only followed within the allowlist, or the seeds' own hosts if it names no domains
+        hosts = {domain for domain in allowed_domains if domain} or {urlparse(url).netloc for url in filtered_urls}
+        frontier = Frontier(topic, hosts, max_size=SCRAPE_FRONTIER_SIZE)
+        for url in filtered_urls:
+            frontier.add_seed(url)
+        yield from _stream_live(frontier)
+        return
     # SAFE_SCRAPE false -> read cached samples
     samples_dir = ROBOTS_CACHE_PATH.parent / "samples"
-    documents: List[RawDocument] = []
     for url in filtered_urls:
         sample_file = samples_dir / f"{urlparse(url).netloc}.txt"
         if sample_file.exists():
             text = sample_file.read_text(encoding="utf-8")
-            documents.append(RawDocument(url=url, title=url, text=text, html=text, source=url))
-    return documents
+            yield RawDocument(url=url, title=url, text=text, source=url)
+
+
+def run(topic: str) -> List[RawDocument]:
+    return list(stream(topic))
 
 
-__all__ = ["RawDocument", "run"]
+__all__ = ["RawDocument", "extract_document", "run", "shutdown_extract_pool", "stream"]
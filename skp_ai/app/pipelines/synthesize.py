@@ -12,6 +12,8 @@ from .rank import RankedDocument
 
 logger = get_logger(__name__)
 
+LEDGER_SIZE = 12  # top-ranked documents cited in the ledger; the summary reads a prefix of them
+
 
 def _format_documents(ranked_documents: List[RankedDocument], limit: int = 5) -> str:
     snippets = []
@@ -46,7 +48,7 @@ def _summarize(topic: str, ranked_documents: List[RankedDocument]) -> str:
 
 def _build_ledger(ranked_documents: List[RankedDocument]) -> List[Citation]:
     citations: List[Citation] = []
-    for idx, ranked in enumerate(ranked_documents[:12]):
+    for idx, ranked in enumerate(ranked_documents[:LEDGER_SIZE]):
         doc = ranked.document
         citation_id = f"S{idx + 1:02d}"
         title = doc.title[:200]
@@ -62,4 +64,4 @@ def run(topic: str, ranked_documents: List[RankedDocument]) -> Tuple[str, List[C
     return summary, citations
 
 
-__all__ = ["run"]
+__all__ = ["LEDGER_SIZE", "run"]
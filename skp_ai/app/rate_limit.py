@@ -50,9 +50,13 @@ class RateLimiter:
 rate_limiter = RateLimiter(RATE_LIMIT_RPS)
 
 
+def client_key(request: Request) -> str:
+    """Identity that rate limits and build quotas are applied to."""
+    return request.client.host if request.client else "anonymous"
+
+
 def rate_limit_dependency(request: Request) -> None:
-    client = request.client.host if request.client else "anonymous"
-    rate_limiter.check(client)
+    rate_limiter.check(client_key(request))
 
 
-__all__ = ["rate_limit_dependency", "rate_limiter", "RateLimiter", "TokenBucket"]
+__all__ = ["client_key", "rate_limit_dependency", "rate_limiter", "RateLimiter", "TokenBucket"]
@@ -1,5 +1,7 @@
 """Retriever exports."""
+from .lexical import LexicalIndex, LexicalIndexBuilder
+from .pool import VectorStorePool, vector_store_pool
 from .search import retrieve
 from .store import SessionVectorStore
 
-__all__ = ["retrieve", "SessionVectorStore"]
+__all__ = ["LexicalIndex", "LexicalIndexBuilder", "retrieve", "SessionVectorStore", "VectorStorePool", "vector_store_pool"]
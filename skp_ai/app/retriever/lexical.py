@@ -0,0 +1,138 @@
+"""BM25 lexical index over session chunks."""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..utils.files import atomic_save_npz
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FILE = "lexical.npz"
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class LexicalIndexBuilder:
+    """Accumulate chunk term counts as chunks are produced; :meth:`build` freezes them."""
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self._vocabulary: Dict[str, int] = {}
+        self._postings: List[List[Tuple[int, int]]] = []  # term -> [(chunk, tf)]
+        self._lengths: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, chunk_id: str, text: str) -> None:
+        chunk = len(self.ids)
+        self.ids.append(chunk_id)
+        counts = Counter(tokenize(text))
+        self._lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            term_id = self._vocabulary.setdefault(term, len(self._vocabulary))
+            if term_id == len(self._postings):
+                self._postings.append([])
+            self._postings[term_id].append((chunk, tf))
+
+    def build(self) -> "LexicalIndex":
+        sizes = np.fromiter((len(postings) for postings in self._postings), dtype=np.int64, count=len(self._postings))
+        indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        flat = [pair for postings in self._postings for pair in postings]
+        pairs = np.array(flat, dtype=np.int64).reshape(-1, 2)
+        return LexicalIndex(
+            ids=list(self.ids),
+            vocabulary=list(self._vocabulary),
+            indptr=indptr,
+            chunks=pairs[:, 0].astype(np.int32),
+            tf=np.minimum(pairs[:, 1], np.iinfo(np.uint16).max).astype(np.uint16),
+            lengths=np.asarray(self._lengths, dtype=np.int32),
+        )
+
+
+class LexicalIndex:
+    """Okapi BM25 over an inverted index stored as term-major postings arrays.
+
+    A query only touches the postings of its own terms, so scoring cost grows
+    with how common those terms are rather than with the corpus size.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        vocabulary: List[str],
+        indptr: np.ndarray,
+        chunks: np.ndarray,
+        tf: np.ndarray,
+        lengths: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.ids = ids
+        self.vocabulary = {term: idx for idx, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.chunks = chunks
+        self.tf = tf
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        average = float(lengths.mean()) if len(lengths) else 0.0
+        self._norm = k1 * (1 - b + b * lengths / average) if average else np.full(len(lengths), k1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """``(chunk id, score)`` for the best ``top_k`` chunks containing any query term."""
+        scores = np.zeros(len(self.ids), dtype=np.float64)
+        total = len(self.ids)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            chunks = self.chunks[start:end]
+            tf = self.tf[start:end].astype(np.float64)
+            idf = np.log1p((total - (end - start) + 0.5) / ((end - start) + 0.5))
+            scores[chunks] += idf * tf * (self.k1 + 1) / (tf + self._norm[chunks])
+        hits = np.flatnonzero(scores)
+        if hits.size > top_k:
+            hits = hits[np.argpartition(scores[hits], -top_k)[-top_k:]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[idx], float(scores[idx])) for idx in hits]
+
+    def save(self, path: Path) -> None:
+        atomic_save_npz(
+            path,
+            ids=np.array(self.ids, dtype=str),
+            vocabulary=np.array(list(self.vocabulary), dtype=str),
+            indptr=self.indptr,
+            chunks=self.chunks,
+            tf=self.tf,
+            lengths=self.lengths,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                ids=data["ids"].tolist(),
+                vocabulary=data["vocabulary"].tolist(),
+                indptr=data["indptr"],
+                chunks=data["chunks"],
+                tf=data["tf"],
+                lengths=data["lengths"],
+            )
+
+
+__all__ = ["INDEX_FILE", "LexicalIndex", "LexicalIndexBuilder", "tokenize"]
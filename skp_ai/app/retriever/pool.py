@@ -0,0 +1,182 @@
+"""Process-wide pool of open session vector stores."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import VECTOR_STORE_IDLE_SECONDS, VECTOR_STORE_POOL_SIZE
+from ..telemetry import VECTOR_POOL_EVICTIONS, VECTOR_POOL_HITS, VECTOR_POOL_OPENS, VECTOR_POOL_SIZE
+from ..utils.logger import get_logger
+from .store import SessionVectorStore
+
+logger = get_logger(__name__)
+
+_Key = Tuple[str, int]  # (session id, index generation)
+
+
+@dataclass
+class _PoolEntry:
+    store: SessionVectorStore
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0
+    retired: Optional[str] = None  # eviction reason once retired; closed when the last lease is returned
+
+
+class VectorStorePool:
+    """Bounded LRU pool of open ``SessionVectorStore`` handles.
+
+    Stores are leased with :meth:`lease` per session and index generation;
+    entries beyond ``max_size`` or idle longer than ``idle_seconds`` are
+    closed, except while leased. :meth:`discard` and :meth:`use_generation`
+    retire handles that are still leased, closing them on their last release.
+    """
+
+    def __init__(self, max_size: int = VECTOR_STORE_POOL_SIZE, idle_seconds: float = VECTOR_STORE_IDLE_SECONDS) -> None:
+        self.max_size = max(1, max_size)
+        self.idle_seconds = idle_seconds
+        self._entries: "OrderedDict[_Key, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._open_locks: Dict[_Key, threading.Lock] = {}
+        self._retired: Dict[int, _PoolEntry] = {}  # retired while leased, by id() of their store
+        self._generations: Dict[str, int] = {}  # generation each session is served from here
+
+    def _acquire(self, key: _Key) -> SessionVectorStore:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases += 1
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(key)
+                VECTOR_POOL_HITS.inc()
+                return entry.store
+            open_lock = self._open_locks.setdefault(key, threading.Lock())
+        # open outside the pool lock so one slow open does not block other sessions
+        try:
+            with open_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.leases += 1
+                        entry.last_used = time.monotonic()
+                        self._entries.move_to_end(key)
+                        VECTOR_POOL_HITS.inc()
+                        return entry.store
+                store = SessionVectorStore(*key)
+                VECTOR_POOL_OPENS.inc()
+                with self._lock:
+                    self._entries[key] = _PoolEntry(store=store, leases=1)
+                    victims = self._collect_victims()
+                    VECTOR_POOL_SIZE.set(len(self._entries))
+        finally:
+            with self._lock:
+                if self._open_locks.get(key) is open_lock:
+                    del self._open_locks[key]
+        self._close(victims)
+        return store
+
+    def _release(self, key: _Key, store: SessionVectorStore) -> None:
+        victims: List[SessionVectorStore] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.store is store:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+            else:
+                entry = self._retired.get(id(store))
+                if entry is not None:
+                    entry.leases -= 1
+                    if entry.leases <= 0:
+                        del self._retired[id(store)]
+                        victims.append(store)
+                        VECTOR_POOL_EVICTIONS.labels(entry.retired).inc()
+            victims.extend(self._collect_victims())
+            VECTOR_POOL_SIZE.set(len(self._entries))
+        self._close(victims)
+
+    def _collect_victims(self) -> List[SessionVectorStore]:
+        """Pop idle and over-capacity entries; caller must hold the lock."""
+        now = time.monotonic()
+        victims: List[SessionVectorStore] = []
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if entry.leases > 0:
+                continue
+            if now - entry.last_used > self.idle_seconds:
+                reason = "idle"
+            elif len(self._entries) > self.max_size:
+                reason = "capacity"
+            else:
+                break
+            del self._entries[key]
+            victims.append(entry.store)
+            VECTOR_POOL_EVICTIONS.labels(reason).inc()
+        return victims
+
+    def _retire(self, session_id: str, keep: Optional[int], reason: str) -> List[SessionVectorStore]:
+        """Pop the session's entries other than generation ``keep``; caller must hold the lock.
+
+        Leased entries are set aside until released, so later leases open a
+        fresh handle rather than sharing the retired one.
+        """
+        victims: List[SessionVectorStore] = []
+        for key in [key for key in self._entries if key[0] == session_id and key[1] != keep]:
+            entry = self._entries.pop(key)
+            if entry.leases > 0:
+                entry.retired = reason
+                self._retired[id(entry.store)] = entry
+                continue
+            victims.append(entry.store)
+            VECTOR_POOL_EVICTIONS.labels(reason).inc()
+        VECTOR_POOL_SIZE.set(len(self._entries))
+        return victims
+
+    @staticmethod
+    def _close(stores: List[SessionVectorStore]) -> None:
+        for store in stores:
+            try:
+                store.close()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.debug("Failed to close vector store %s: %s", store.session_id, exc)
+
+    @contextmanager
+    def lease(self, session_id: str, generation: int = 0) -> Iterator[SessionVectorStore]:
+        key = (session_id, generation)
+        store = self._acquire(key)
+        try:
+            yield store
+        finally:
+            self._release(key, store)
+
+    def use_generation(self, session_id: str, generation: int) -> bool:
+        """Serve ``session_id`` from ``generation`` from now on; return whether that changed.
+
+        Handles on the generations it replaces are closed: an open Chroma
+        client keeps answering from the index it loaded, and reopening the
+        same path in this process would reuse it.
+        """
+        with self._lock:
+            previous = self._generations.get(session_id)
+            if previous == generation:
+                return False
+            self._generations[session_id] = generation
+            victims = self._retire(session_id, generation, "superseded")
+        self._close(victims)
+        return True
+
+    def discard(self, session_id: str, keep: Optional[int] = None) -> None:
+        """Close and forget a session's stores, except generation ``keep``, e.g. before deleting their files."""
+        with self._lock:
+            if keep is None:
+                self._generations.pop(session_id, None)
+            victims = self._retire(session_id, keep, "discarded")
+        self._close(victims)
+
+
+vector_store_pool = VectorStorePool()
+
+
+__all__ = ["VectorStorePool", "vector_store_pool"]
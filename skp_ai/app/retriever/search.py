@@ -1,28 +1,148 @@
 """Retrieval utilities."""
 from __future__ import annotations
 
-from typing import List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-from ..config import TOP_K_RETRIEVAL
+from ..config import (
+    HYBRID_CANDIDATES,
+    RETRIEVAL_MODE,
+    RETRIEVAL_WORKERS,
+    RRF_K,
+    TOP_K_RETRIEVAL,
+    VECTOR_STORE_POOL_SIZE,
+)
+from ..embedding import embed_query
+from ..telemetry import RETRIEVAL_LATENCY
 from ..utils.logger import get_logger
-from .store import SessionVectorStore
+from .lexical import INDEX_FILE, LexicalIndex
+from .pool import vector_store_pool
+from .store import generation_file
 
 logger = get_logger(__name__)
 
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
 
-def retrieve(session_id: str, query: str, top_k: int = TOP_K_RETRIEVAL) -> List[Tuple[str, dict]]:
-    store = SessionVectorStore(session_id)
-    results = store.query(query_texts=[query], n_results=top_k)
+# lexical search runs here while the calling thread queries Chroma
+_lexical_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="skp-lexical")
+
+
+class LexicalIndexCache:
+    """LRU of loaded lexical indexes, reloaded when the file on disk changes."""
+
+    def __init__(self, max_size: int = VECTOR_STORE_POOL_SIZE) -> None:
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[int, LexicalIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, generation: int = 0) -> Optional[LexicalIndex]:
+        key = (session_id, generation)
+        path = generation_file(session_id, generation, INDEX_FILE)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(key)
+                return entry[1]
+        index = LexicalIndex.load(path)
+        with self._lock:
+            self._entries[key] = (mtime, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return index
+
+
+lexical_indexes = LexicalIndexCache()
+
+
+def _vector_search(
+    session_id: str, query: str, n_results: int, generation: int = 0
+) -> List[Tuple[str, str, dict, float]]:
+    query_embedding = embed_query(query)
+    with vector_store_pool.lease(session_id, generation) as store:
+        results = store.query(query_embeddings=[query_embedding], n_results=n_results)
+    ids = results.get("ids", [[]])[0]
     documents = results.get("documents", [[]])[0]
     metadatas = results.get("metadatas", [[]])[0]
-    scores = results.get("distances", [[]])[0]
-    payload: List[Tuple[str, dict]] = []
-    for doc, meta, score in zip(documents, metadatas, scores):
-        meta = meta or {}
-        meta["score"] = score
-        payload.append((doc, meta))
-    logger.debug("Retrieved %s documents for %s", len(payload), session_id)
+    distances = results.get("distances", [[]])[0]
+    return [
+        (chunk_id, doc, meta or {}, distance)
+        for chunk_id, doc, meta, distance in zip(ids, documents, metadatas, distances)
+    ]
+
+
+def _lexical_search(session_id: str, query: str, n_results: int, generation: int = 0) -> Optional[List[Tuple[str, float]]]:
+    index = lexical_indexes.get(session_id, generation)
+    if index is None:
+        return None
+    return index.search(query, n_results)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each id scores ``sum(1 / (k + rank))`` over the lists it appears in."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def retrieve(
+    session_id: str, query: str, top_k: int = TOP_K_RETRIEVAL, mode: str = RETRIEVAL_MODE, generation: int = 0
+) -> List[Tuple[str, dict]]:
+    """Top ``top_k`` ``(chunk text, metadata)`` pairs for ``query`` from index ``generation``.
+
+    ``vector`` ranks by embedding distance and ``lexical`` by BM25. ``hybrid``
+    runs both concurrently over ``HYBRID_CANDIDATES`` results each and fuses
+    them with reciprocal-rank fusion. Sessions built before lexical indexes
+    existed fall back to vector search. ``metadata["score"]`` is the distance,
+    BM25 score or fused score respectively.
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {mode!r}")
+    started = time.perf_counter()
+    depth = max(top_k, HYBRID_CANDIDATES) if mode == "hybrid" else top_k
+    lexical_future = (
+        _lexical_executor.submit(_lexical_search, session_id, query, depth, generation) if mode != "vector" else None
+    )
+    vector_hits = _vector_search(session_id, query, depth, generation) if mode != "lexical" else []
+    lexical_hits = lexical_future.result() if lexical_future is not None else None
+    if lexical_hits is None and mode != "vector":
+        if mode == "lexical":
+            logger.warning("No lexical index for %s; using vector search", session_id)
+            vector_hits = _vector_search(session_id, query, top_k, generation)
+        mode = "vector"
+
+    if mode == "vector":
+        payload = [(doc, {**meta, "score": distance}) for _, doc, meta, distance in vector_hits[:top_k]]
+    else:
+        if mode == "lexical":
+            ranked = lexical_hits[:top_k]
+        else:
+            rankings = [[hit[0] for hit in vector_hits], [hit[0] for hit in lexical_hits]]
+            ranked = reciprocal_rank_fusion(rankings)[:top_k]
+        found = {chunk_id: (doc, meta) for chunk_id, doc, meta, _ in vector_hits}
+        missing = [chunk_id for chunk_id, _ in ranked if chunk_id not in found]
+        if missing:
+            with vector_store_pool.lease(session_id, generation) as store:
+                results = store.get(missing)
+            for chunk_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"]):
+                found[chunk_id] = (doc, meta or {})
+        payload = [
+            (found[chunk_id][0], {**found[chunk_id][1], "score": score}) for chunk_id, score in ranked if chunk_id in found
+        ]
+    RETRIEVAL_LATENCY.labels(mode).observe(time.perf_counter() - started)
+    logger.debug("Retrieved %s documents for %s (%s)", len(payload), session_id, mode)
     return payload
 
 
-__all__ = ["retrieve"]
+__all__ = ["LexicalIndexCache", "RETRIEVAL_MODES", "lexical_indexes", "reciprocal_rank_fusion", "retrieve"]
@@ -1,18 +1,67 @@
 """ChromaDB store helpers."""
 from __future__ import annotations
 
+import os
+import shutil
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import chromadb
+from chromadb.api.shared_system_client import SharedSystemClient
 
-from ..config import get_session_dir
+from ..config import get_session_dir, session_file
+from .lexical import INDEX_FILE
+
+# files saved per generation; those of generation 0 sit in the session directory
+_GENERATION_FILES = ("manifest.json", INDEX_FILE)
+
+
+def store_dir(session_id: str, generation: int = 0) -> Path:
+    """Chroma directory of one index generation; generation 0 is ``chroma/``, as sessions had before."""
+    return get_session_dir(session_id) / ("chroma" if generation == 0 else f"chroma-{generation}")
+
+
+def generation_file(session_id: str, generation: int, name: str) -> Path:
+    """Path of a file built alongside one index generation, such as its manifest.
+
+    Files of generation 0 stay in the session directory, where sessions had
+    them before; later ones live in the generation's directory and so are
+    replaced and deleted together with it.
+    """
+    if generation == 0:
+        return session_file(session_id, name)
+    return store_dir(session_id, generation) / name
+
+
+def prepare_generation(session_id: str, generation: int, base: Optional[int] = None, resume: bool = False) -> None:
+    """Set up the directory a build writes ``generation`` into.
+
+    A refresh passes the generation being served as ``base``; the new one
+    starts as a copy of it, so unchanged chunks are reused without touching
+    the index readers have open. Every other generation is deleted, except
+    the target itself when ``resume`` continues an interrupted attempt.
+    """
+    target = store_dir(session_id, generation)
+    source = store_dir(session_id, base) if base is not None else None
+    for path in get_session_dir(session_id).glob("chroma*"):
+        if path == source or (resume and path == target):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+    if 0 not in (base, generation):
+        for name in _GENERATION_FILES:
+            session_file(session_id, name).unlink(missing_ok=True)
+    if target.exists() or source is None or not source.exists():
+        return
+    staging = target.with_name(f"{target.name}.tmp")
+    shutil.copytree(source, staging)
+    os.replace(staging, target)
 
 
 class SessionVectorStore:
-    def __init__(self, session_id: str) -> None:
+    def __init__(self, session_id: str, generation: int = 0) -> None:
         self.session_id = session_id
-        self.persist_dir = str(get_session_dir(session_id) / "chroma")
+        self.generation = generation
+        self.persist_dir = str(store_dir(session_id, generation))
         Path(self.persist_dir).mkdir(parents=True, exist_ok=True)
         self.client = chromadb.PersistentClient(path=self.persist_dir)
         self.collection = self.client.get_or_create_collection(name="skp")
@@ -29,8 +78,58 @@ class SessionVectorStore:
             kwargs["embeddings"] = embeddings
         self.collection.add(**kwargs)
 
-    def query(self, query_texts: List[str], n_results: int) -> dict:
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+    ) -> None:
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get(self, ids: List[str]) -> dict:
+        return self.collection.get(ids=ids, include=["documents", "metadatas"])
+
+    def stored_metadata(self) -> Dict[str, dict]:
+        """Map every stored chunk id to its metadata."""
+        results = self.collection.get(include=["metadatas"])
+        return {chunk_id: meta or {} for chunk_id, meta in zip(results["ids"], results["metadatas"])}
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        n_results: int = 10,
+        query_embeddings: Optional[List[List[float]]] = None,
+    ) -> dict:
+        # prefer embeddings: query_texts would be embedded by Chroma's default model,
+        # not the one the collection was indexed with
+        if query_embeddings is not None:
+            return self.collection.query(query_embeddings=query_embeddings, n_results=n_results)
         return self.collection.query(query_texts=query_texts, n_results=n_results)
 
+    def close(self) -> None:
+        """Stop the Chroma system behind this store, freeing its index memory and file handles.
+
+        Chroma keeps one system per path for the life of the process, so
+        dropping the client alone frees nothing. ``close()`` releases it;
+        clients that lack it get their system stopped and uncached here.
+        """
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+            return
+        identifier = getattr(self.client, "_identifier", self.persist_dir)
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        getattr(SharedSystemClient, "_identifier_to_refcount", {}).pop(identifier, None)
+        if system is not None:
+            system.stop()
+
 
-__all__ = ["SessionVectorStore"]
+__all__ = ["SessionVectorStore", "generation_file", "prepare_generation", "store_dir"]
@@ -1,10 +1,21 @@
 """Session build endpoints."""
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+import time
+from typing import Any, Dict, List, Optional
 
-from ..background import estimate_eta, job_registry
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+
+from ..background import estimate_eta, job_registry, load_skp
+from ..config import KB_SHARING_ENABLED, delete_session_dir
+from ..jobqueue import AdmissionError, Job, JobCancelled
+from ..knowledge import build_state, is_knowledge_base, knowledge_bases
 from ..pipelines import clean, embed, rank, scrape, synthesize
+from ..pipelines.answer import answer_cache
+from ..rate_limit import client_key
+from ..retriever.pool import vector_store_pool
+from ..retriever.store import prepare_generation
 from ..schema.contracts import BuildRequest, SessionStatusResponse, StartSessionResponse
 from ..schema.models import SessionStage
 from ..utils.logger import get_logger
@@ -14,6 +25,7 @@ logger = get_logger(__name__)
 
 
 def _update_stage(session_id: str, stage: SessionStage, detail: str = "", documents: int = 0) -> None:
+    job_registry.check_cancelled(session_id)
     job_registry.update_state(
         session_id,
         stage=stage,
@@ -22,56 +34,211 @@ def _update_stage(session_id: str, stage: SessionStage, detail: str = "", docume
     )
 
 
-def _execute_pipeline(state) -> None:
+class _StreamProgress:
+    """Throttled per-stage counters for the overlapped discover/clean/embed phase."""
+
+    def __init__(self, session_id: str, interval: float = 1.0, prefix: str = "") -> None:
+        self.session_id = session_id
+        self.interval = interval
+        self.prefix = prefix
+        self.discovered = 0
+        self.retained = 0
+        self.embedded = 0
+        self._last = 0.0
+
+    def report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        job_registry.check_cancelled(self.session_id)
+        job_registry.update_state(
+            self.session_id,
+            detail=(
+                f"{self.prefix}Discovering sources ({self.discovered} fetched, {self.retained} retained, "
+                f"{self.embedded} chunks embedded)"
+            ),
+            documents_discovered=self.discovered,
+            documents_retained=self.retained,
+            chunks_embedded=self.embedded,
+            eta_seconds=estimate_eta(SessionStage.DISCOVER, self.discovered),
+        )
+
+
+def _synthesis_key(documents: List[Dict[str, Any]]) -> List[List[str]]:
+    """What synthesis depends on: the top-ranked documents' identity and content."""
+    return [[doc["url"], doc.get("title", ""), doc.get("content_hash", "")] for doc in documents[: synthesize.LEDGER_SIZE]]
+
+
+def _stored_chunks(session_id: str, generation: int) -> Dict[str, Dict[str, Any]]:
+    """Chunks already in index ``generation``, copied there by a refresh or stored by an interrupted attempt.
+
+    They are reused instead of re-embedded.
+    """
+    with vector_store_pool.lease(session_id, generation) as store:
+        return store.stored_metadata()
+
+
+def _index_documents(
+    session_id: str, topic: str, refresh: bool, resume: bool, stage, generation: int, base: int
+) -> Dict[str, Any]:
+    """Discover, clean, embed and rank into index ``generation``; return what synthesis needs as a checkpoint.
+
+    A refresh starts from a copy of the ``base`` generation being served.
+    """
+    prepare_generation(session_id, generation, base=base if refresh else None, resume=resume)
+    stored = _stored_chunks(session_id, generation) if refresh or resume else {}
+
+    # scrape, clean and embed overlap: each document is deduplicated and
+    # chunked into embedding batches as soon as it is fetched
+    stage(SessionStage.DISCOVER, "Discovering sources")
+    deduplicator = clean.Deduplicator()
+    embedder = embed.StreamingEmbedder(session_id, stored=stored, generation=generation)
+    progress = _StreamProgress(session_id, prefix="Refreshing: " if refresh else "")
+    cleaned_documents = []
+    for raw_document in scrape.stream(topic):
+        progress.discovered += 1
+        document = deduplicator.accept(raw_document)
+        if document is not None:
+            cleaned_documents.append(document)
+            embedder.add(document)
+            progress.retained += 1
+        progress.embedded = embedder.embedded
+        progress.report()
+    progress.report(force=True)
+
+    stage(SessionStage.EMBED, "Embedding knowledge base", len(cleaned_documents))
+    embedder.finish()
+    job_registry.update_state(session_id, chunks_embedded=embedder.embedded)
+
+    stage(SessionStage.RANK, "Ranking documents", len(cleaned_documents))
+    ranked_documents = rank.run(cleaned_documents, topic=topic, session_id=session_id)
+    chunks, metadata = embedder.apply_ranking(ranked_documents)
+    manifest = {"chunks": chunks, "metadata": metadata, "documents": embedder.documents}
+    job_registry.save_manifest(session_id, manifest, generation)
+    embed.save_lexical_index(session_id, embedder.lexical, generation)
+    # only now does nothing saved refer to chunks this build dropped
+    removed = embedder.remove_stale()
+
+    return {
+        "documents": [
+            {
+                "url": doc.document.url,
+                "title": doc.document.title,
+                "score": doc.score,
+                "cluster": doc.cluster,
+                "content_hash": embedder.documents[doc.document.url]["hash"],
+            }
+            for doc in ranked_documents
+        ],
+        # synthesis reads at most this much of the top-ranked documents
+        "sources": [
+            {
+                "url": doc.document.url,
+                "title": doc.document.title,
+                "source": doc.document.source,
+                "text": doc.document.text[:2000],
+            }
+            for doc in ranked_documents[: synthesize.LEDGER_SIZE]
+        ],
+        "embedded": embedder.embedded,
+        "reused": embedder.reused,
+        "removed": removed,
+    }
+
+
+def _execute_pipeline(state, job: Optional[Job] = None, refresh: bool = False) -> bool:
+    """Build or refresh the session; return whether it succeeded (a failed refresh returns ``False``)."""
     session_id = state.session_id
     topic = state.topic
+    previous_skp = load_skp(session_id) if refresh else None
+    # the index is written to a new generation beside the one being served and
+    # published with READY; readers then switch to it (see chat._ready_state)
+    generation = state.generation + 1
+
+    def stage(stage_name: SessionStage, detail: str, documents: int = 0) -> None:
+        # a refresh keeps the session READY so it can answer from the current index meanwhile
+        if refresh:
+            job_registry.check_cancelled(session_id)
+            job_registry.update_state(session_id, detail=f"Refreshing: {detail}")
+        else:
+            _update_stage(session_id, stage_name, detail, documents)
+
+    if refresh:
+        job_registry.update_state(session_id, refreshing=True)
+    else:
+        answer_cache.invalidate(session_id)
     try:
-        _update_stage(session_id, SessionStage.DISCOVER, "Discovering sources")
-        raw_documents = scrape.run(topic)
-        documents_count = len(raw_documents)
-        job_registry.update_state(session_id, documents_discovered=documents_count)
-
-        _update_stage(session_id, SessionStage.CLEAN, "Cleaning corpus", documents_count)
-        cleaned_documents = clean.run(raw_documents)
-        job_registry.update_state(session_id, documents_retained=len(cleaned_documents))
-
-        _update_stage(session_id, SessionStage.RANK, "Ranking documents", len(cleaned_documents))
-        ranked_documents = rank.run(cleaned_documents)
-
-        _update_stage(session_id, SessionStage.EMBED, "Embedding knowledge base", len(ranked_documents))
-        chunks, metadata = embed.run(session_id, ranked_documents)
-        manifest = {"chunks": chunks, "metadata": metadata}
-        job_registry.save_manifest(session_id, manifest)
-
-        _update_stage(session_id, SessionStage.SYNTHESIZE, "Synthesizing evidence", len(ranked_documents))
-        summary, citations = synthesize.run(topic, ranked_documents)
-        ledger_payload = [citation.dict() for citation in citations]
+        indexed = job.checkpoint.get("indexed") if job else None
+        if indexed is None:
+            resume = job is not None and job.attempts > 1
+            indexed = _index_documents(session_id, topic, refresh, resume, stage, generation, state.generation)
+            if job is not None:
+                job_registry.checkpoint(job, indexed=indexed)
+        else:
+            logger.info("Session %s resumes after indexing", session_id)
+
+        documents = indexed["documents"]
+        if previous_skp and _synthesis_key(previous_skp.get("documents", [])) == _synthesis_key(documents):
+            summary = previous_skp.get("summary", "")
+            ledger_payload = previous_skp.get("ledger", [])
+            logger.info("Top-ranked sources unchanged for session %s; reusing synthesis", session_id)
+        else:
+            stage(SessionStage.SYNTHESIZE, "Synthesizing evidence", len(documents))
+            sources = [
+                rank.RankedDocument(document=scrape.RawDocument(**source), score=doc["score"], cluster=doc["cluster"])
+                for source, doc in zip(indexed["sources"], documents)
+            ]
+            summary, citations = synthesize.run(topic, sources)
+            ledger_payload = [citation.dict() for citation in citations]
         skp_payload = {
             "topic": topic,
             "summary": summary,
             "ledger": ledger_payload,
-            "documents": [
-                {
-                    "url": doc.document.url,
-                    "title": doc.document.title,
-                    "score": doc.score,
-                    "cluster": doc.cluster,
-                }
-                for doc in ranked_documents
-            ],
+            "documents": documents,
         }
         job_registry.save_skp(session_id, skp_payload)
+        # close this process's writer so the new generation is opened fresh
+        vector_store_pool.discard(session_id, keep=state.generation)
+        # answers cached while this build ran were computed against the old index
+        answer_cache.invalidate(session_id)
         job_registry.update_state(
             session_id,
+            generation=generation,
             stage=SessionStage.READY,
-            detail="Build complete",
+            detail=(
+                f"Refresh complete ({indexed['embedded']} chunks embedded, {indexed['reused']} reused, "
+                f"{indexed['removed']} removed)"
+                if refresh
+                else "Build complete"
+            ),
             eta_seconds=0.0,
-            evidence_count=len(citations),
+            evidence_count=len(ledger_payload),
             ledger=ledger_payload,
+            refreshing=False,
         )
-        logger.info("Session %s ready", session_id)
+        logger.info(
+            "Session %s ready (%s chunks embedded, %s reused, %s removed)",
+            session_id,
+            indexed["embedded"],
+            indexed["reused"],
+            indexed["removed"],
+        )
+        return True
+    except JobCancelled:
+        vector_store_pool.discard(session_id, keep=state.generation)
+        if refresh:
+            answer_cache.invalidate(session_id)
+        raise
     except Exception as exc:  # pragma: no cover - pipeline error
         logger.exception("Pipeline failed for session %s: %s", session_id, exc)
+        vector_store_pool.discard(session_id, keep=state.generation)
+        if refresh:
+            # the session stays READY on its current generation, which the refresh
+            # never wrote to; the next refresh starts from a fresh copy of it
+            answer_cache.invalidate(session_id)
+            job_registry.update_state(session_id, detail=f"Refresh failed: {exc}", refreshing=False)
+            return False
         job_registry.update_state(
             session_id,
             stage=SessionStage.FAILED,
@@ -81,13 +248,125 @@ def _execute_pipeline(state) -> None:
         raise
 
 
+def _execute_build(state, job: Job) -> bool:
+    return _execute_pipeline(state, job)
+
+
+def _execute_refresh(state, job: Job) -> bool:
+    return _execute_pipeline(state, job, refresh=True)
+
+
+job_registry.register("build", _execute_build)
+job_registry.register("refresh", _execute_refresh)
+
+
+def _admission_refused(exc: AdmissionError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc))
+
+
+def _started(session_id: str, build_id: str, stage: SessionStage) -> StartSessionResponse:
+    standing = job_registry.standing(build_id)
+    return StartSessionResponse(
+        session_id=session_id,
+        status=stage,
+        queue_position=standing.position if standing else None,
+        eta_seconds=standing.eta_seconds if standing else None,
+    )
+
+
+def _start(topic: str, client: str, priority: str) -> StartSessionResponse:
+    state = job_registry.create_session(topic)
+    try:
+        if not KB_SHARING_ENABLED:
+            job_registry.submit(state.session_id, "build", client=client, priority=priority)
+            return _started(state.session_id, state.session_id, state.stage)
+        kb_id = knowledge_bases.attach(state.session_id, state.topic, client=client, priority=priority)
+    except AdmissionError as exc:
+        job_registry.forget(state.session_id)
+        delete_session_dir(state.session_id)
+        raise _admission_refused(exc) from exc
+    state = job_registry.update_state(state.session_id, kb_id=kb_id)
+    return _started(state.session_id, kb_id, build_state(state).stage)
+
+
+def _refresh(session_id: str, client: str) -> StartSessionResponse:
+    state = job_registry.get_state(session_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    target = build_state(state)
+    if target.stage != SessionStage.READY:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only ready sessions can be refreshed")
+    try:
+        if state.kb_id:
+            knowledge_bases.refresh(state.kb_id, client=client)
+        else:
+            job_registry.submit(session_id, "refresh", client=client)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    except AdmissionError as exc:
+        raise _admission_refused(exc) from exc
+    return _started(session_id, target.session_id, target.stage)
+
+
 @router.post("/start_session", response_model=StartSessionResponse, status_code=status.HTTP_202_ACCEPTED)
-async def start_session(payload: BuildRequest) -> StartSessionResponse:
+async def start_session(payload: BuildRequest, request: Request) -> StartSessionResponse:
+    """Queue a build, or attach to the topic's shared one; 429 if the client or the queue is at capacity."""
     if not payload.topic.strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Topic is required")
-    state = job_registry.create_session(payload.topic.strip())
-    job_registry.submit(state.session_id, _execute_pipeline)
-    return StartSessionResponse(session_id=state.session_id, status=state.stage)
+    # session files, the job queue and kb.lock are all blocking I/O
+    return await run_in_threadpool(_start, payload.topic.strip(), client_key(request), payload.priority)
+
+
+@router.post(
+    "/refresh_session/{session_id}", response_model=StartSessionResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def refresh_session(session_id: str, request: Request) -> StartSessionResponse:
+    """Re-scrape a READY session's topic and reprocess only the sources that changed."""
+    return await run_in_threadpool(_refresh, session_id, client_key(request))
+
+
+@router.post("/cancel_session/{session_id}", response_model=StartSessionResponse)
+async def cancel_session(session_id: str) -> StartSessionResponse:
+    """Cancel a session's queued or running build or refresh.
+
+    A queued build is cancelled at once. A running one stops at its next
+    step; until then the response still shows its current stage. A shared
+    knowledge base build is only cancelled for the last session using it.
+    """
+    state = job_registry.get_state(session_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    build_id = state.kb_id or session_id
+    if state.kb_id and set(knowledge_bases.sessions(state.kb_id)) - {session_id}:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Knowledge base build is shared with other sessions"
+        )
+    if job_registry.cancel(build_id) is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session is not building")
+    return StartSessionResponse(session_id=session_id, status=build_state(state).stage)
+
+
+@router.delete("/session/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(session_id: str) -> Response:
+    """Delete a session; a shared knowledge base is released and removed once stale and unreferenced."""
+    state = job_registry.get_state(session_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    if is_knowledge_base(session_id):
+        # other sessions may still read it; bases are only removed by ``knowledge_bases.collect``
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Shared knowledge bases cannot be deleted directly"
+        )
+    if job_registry.is_running(session_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session is still building")
+    job_registry.forget(session_id)
+    if state.kb_id:
+        await run_in_threadpool(knowledge_bases.detach, session_id, state.kb_id)
+    else:
+        vector_store_pool.discard(session_id)
+        answer_cache.invalidate(session_id)
+    await run_in_threadpool(delete_session_dir, session_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/session_status/{session_id}", response_model=SessionStatusResponse)
@@ -95,13 +374,25 @@ async def session_status(session_id: str) -> SessionStatusResponse:
     state = job_registry.get_state(session_id)
     if state is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    build = build_state(state)
+    eta_seconds, queue_position = build.eta_seconds, None
+    if build.stage == SessionStage.QUEUED:
+        standing = job_registry.standing(build.session_id)
+        if standing is not None:
+            eta_seconds, queue_position = standing.eta_seconds, standing.position
     return SessionStatusResponse(
         session_id=state.session_id,
         topic=state.topic,
-        stage=state.stage,
-        elapsed_seconds=state.elapsed_seconds,
-        eta_seconds=state.eta_seconds,
-        detail=state.detail,
+        stage=build.stage,
+        elapsed_seconds=build.elapsed_seconds,
+        eta_seconds=eta_seconds,
+        detail=build.detail,
+        documents_discovered=build.documents_discovered,
+        documents_retained=build.documents_retained,
+        chunks_embedded=build.chunks_embedded,
+        refreshing=build.refreshing,
+        kb_id=state.kb_id,
+        queue_position=queue_position,
     )
 
 
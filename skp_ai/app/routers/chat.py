@@ -1,14 +1,19 @@
 """Chat endpoints for answering questions."""
 from __future__ import annotations
 
-from typing import List
+import json
+from typing import Any, AsyncIterator, List
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..background import job_registry, load_skp
-from ..pipelines.answer import answer_question
+from ..knowledge import build_state
+from ..pipelines.answer import answer_cache, answer_question, stream_answer
+from ..retriever.pool import vector_store_pool
 from ..schema.contracts import AskRequest, AskResponse
-from ..schema.models import Citation, ErrorResponse, SessionStage
+from ..schema.models import Citation, ErrorResponse, SessionStage, SessionState
 from ..utils.logger import get_logger
 
 router = APIRouter()
@@ -30,21 +35,57 @@ def _load_citations(session_id: str) -> List[Citation]:
     return citations
 
 
-@router.post("/ask/{session_id}", response_model=AskResponse, responses={409: {"model": ErrorResponse}})
-async def ask_question(session_id: str, payload: AskRequest) -> AskResponse:
-    state = job_registry.get_state(session_id)
-    if state is None:
+def _ready_state(session_id: str) -> SessionState:
+    """State of the READY build serving ``session_id``; its ``session_id`` is the storage id to query."""
+    session = job_registry.get_state(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
+    state = build_state(session)
     if state.stage != SessionStage.READY:
         error = ErrorResponse(
-            status="building" if state.stage != SessionStage.FAILED else "failed",
+            status=state.stage.value if state.stage in (SessionStage.FAILED, SessionStage.CANCELLED) else "building",
             stage=state.stage,
             eta_seconds=state.eta_seconds,
         )
         raise HTTPException(status_code=409, detail=error.dict())
-    citations = _load_citations(session_id)
-    answer = answer_question(session_id, state.topic, payload.question, citations)
+    if vector_store_pool.use_generation(state.session_id, state.generation):
+        # builds run in worker processes, so answers cached here may predate the new index
+        answer_cache.invalidate(state.session_id)
+    return state
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/ask/{session_id}", response_model=AskResponse, responses={409: {"model": ErrorResponse}})
+async def ask_question(session_id: str, payload: AskRequest) -> AskResponse:
+    state = await run_in_threadpool(_ready_state, session_id)
+    citations = await run_in_threadpool(_load_citations, state.session_id)
+    answer = await answer_question(state.session_id, state.topic, payload.question, citations, state.generation)
     return AskResponse(answer=answer)
 
 
+@router.post("/ask/{session_id}/stream", responses={409: {"model": ErrorResponse}})
+async def ask_question_stream(session_id: str, payload: AskRequest) -> StreamingResponse:
+    """Server-sent events: ``citations``, then ``token`` per summary delta, then the final ``answer``."""
+    state = await run_in_threadpool(_ready_state, session_id)
+    citations = await run_in_threadpool(_load_citations, state.session_id)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in stream_answer(
+                state.session_id, state.topic, payload.question, citations, state.generation
+            ):
+                if event == "answer":
+                    data = AskResponse(answer=data).dict()
+                yield _sse(event, data)
+        except Exception as exc:
+            logger.exception("Streaming answer failed for session %s: %s", session_id, exc)
+            yield _sse("error", {"detail": "Answer generation failed"})
+        yield _sse("done", {})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 __all__ = ["router"]
@@ -1,6 +1,8 @@
 """Contracts exposed via API."""
 from __future__ import annotations
 
+from typing import Optional
+
 from pydantic import BaseModel, validator
 
 from .models import (
@@ -16,6 +18,8 @@ from .models import (
 class StartSessionResponse(BaseModel):
     session_id: str
     status: SessionStage
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
 
 
 class AskResponse(BaseModel):
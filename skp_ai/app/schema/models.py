@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,11 +17,13 @@ class SessionStage(str, Enum):
     SYNTHESIZE = "synthesize"
     READY = "ready"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class SessionState(BaseModel):
     session_id: str
     topic: str
+    kb_id: Optional[str] = None
     stage: SessionStage = SessionStage.QUEUED
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -30,8 +32,12 @@ class SessionState(BaseModel):
     detail: Optional[str] = None
     documents_discovered: int = 0
     documents_retained: int = 0
+    chunks_embedded: int = 0
+    refreshing: bool = False
     evidence_count: int = 0
     ledger: List[Dict[str, str]] = Field(default_factory=list)
+    # index generation published by the last successful build or refresh
+    generation: int = 0
 
 
 class SessionStatusResponse(BaseModel):
@@ -41,11 +47,18 @@ class SessionStatusResponse(BaseModel):
     elapsed_seconds: float
     eta_seconds: Optional[float]
     detail: Optional[str]
+    documents_discovered: int = 0
+    documents_retained: int = 0
+    chunks_embedded: int = 0
+    refreshing: bool = False
+    kb_id: Optional[str] = None
+    queue_position: Optional[int] = None
 
 
 class BuildRequest(BaseModel):
     topic: str
     user_context: Optional[Dict[str, str]] = None
+    priority: Literal["interactive", "bulk"] = "interactive"
 
 
 class AskRequest(BaseModel):
@@ -0,0 +1,248 @@
+"""Bounded session state cache with striped locks and coalesced writes."""
+from __future__ import annotations
+
+import atexit
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import STATE_CACHE_SIZE, STATE_CACHE_TTL_SECONDS, STATE_FLUSH_SECONDS, session_file
+from .schema.models import SessionStage, SessionState
+from .telemetry import STATE_CACHE_ENTRIES, STATE_CACHE_EVICTIONS, STATE_CACHE_LOADS
+from .utils.files import atomic_write_text
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATE_FILE = "state.json"
+
+# changes other processes and crash recovery depend on are written at once
+_DURABLE_FIELDS = frozenset({"stage", "refreshing", "kb_id", "ledger", "generation"})
+_SETTLED_STAGES = frozenset({SessionStage.READY, SessionStage.FAILED, SessionStage.CANCELLED})
+_LOCK_STRIPES = 64
+
+
+class SessionStateStore:
+    """Cached ``SessionState`` objects backed by each session's ``state.json``.
+
+    Sessions are spread over lock stripes rather than sharing one lock, so
+    they rarely wait on each other's updates or file writes. Progress
+    updates (detail, counters, ETA) only mark the session dirty; a
+    background flusher writes it at most
+    ``flush_seconds`` later, so a burst of updates costs one write. Updates
+    touching ``_DURABLE_FIELDS`` and :meth:`create` write immediately, as
+    does :meth:`flush`. Files are compact JSON, replaced atomically.
+
+    A cached state is reloaded when another process has rewritten its file,
+    unless it has local changes still waiting to be written.
+
+    The cache holds at most ``max_size`` states, least recently used first
+    out, and drops states idle for ``ttl`` seconds. Only settled sessions
+    (ready, failed or cancelled, not refreshing, nothing left to write) are
+    evicted; an evicted state is read back from disk when next needed.
+    """
+
+    def __init__(
+        self,
+        flush_seconds: float = STATE_FLUSH_SECONDS,
+        max_size: int = STATE_CACHE_SIZE,
+        ttl: float = STATE_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.flush_seconds = max(0.0, flush_seconds)
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._states: "OrderedDict[str, SessionState]" = OrderedDict()  # least recently used first
+        self._accessed: Dict[str, float] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._guard = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._dirty: Dict[str, float] = {}  # session -> monotonic time it became dirty
+        self._dirty_cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _lock(self, session_id: str) -> threading.Lock:
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+    def create(self, state: SessionState) -> SessionState:
+        with self._lock(state.session_id):
+            self._write(state)
+            self._remember(state)
+        self._evict(keep=state.session_id)
+        return state
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock(session_id):
+            state = self._load(session_id)
+        self._evict(keep=session_id)
+        return state
+
+    def update(self, session_id: str, **kwargs: Any) -> SessionState:
+        """Apply ``kwargs`` to the session's state; raises ``KeyError`` if it does not exist."""
+        with self._lock(session_id):
+            state = self._load(session_id)
+            if state is None:
+                raise KeyError(session_id)
+            for key, value in kwargs.items():
+                setattr(state, key, value)
+            state.updated_at = datetime.utcnow()
+            state.elapsed_seconds = (state.updated_at - state.created_at).total_seconds()
+            if self.flush_seconds and _DURABLE_FIELDS.isdisjoint(kwargs):
+                self._mark_dirty(session_id)
+            else:
+                self._write(state)
+        self._evict(keep=session_id)
+        return state
+
+    def forget(self, session_id: str) -> None:
+        """Drop the cached state and any unwritten changes; the caller removes the files."""
+        with self._lock(session_id):
+            self._drop(session_id)
+            with self._dirty_cond:
+                self._dirty.pop(session_id, None)
+
+    def flush(self, session_id: Optional[str] = None) -> None:
+        """Write pending changes now, for one session or all of them."""
+        with self._dirty_cond:
+            pending = [session_id] if session_id is not None else list(self._dirty)
+        for dirty_id in pending:
+            self._flush_one(dirty_id)
+
+    def _flush_one(self, session_id: str) -> None:
+        with self._lock(session_id):
+            with self._dirty_cond:
+                if self._dirty.pop(session_id, None) is None:
+                    return
+            state = self._states.get(session_id)
+            if state is not None:
+                self._write(state)
+
+    def _mark_dirty(self, session_id: str) -> None:
+        with self._dirty_cond:
+            if session_id in self._dirty:
+                return
+            self._dirty[session_id] = time.monotonic()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="skp-state-flush", daemon=True)
+                self._flusher.start()
+            self._dirty_cond.notify()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._dirty_cond:
+                while not self._dirty:
+                    self._dirty_cond.wait()
+                due = min(self._dirty.values()) + self.flush_seconds
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._dirty_cond.wait(delay)
+                    continue
+                now = time.monotonic()
+                ready = [sid for sid, since in self._dirty.items() if since + self.flush_seconds <= now]
+            for session_id in ready:
+                try:
+                    self._flush_one(session_id)
+                except Exception as exc:  # pragma: no cover - defensive
+                    logger.warning("Writing state for %s failed: %s", session_id, exc)
+
+    def _remember(self, state: SessionState) -> None:
+        """Cache ``state`` as the most recently used entry; caller holds the session's lock."""
+        with self._guard:
+            self._states[state.session_id] = state
+            self._states.move_to_end(state.session_id)
+            self._accessed[state.session_id] = time.monotonic()
+            STATE_CACHE_ENTRIES.set(len(self._states))
+
+    def _drop(self, session_id: str) -> None:
+        with self._guard:
+            self._states.pop(session_id, None)
+            self._accessed.pop(session_id, None)
+            self._mtimes.pop(session_id, None)
+            STATE_CACHE_ENTRIES.set(len(self._states))
+
+    def _evictable(self, session_id: str, state: SessionState) -> bool:
+        with self._dirty_cond:
+            if session_id in self._dirty:
+                return False
+        return state.stage in _SETTLED_STAGES and not state.refreshing
+
+    def _evict(self, keep: str) -> None:
+        """Evict least recently used states over ``max_size`` and states idle past ``ttl``."""
+        now = time.monotonic()
+        with self._guard:
+            excess = len(self._states) - self.max_size
+            candidates: List[Tuple[str, str]] = []
+            for session_id, state in self._states.items():
+                expired = self.ttl > 0 and now - self._accessed[session_id] > self.ttl
+                if excess <= 0 and not expired:
+                    break  # entries are in access order, so the rest are newer
+                if session_id == keep:
+                    continue
+                if expired:
+                    candidates.append((session_id, "ttl"))
+                elif state.stage in _SETTLED_STAGES and not state.refreshing:
+                    candidates.append((session_id, "size"))
+                    excess -= 1
+        for session_id, reason in candidates:
+            lock = self._lock(session_id)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                state = self._states.get(session_id)
+                if state is None:
+                    continue
+                if not self._evictable(session_id, state):
+                    # another process may have finished the build since this copy was read
+                    state = self._load(session_id)
+                    if state is None or not self._evictable(session_id, state):
+                        # still building; counts as in use until it settles
+                        if state is not None:
+                            self._remember(state)
+                        continue
+                self._drop(session_id)
+                STATE_CACHE_EVICTIONS.labels(reason).inc()
+            finally:
+                lock.release()
+
+    def _load(self, session_id: str) -> Optional[SessionState]:
+        """Cached state, reloaded if ``state.json`` was written by another process; caller holds the lock."""
+        state = self._states.get(session_id)
+        with self._dirty_cond:
+            dirty = session_id in self._dirty
+        if state is not None and dirty:
+            self._remember(state)
+            return state
+        path = session_file(session_id, STATE_FILE)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return state
+        if state is None or self._mtimes.get(session_id) != mtime:
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    state = SessionState.parse_obj(json.load(f))
+            except ValueError as exc:
+                logger.warning("Ignoring unreadable state for %s: %s", session_id, exc)
+                state = self._states.get(session_id)
+                if state is None:
+                    return None
+            else:
+                STATE_CACHE_LOADS.inc()
+                self._mtimes[session_id] = mtime
+        self._remember(state)
+        return state
+
+    def _write(self, state: SessionState) -> None:
+        """Replace ``state.json``; caller holds the session's lock."""
+        path = session_file(state.session_id, STATE_FILE)
+        atomic_write_text(path, json.dumps(state.dict(), default=str, separators=(",", ":")))
+        self._mtimes[state.session_id] = path.stat().st_mtime_ns
+
+
+__all__ = ["STATE_FILE", "SessionStateStore"]
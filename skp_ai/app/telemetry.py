@@ -5,7 +5,7 @@ import time
 from typing import Callable
 
 from fastapi import FastAPI, Request
-from prometheus_client import Counter, Histogram, make_asgi_app
+from prometheus_client import Counter, Gauge, Histogram, make_asgi_app
 
 REQUEST_LATENCY = Histogram(
     "skpai_request_latency_seconds",
@@ -17,6 +17,133 @@ REQUEST_COUNT = Counter(
     "Total HTTP requests",
     labelnames=["method", "path", "status"],
 )
+EMBED_CHUNKS = Counter(
+    "skpai_embed_chunks_total",
+    "Chunks embedded during session builds",
+)
+EMBED_BATCH_LATENCY = Histogram(
+    "skpai_embed_batch_latency_seconds",
+    "Latency of embedding API batches",
+)
+EMBED_THROUGHPUT = Gauge(
+    "skpai_embed_chunks_per_second",
+    "Chunks per second achieved by the most recent embedding run",
+)
+EMBED_CACHE_HITS = Counter(
+    "skpai_embed_cache_hits_total",
+    "Chunk embeddings served from the persistent embedding cache",
+)
+EMBED_CACHE_MISSES = Counter(
+    "skpai_embed_cache_misses_total",
+    "Chunk embeddings not found in the persistent embedding cache",
+)
+VECTOR_POOL_HITS = Counter(
+    "skpai_vector_pool_hits_total",
+    "Vector store leases served by an already open handle",
+)
+VECTOR_POOL_OPENS = Counter(
+    "skpai_vector_pool_opens_total",
+    "Vector store handles opened by the pool",
+)
+VECTOR_POOL_EVICTIONS = Counter(
+    "skpai_vector_pool_evictions_total",
+    "Vector store handles closed by the pool",
+    labelnames=["reason"],
+)
+VECTOR_POOL_SIZE = Gauge(
+    "skpai_vector_pool_size",
+    "Open vector store handles held by the pool",
+)
+RETRIEVAL_LATENCY = Histogram(
+    "skpai_retrieval_latency_seconds",
+    "Latency of passage retrieval for a question",
+    labelnames=["mode"],
+)
+QUERY_EMBED_CACHE_HITS = Counter(
+    "skpai_query_embed_cache_hits_total",
+    "Question embeddings served from the in-memory query cache",
+)
+QUERY_EMBED_CACHE_MISSES = Counter(
+    "skpai_query_embed_cache_misses_total",
+    "Question embeddings computed because the query cache missed",
+)
+
+ANSWER_CACHE_HITS = Counter(
+    "skpai_answer_cache_hits_total",
+    "Questions answered from the semantic answer cache",
+)
+ANSWER_CACHE_MISSES = Counter(
+    "skpai_answer_cache_misses_total",
+    "Questions that required retrieval and a chat completion",
+)
+ANSWER_CACHE_ENTRIES = Gauge(
+    "skpai_answer_cache_entries",
+    "Answers held by the semantic answer cache",
+)
+CRAWL_QUEUE_DEPTH = Gauge(
+    "skpai_crawl_queue_depth",
+    "Crawl requests waiting for a host token or a global in-flight slot",
+)
+CRAWL_IN_FLIGHT = Gauge(
+    "skpai_crawl_in_flight",
+    "Crawl requests currently being fetched",
+)
+CRAWL_HOST_LATENCY = Histogram(
+    "skpai_crawl_host_latency_seconds",
+    "Fetch latency per crawled host",
+    labelnames=["host"],
+)
+
+PAGE_CACHE_HITS = Counter(
+    "skpai_page_cache_hits_total",
+    "Pages answered 304 Not Modified and reused from the page cache",
+)
+PAGE_CACHE_MISSES = Counter(
+    "skpai_page_cache_misses_total",
+    "Pages downloaded and extracted in full",
+)
+
+KB_SESSIONS = Counter(
+    "skpai_kb_sessions_total",
+    "Sessions resolved to a shared topic knowledge base, by how the knowledge base was obtained",
+    labelnames=["outcome"],
+)
+
+BUILD_QUEUE_WAIT = Histogram(
+    "skpai_build_queue_wait_seconds",
+    "Time a build job waited in the queue before a worker first claimed it",
+    labelnames=["priority"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+BUILD_QUEUE_DEPTH = Gauge(
+    "skpai_build_queue_depth",
+    "Build jobs waiting in the queue, as last seen by this process",
+    labelnames=["priority"],
+)
+BUILD_ADMISSIONS = Counter(
+    "skpai_build_admissions_total",
+    "Build jobs submitted to the queue, by whether admission control accepted them",
+    labelnames=["outcome"],
+)
+BUILD_CANCELLATIONS = Counter(
+    "skpai_build_cancellations_total",
+    "Build jobs cancelled, by whether they were queued or running",
+    labelnames=["status"],
+)
+
+STATE_CACHE_ENTRIES = Gauge(
+    "skpai_state_cache_entries",
+    "Session states held in memory by the state cache",
+)
+STATE_CACHE_EVICTIONS = Counter(
+    "skpai_state_cache_evictions_total",
+    "Settled session states evicted from the state cache",
+    labelnames=["reason"],
+)
+STATE_CACHE_LOADS = Counter(
+    "skpai_state_cache_loads_total",
+    "Session states read from state.json: cache misses and reloads after another process wrote them",
+)
 
 
 def register_telemetry(app: FastAPI) -> None:
@@ -35,4 +162,36 @@ def register_telemetry(app: FastAPI) -> None:
     app.mount("/metrics", metrics_app)
 
 
-__all__ = ["register_telemetry", "REQUEST_LATENCY", "REQUEST_COUNT"]
+__all__ = [
+    "register_telemetry",
+    "REQUEST_LATENCY",
+    "REQUEST_COUNT",
+    "EMBED_CHUNKS",
+    "EMBED_BATCH_LATENCY",
+    "EMBED_THROUGHPUT",
+    "EMBED_CACHE_HITS",
+    "EMBED_CACHE_MISSES",
+    "VECTOR_POOL_HITS",
+    "VECTOR_POOL_OPENS",
+    "VECTOR_POOL_EVICTIONS",
+    "VECTOR_POOL_SIZE",
+    "RETRIEVAL_LATENCY",
+    "QUERY_EMBED_CACHE_HITS",
+    "QUERY_EMBED_CACHE_MISSES",
+    "ANSWER_CACHE_HITS",
+    "ANSWER_CACHE_MISSES",
+    "ANSWER_CACHE_ENTRIES",
+    "CRAWL_QUEUE_DEPTH",
+    "CRAWL_IN_FLIGHT",
+    "CRAWL_HOST_LATENCY",
+    "PAGE_CACHE_HITS",
+    "PAGE_CACHE_MISSES",
+    "KB_SESSIONS",
+    "BUILD_QUEUE_WAIT",
+    "BUILD_QUEUE_DEPTH",
+    "BUILD_ADMISSIONS",
+    "BUILD_CANCELLATIONS",
+    "STATE_CACHE_ENTRIES",
+    "STATE_CACHE_EVICTIONS",
+    "STATE_CACHE_LOADS",
+]
@@ -1,9 +1,13 @@
 """HTML related utilities."""
 from __future__ import annotations
 
-from typing import Iterable
+import json
+from typing import Iterable, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+import trafilatura
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .text import normalize_whitespace
 
 
 def extract_main_text(html: str) -> str:
@@ -19,4 +23,33 @@ def extract_links(html: str) -> Iterable[str]:
         yield a["href"]
 
 
-__all__ = ["extract_main_text", "extract_links"]
+def extract_anchors(html: str) -> List[Tuple[str, str]]:
+    """``(href, anchor text)`` for every link in ``html``; only ``<a>`` tags are parsed."""
+    soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer("a", href=True))
+    return [(a["href"], normalize_whitespace(a.get_text(" "))) for a in soup.find_all("a", href=True)]
+
+
+def extract_article(html: str) -> Optional[Tuple[Optional[str], str, Optional[str]]]:
+    """Return ``(title, text, source_url)`` for the page's main content, or ``None`` if it has none.
+
+    Kept free of app state so it can run in extraction worker processes.
+    """
+    metadata = trafilatura.extract(html, include_links=True, include_comments=False, include_tables=False, output_format="json")
+    if metadata:
+        data = json.loads(metadata)
+        text = normalize_whitespace(data.get("text", ""))
+        if not text:
+            return None
+        return data.get("title") or data.get("sitename"), text, data.get("source-url")
+    text = normalize_whitespace(trafilatura.extract(html) or "")
+    if not text:
+        return None
+    return None, text, None
+
+
+def extract_page(html: str) -> Tuple[Optional[Tuple[Optional[str], str, Optional[str]]], List[Tuple[str, str]]]:
+    """Main content (see :func:`extract_article`) plus outgoing anchors, in one worker round trip."""
+    return extract_article(html), extract_anchors(html)
+
+
+__all__ = ["extract_anchors", "extract_article", "extract_main_text", "extract_links", "extract_page"]
@@ -0,0 +1,84 @@
+"""MinHash signatures with LSH banding for near-duplicate detection."""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import DefaultDict, Dict, List
+
+import numpy as np
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHIFT = np.uint64(32)
+_SHINGLE_BASE = np.uint64(1_000_003)
+_BLOCK_SIZE = 4096
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """Return the unique 32-bit hashes of the word ``size``-grams in ``text``.
+
+    Word hashes come from the built-in ``hash`` and are therefore only stable
+    within one process, which is all an in-memory index needs.
+    """
+    words = text.lower().split()
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter(map(hash, words), dtype=np.int64, count=len(words)).view(np.uint64)
+    width = max(1, len(words) - size + 1)
+    span = min(size, len(words))
+    combined = np.zeros(width, dtype=np.uint64)
+    for offset in range(span):
+        combined = combined * _SHINGLE_BASE + hashes[offset : offset + width]
+    return np.unique(combined & _MAX_HASH)
+
+
+class MinHashIndex:
+    """Incremental LSH index over MinHash signatures.
+
+    Signatures are split into ``bands`` bands of equal width; two documents
+    become candidates when any band matches exactly. Candidates still need an
+    exact similarity check by the caller.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 5, seed: int = 42) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = (rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) | np.uint64(1))[:, None]
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)[:, None]
+        self._buckets: List[DefaultDict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, hashes.size, _BLOCK_SIZE):
+            block = hashes[None, start : start + _BLOCK_SIZE]
+            # multiply-shift hashing: the high 32 bits of a*x+b (mod 2**64)
+            permuted = (self._a * block + self._b) >> _SHIFT
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows : (band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def candidates(self, signature: np.ndarray) -> List[int]:
+        """Return keys of indexed documents sharing at least one band, in insertion order."""
+        found: Dict[int, None] = {}
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            for item in buckets.get(key, ()):
+                found[item] = None
+        return sorted(found)
+
+    def add(self, key: int, signature: np.ndarray) -> None:
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets[band_key].append(key)
+        self._size += 1
+
+
+__all__ = ["MinHashIndex", "shingle_hashes"]
@@ -2,34 +2,123 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, List
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 TOKEN_LENGTH = 4  # rough heuristic: 1 token ~ 4 chars
+ENCODING_NAME = "cl100k_base"  # tokenizer of the OpenAI embedding models
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
 
 
 def normalize_whitespace(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // TOKEN_LENGTH)
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional[Any]:
+    """The embedding models' tokenizer, or ``None`` when tiktoken or its BPE file is unavailable."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as exc:  # ImportError, or the BPE download failing offline
+        logger.info("tiktoken unavailable (%s); estimating tokens from character counts", exc)
+        return None
+
+
+def count_tokens(texts: Sequence[str]) -> List[int]:
+    """Token counts for ``texts``: exact with tiktoken, otherwise estimated from length.
+
+    Estimates round up, so the counts of adjacent pieces never sum to less
+    than the estimate for the joined text.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return [-(-len(text) // TOKEN_LENGTH) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(list(texts))]
+
+
+def _sentence_units(text: str, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """``(start, end, tokens)`` per sentence; sentences over ``max_tokens`` are split at spaces."""
+    spans: List[Tuple[int, int]] = []
+    ends: List[int] = []  # where the next sentence starts; the separator counts towards the budget
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        ends.append(match.end())
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+        ends.append(len(text))
+    counts = count_tokens([text[s:e] for (s, _), e in zip(spans, ends)])
+    units: List[Tuple[int, int, int]] = []
+    for (start, end), tokens in zip(spans, counts):
+        if tokens <= max_tokens:
+            units.append((start, end, tokens))
+            continue
+        # aim a little under the limit so one pass of splitting is enough
+        width = max(1, int((end - start) * max_tokens / tokens * 0.9))
+        pieces: List[Tuple[int, int]] = []
+        while start < end:
+            stop = min(end, start + width)
+            if stop < end:
+                space = text.rfind(" ", start + 1, stop)
+                stop = space if space > start else stop
+            pieces.append((start, stop))
+            start = stop + 1 if stop < end and text[stop] == " " else stop
+        units.extend((s, e, n) for (s, e), n in zip(pieces, count_tokens([text[s:e] for s, e in pieces])))
+    return units
+
+
+def chunk_spans(
+    text: str, min_tokens: int = 1200, max_tokens: int = 1600, overlap_tokens: int = 200
+) -> List[Tuple[int, int]]:
+    """``(start, end)`` offsets of overlapping chunks of ``text`` that follow sentence boundaries.
+
+    Whole sentences are packed up to ``max_tokens``. Each chunk after the
+    first starts with the last sentences of the previous one, up to
+    ``overlap_tokens``. A final chunk below ``min_tokens`` is folded into its
+    predecessor when the result still fits ``max_tokens``.
+    """
+    units = _sentence_units(text, max_tokens)
+    chunks: List[Tuple[int, int, int]] = []  # (first unit, end unit, tokens)
+    first = 0
+    while first < len(units):
+        end, total = first, 0
+        while end < len(units) and (end == first or total + units[end][2] <= max_tokens):
+            total += units[end][2]
+            end += 1
+        chunks.append((first, end, total))
+        if end == len(units):
+            break
+        # step back over trailing sentences for the overlap, always moving forward
+        next_first, overlap = end, 0
+        while next_first - 1 > first and overlap + units[next_first - 1][2] <= overlap_tokens:
+            next_first -= 1
+            overlap += units[next_first][2]
+        first = next_first
+    if len(chunks) > 1 and chunks[-1][2] < min_tokens:
+        prev_first, prev_end, prev_total = chunks[-2]
+        tail = sum(tokens for _, _, tokens in units[prev_end:])
+        if prev_total + tail <= max_tokens:
+            chunks[-2:] = [(prev_first, len(units), prev_total + tail)]
+    return [(units[first][0], units[end - 1][1]) for first, end, _ in chunks]
+
+
 def chunk_text(text: str, min_tokens: int = 1200, max_tokens: int = 1600, overlap_tokens: int = 200) -> List[str]:
-    """Chunk text by approximate token counts using character lengths."""
+    """Chunk whitespace-normalized text on sentence boundaries; see :func:`chunk_spans`."""
     if not text:
         return []
     text = normalize_whitespace(text)
-    approx_chunk = max_tokens * TOKEN_LENGTH
-    approx_overlap = overlap_tokens * TOKEN_LENGTH
-    chunks: List[str] = []
-    start = 0
-    while start < len(text):
-        end = min(len(text), start + approx_chunk)
-        chunk = text[start:end]
-        if len(chunk) < min_tokens * TOKEN_LENGTH and start != 0:
-            # append to previous chunk
-            chunks[-1] += " " + chunk
-        else:
-            chunks.append(chunk)
-        start = max(end - approx_overlap, end)
-    return [c.strip() for c in chunks if c.strip()]
+    return [text[start:end] for start, end in chunk_spans(text, min_tokens, max_tokens, overlap_tokens)]
 
 
 def strip_html(text: str) -> str:
@@ -46,4 +135,12 @@ def unique_everseen(iterable: Iterable[str]) -> List[str]:
     return unique
 
 
-__all__ = ["chunk_text", "normalize_whitespace", "strip_html", "unique_everseen"]
+__all__ = [
+    "chunk_spans",
+    "chunk_text",
+    "count_tokens",
+    "estimate_tokens",
+    "normalize_whitespace",
+    "strip_html",
+    "unique_everseen",
+]
@@ -0,0 +1,120 @@
+"""Standalone build worker process: ``python -m app.worker [--threads N] [--processes N]``."""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from .background import job_registry
+from .config import BUILD_WORKERS, CRAWL_BUDGET_SHARE, JOB_POLL_SECONDS
+from .crawler import crawler
+from .pipelines import scrape
+from .routers import build  # noqa: F401 - registers the build job handlers
+from .utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+_PROJECT_DIR = Path(__file__).resolve().parents[1]
+_STOP_TIMEOUT = 30.0
+
+
+class WorkerPool:
+    """Keep ``processes`` worker subprocesses running, each claiming up to ``threads`` builds.
+
+    Build threads in one process share a GIL, so the CPU-bound stages of
+    concurrent builds (extraction, cleaning, ranking) take turns on one
+    core. Each worker here is its own interpreter, and builds hand results
+    to the API only through the job queue and the session files on disk,
+    so nothing large crosses a process boundary. A worker that exits is
+    restarted; its lease lapses and the job resumes from its checkpoint.
+
+    Each worker has its own crawler, so the pool gives each one an equal
+    ``CRAWL_BUDGET_SHARE`` of this process's crawl budgets; otherwise every
+    host would see ``processes`` times ``CRAWL_HOST_RPS``.
+    """
+
+    def __init__(self, processes: int, threads: int = 1) -> None:
+        self.processes = max(0, processes)
+        self.threads = max(1, threads)
+        self._children: List[Optional[subprocess.Popen]] = []
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not self.processes or self._monitor is not None:
+            return
+        self._stop.clear()
+        self._children = [self._spawn() for _ in range(self.processes)]
+        self._monitor = threading.Thread(target=self._watch, name="skp-worker-pool", daemon=True)
+        self._monitor.start()
+        logger.info("Started %s build worker processes with %s threads each", self.processes, self.threads)
+
+    def _spawn(self) -> subprocess.Popen:
+        env = dict(os.environ, CRAWL_BUDGET_SHARE=repr(CRAWL_BUDGET_SHARE / self.processes))
+        return subprocess.Popen(
+            [sys.executable, "-m", "app.worker", "--threads", str(self.threads)], cwd=str(_PROJECT_DIR), env=env
+        )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(JOB_POLL_SECONDS):
+            for slot, child in enumerate(self._children):
+                if child is not None and child.poll() is not None and not self._stop.is_set():
+                    logger.warning("Build worker %s exited with %s; restarting", child.pid, child.returncode)
+                    self._children[slot] = self._spawn()
+
+    def shutdown(self) -> None:
+        """Stop the workers; each requeues its running builds on SIGTERM."""
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        for child in self._children:
+            if child is not None and child.poll() is None:
+                child.terminate()
+        for child in self._children:
+            if child is None:
+                continue
+            try:
+                child.wait(timeout=_STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logger.warning("Build worker %s did not stop; killing it", child.pid)
+                child.kill()
+                child.wait()
+        self._children = []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run session builds from the shared job queue.")
+    parser.add_argument("--threads", type=int, default=None, help="builds to run concurrently per process")
+    parser.add_argument(
+        "--processes", type=int, default=0, help="supervise this many worker processes instead of building here"
+    )
+    args = parser.parse_args()
+    configure_logging()
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    if args.processes > 0:
+        pool = WorkerPool(args.processes, threads=args.threads or 1)
+        pool.start()
+        stop.wait()
+        logger.info("Stopping build worker pool")
+        pool.shutdown()
+        return
+
+    job_registry.start(args.threads or max(1, BUILD_WORKERS), name="worker")
+    stop.wait()
+    logger.info("Stopping build worker")
+    job_registry.shutdown()
+    crawler.shutdown()
+    scrape.shutdown_extract_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Standalone benchmarks for SKP-AI pipelines; run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,122 @@
+"""Benchmark build throughput of worker threads vs. worker processes.
+
+A local site and the fake OpenAI server stand in for the web and the API.
+Each configuration gets a scratch data directory with ``--builds`` queued
+sessions and runs them with N build threads in one process (``threads``,
+what ``BUILD_WORKERS`` does) or N single-threaded worker processes
+(``processes``, ``python -m app.worker --processes N``). Extraction runs
+inline (``EXTRACT_WORKERS=0``) so every CPU-bound stage stays in the build's
+own process. Time runs from the first build leaving the queue to the last
+one finishing, so interpreter start-up is not counted.
+
+Usage: python -m benchmarks.bench_builds [--workers 1 2 4 8] [--builds 8] [--pages 40]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fake_site import FakeSite
+
+MODES = ("threads", "processes")
+
+
+def _child(mode: str, workers: int, builds: int) -> None:
+    from app.background import job_registry
+    from app.routers import build  # noqa: F401 - registers the build job handlers
+    from app.schema.models import SessionStage
+    from app.worker import WorkerPool
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sessions = [job_registry.create_session(f"term{idx} term{idx + 1}").session_id for idx in range(builds)]
+    for session_id in sessions:
+        job_registry.submit(session_id, "build")
+    pool = WorkerPool(workers)
+    if mode == "threads":
+        job_registry.start(workers)
+    else:
+        pool.start()
+    started = None
+    while True:
+        states = [job_registry.get_state(session_id) for session_id in sessions]
+        if started is None and any(state.stage != SessionStage.QUEUED for state in states):
+            started = time.perf_counter()
+        finished = [state for state in states if state.stage in (SessionStage.READY, SessionStage.FAILED)]
+        if len(finished) == len(states):
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - (started or time.perf_counter())
+    pool.shutdown()
+    job_registry.shutdown()
+    failed = sum(state.stage == SessionStage.FAILED for state in states)
+    print(json.dumps({"seconds": elapsed, "failed": failed}))
+
+
+def _run(mode: str, workers: int, args: argparse.Namespace, site: FakeSite, server: FakeOpenAI) -> dict:
+    workdir = tempfile.mkdtemp(prefix="skp-bench-")
+    allowlist = os.path.join(workdir, "allowlist.json")
+    with open(allowlist, "w", encoding="utf-8") as handle:
+        json.dump({"seed_urls": [f"{site.base_url}/page/{idx}" for idx in range(3)]}, handle)
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="benchmark",
+        OPENAI_BASE_URL=server.base_url,
+        SKP_CACHE_PATH=workdir,
+        EMBED_CACHE_PATH=os.path.join(workdir, "embed_cache.sqlite3"),
+        ROBOTS_CACHE_PATH=os.path.join(workdir, "robots"),
+        ALLOWLIST_PATH=allowlist,
+        PAGE_CACHE_ENABLED="false",
+        KB_SHARING_ENABLED="false",
+        MAX_SCRAPE_DOCS=str(args.pages),
+        CRAWL_HOST_RPS="1000000",
+        CRAWL_HOST_BURST="1000000",
+        EXTRACT_WORKERS="0",
+        JOB_POLL_SECONDS="0.1",
+    )
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_builds", "--child", mode, "--workers", str(workers),
+         "--builds", str(args.builds)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--builds", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=40, help="pages scraped per build")
+    parser.add_argument("--page-kb", type=int, default=100)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.workers[0], args.builds)
+        return
+
+    site = FakeSite(pages=args.pages * 2, page_kb=args.page_kb, latency=0.005).start()
+    server = FakeOpenAI(latency=0.0).start()
+    print(f"cpu_count={os.cpu_count()} builds={args.builds} pages/build={args.pages}")
+    print(f"{'mode':>10} {'workers':>7} {'seconds':>8} {'builds/min':>10} {'failed':>6}")
+    try:
+        for workers in args.workers:
+            for mode in MODES:
+                result = _run(mode, workers, args, site, server)
+                rate = args.builds / result["seconds"] * 60 if result["seconds"] else 0.0
+                print(f"{mode:>10} {workers:>7} {result['seconds']:>8.1f} {rate:>10.1f} {result['failed']:>6}")
+    finally:
+        server.stop()
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark the sentence-aware chunker against the legacy character-window chunker.
+
+Reports throughput on MB-scale synthetic documents, the largest chunk in
+tokens (tiktoken when available, otherwise the 4-chars-per-token estimate)
+and the mean overlap actually achieved between consecutive chunks.
+
+Usage: python -m benchmarks.bench_chunk [--sizes-mb 1 4 16]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from typing import Callable, List, Tuple
+
+from app.utils.text import TOKEN_LENGTH, _encoding, chunk_spans, count_tokens, normalize_whitespace
+
+
+def legacy_spans(text: str, min_tokens: int = 1200, max_tokens: int = 1600, overlap_tokens: int = 200) -> List[Tuple[int, int]]:
+    """Spans produced by the old ``chunk_text`` (its overlap step never moved back)."""
+    approx_chunk = max_tokens * TOKEN_LENGTH
+    approx_overlap = overlap_tokens * TOKEN_LENGTH
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + approx_chunk)
+        if end - start < min_tokens * TOKEN_LENGTH and start != 0:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+        start = max(end - approx_overlap, end)
+    return spans
+
+
+def synthetic_text(size_mb: float, seed: int = 13) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"{rng.choice(['volt', 'grid', 'cell', 'motor', 'range'])}{i}" for i in range(8000)]
+    sentences: List[str] = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        sentence = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 40))).capitalize() + rng.choice(".!?")
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def _measure(name: str, fn: Callable[[str], List[Tuple[int, int]]], text: str, size_mb: float) -> None:
+    start = time.perf_counter()
+    spans = fn(text)
+    elapsed = time.perf_counter() - start
+    tokens = count_tokens([text[s:e] for s, e in spans])
+    overlaps = [max(0, prev_end - start) for (_, prev_end), (start, _) in zip(spans, spans[1:])]
+    overlap_tokens = sum(overlaps) / TOKEN_LENGTH / max(1, len(overlaps))
+    print(
+        f"{size_mb:>6.0f} {name:>9} {len(spans):>7} {elapsed:>8.3f} {size_mb / elapsed:>7.1f} "
+        f"{max(tokens):>10} {overlap_tokens:>12.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"tokenizer: {'tiktoken' if _encoding() is not None else 'character estimate'}")
+    print(f"{'MB':>6} {'chunker':>9} {'chunks':>7} {'seconds':>8} {'MB/s':>7} {'max tokens':>10} {'mean overlap':>12}")
+    for size_mb in args.sizes_mb:
+        text = normalize_whitespace(synthetic_text(size_mb))
+        _measure("legacy", legacy_spans, text, size_mb)
+        _measure("sentence", chunk_spans, text, size_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark MinHash/LSH dedup against the legacy pairwise Sørensen loop.
+
+Usage: python -m benchmarks.bench_dedup [--sizes 100 1000 10000] [--legacy-limit 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from typing import List
+
+import textdistance
+
+from app.pipelines import clean
+from app.pipelines.scrape import RawDocument
+from app.utils.text import normalize_whitespace
+
+
+def synthetic_corpus(size: int, duplicate_ratio: float = 0.1, seed: int = 7) -> List[RawDocument]:
+    """Random documents of 150-3000 words; ``duplicate_ratio`` of them are lightly edited copies."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    documents: List[RawDocument] = []
+    for idx in range(size):
+        if documents and rng.random() < duplicate_ratio:
+            words = rng.choice(documents).text.split()
+            for _ in range(max(1, len(words) // 100)):
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        else:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(clean.MIN_WORDS, 3000))]
+        text = " ".join(words)
+        url = f"https://example.org/{idx}"
+        documents.append(RawDocument(url=url, title=url, text=text, source=url))
+    return documents
+
+
+def legacy_run(documents: List[RawDocument]) -> List[RawDocument]:
+    cleaned: List[RawDocument] = []
+    texts: List[str] = []
+    for doc in documents:
+        text = normalize_whitespace(doc.text)
+        if len(text.split()) < clean.MIN_WORDS:
+            continue
+        if any(textdistance.sorensen(text, existing) > clean.DUPLICATE_THRESHOLD for existing in texts):
+            continue
+        cleaned.append(doc)
+        texts.append(text)
+    return cleaned
+
+
+def _timed(fn, documents: List[RawDocument]):
+    start = time.perf_counter()
+    result = fn(documents)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--legacy-limit", type=int, default=10000, help="skip the legacy loop above this corpus size")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'docs':>7} {'variant':>8} {'kept':>6} {'seconds':>9} {'docs/s':>10}")
+    for size in args.sizes:
+        documents = synthetic_corpus(size)
+        kept, elapsed = _timed(clean.run, documents)
+        print(f"{size:>7} {'minhash':>8} {len(kept):>6} {elapsed:>9.3f} {size / elapsed:>10.1f}")
+        if size > args.legacy_limit:
+            print(f"{size:>7} {'legacy':>8} {'-':>6} {'skipped':>9} {'-':>10}")
+            continue
+        kept, elapsed = _timed(legacy_run, documents)
+        print(f"{size:>7} {'legacy':>8} {len(kept):>6} {elapsed:>9.3f} {size / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
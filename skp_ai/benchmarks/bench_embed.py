@@ -0,0 +1,81 @@
+"""Benchmark the batched embedding engine against per-document embedding.
+
+Runs each variant end to end (chunking, embedding, Chroma inserts) against the
+local fake OpenAI server and reports chunks/second. The ``cached`` variant
+repeats the batched build for a new session, so every chunk is served from the
+persistent embedding cache.
+
+Usage: python -m benchmarks.bench_embed [--docs 200] [--latency 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fixtures import configure_environment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--words", type=int, default=3000, help="words per document")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency per request (s)")
+    args = parser.parse_args()
+
+    server = FakeOpenAI(latency=args.latency).start()
+    configure_environment(server)
+
+    # imported late so configuration picks up the environment above
+    from openai import OpenAI
+
+    from app.config import MODEL_EMBED
+    from app.pipelines import embed
+    from app.pipelines.rank import RankedDocument
+    from app.pipelines.scrape import RawDocument
+    from app.retriever.store import SessionVectorStore
+    from app.utils.text import chunk_text
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(3)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    ranked = []
+    for idx in range(args.docs):
+        text = " ".join(rng.choice(vocabulary) for _ in range(args.words))
+        url = f"https://example.org/{idx}"
+        doc = RawDocument(url=url, title=url, text=text, source=url)
+        ranked.append(RankedDocument(document=doc, score=1.0, cluster=0))
+
+    def legacy(session_id: str) -> int:
+        store = SessionVectorStore(session_id)
+        total = 0
+        for idx, item in enumerate(ranked):
+            chunks = chunk_text(item.document.text)
+            client = OpenAI(api_key="benchmark", base_url=server.base_url)
+            response = client.embeddings.create(model=MODEL_EMBED, input=chunks)
+            embeddings = [row.embedding for row in response.data]
+            ids = [f"{session_id}_{idx}_{i}" for i in range(len(chunks))]
+            metadatas = [{"url": item.document.url, "chunk_index": i} for i in range(len(chunks))]
+            store.add(ids=ids, documents=chunks, metadatas=metadatas, embeddings=embeddings)
+            total += len(chunks)
+        return total
+
+    def batched(session_id: str) -> int:
+        chunks, _ = embed.run(session_id, ranked)
+        return len(chunks)
+
+    print(f"{'variant':>8} {'chunks':>7} {'requests':>9} {'seconds':>8} {'chunks/s':>9}")
+    for name, fn in (("legacy", legacy), ("batched", batched), ("cached", batched)):
+        before = server.requests
+        started = time.perf_counter()
+        total = fn(f"bench-{name}")
+        elapsed = time.perf_counter() - started
+        print(f"{name:>8} {total:>7} {server.requests - before:>9} {elapsed:>8.2f} {total / elapsed:>9.1f}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark HTML extraction throughput through the scrape pipeline's worker pool.
+
+Pages are read from ``--corpus`` (a directory of saved ``*.html`` files) or, by
+default, generated synthetically. Each worker count runs in a fresh process
+with ``EXTRACT_WORKERS`` set; ``inline`` is the old behaviour of parsing on the
+event loop itself.
+
+Usage: python -m benchmarks.bench_extract [--corpus DIR] [--workers 1 2 4 8] [--pages 200]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.bench_memory import synthetic_page
+
+
+def _load_corpus(corpus: str, pages: int) -> List[str]:
+    if corpus:
+        files = sorted(Path(corpus).glob("*.html"))[:pages]
+        return [path.read_text(encoding="utf-8", errors="replace") for path in files]
+    rng = random.Random(5)
+    return [synthetic_page(idx, 120, rng) for idx in range(pages)]
+
+
+async def _drive(pages: List[str], inline: bool) -> int:
+    from app.config import EXTRACT_MAX_PENDING
+    from app.pipelines import scrape
+
+    if inline:
+        return sum(scrape.extract_document(f"https://example.org/{idx}", html) is not None for idx, html in enumerate(pages))
+    slots = asyncio.Semaphore(max(1, EXTRACT_MAX_PENDING))
+    tasks = [scrape._extract(f"https://example.org/{idx}", html, slots) for idx, html in enumerate(pages)]
+    return sum(doc is not None for doc, _ in await asyncio.gather(*tasks))
+
+
+def _child(corpus: str, pages: int, inline: bool) -> None:
+    from app.pipelines import scrape
+
+    logging.getLogger().setLevel(logging.WARNING)
+    documents = _load_corpus(corpus, pages)
+    # warm the pool so worker start-up is not counted
+    asyncio.run(_drive(documents[:1], inline))
+    start = time.perf_counter()
+    extracted = asyncio.run(_drive(documents, inline))
+    elapsed = time.perf_counter() - start
+    scrape.shutdown_extract_pool()
+    print(json.dumps({"pages": len(documents), "extracted": extracted, "seconds": elapsed}))
+
+
+def _run(corpus: str, pages: int, workers: str) -> dict:
+    env = dict(os.environ, EXTRACT_WORKERS="1" if workers == "inline" else workers)
+    command = [sys.executable, "-m", "benchmarks.bench_extract", "--child", workers, "--pages", str(pages)]
+    if corpus:
+        command += ["--corpus", corpus]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default="", help="directory of saved HTML pages")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", nargs="+", default=["1", "2", "4", "8"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.corpus, args.pages, args.child == "inline")
+        return
+
+    print(f"CPUs available: {os.cpu_count()}")
+    print(f"{'workers':>8} {'pages':>6} {'extracted':>9} {'seconds':>8} {'pages/s':>8}")
+    for workers in ["inline", *args.workers]:
+        result = _run(args.corpus, args.pages, workers)
+        rate = result["pages"] / result["seconds"]
+        print(f"{workers:>8} {result['pages']:>6} {result['extracted']:>9} {result['seconds']:>8.2f} {rate:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
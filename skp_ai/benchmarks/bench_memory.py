@@ -0,0 +1,105 @@
+"""Benchmark peak RSS of a build that keeps raw HTML vs. the compact document type.
+
+Each variant runs in a fresh subprocess that extracts synthetic HTML pages and
+pushes the documents through clean, rank and chunking. ``legacy`` keeps every
+page's HTML alive alongside its document, as ``RawDocument.html`` used to.
+
+Usage: python -m benchmarks.bench_memory [--pages 200 1000] [--html-kb 250]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import resource
+import subprocess
+import sys
+from typing import List
+
+_BOILERPLATE = (
+    '<div class="nav"><ul>' + "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(60)) + "</ul></div>"
+    '<script>window.analytics = {"events": [' + ",".join(f'"event-{i}"' for i in range(400)) + "]};</script>"
+)
+
+
+def synthetic_page(idx: int, html_kb: int, rng: random.Random) -> str:
+    """An HTML page padded with navigation/script boilerplate to roughly ``html_kb`` KiB."""
+    vocabulary = [f"term{i}" for i in range(5000)]
+    paragraphs = "".join(
+        "<p>" + " ".join(rng.choice(vocabulary) for _ in range(120)) + "</p>" for _ in range(rng.randint(4, 12))
+    )
+    article = f"<article><h1>Page {idx}</h1>{paragraphs}</article>"
+    padding = _BOILERPLATE * max(1, (html_kb * 1024 - len(article)) // len(_BOILERPLATE))
+    return f"<html><head><title>Page {idx}</title></head><body>{padding}{article}</body></html>"
+
+
+def _max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(variant: str, pages: int, html_kb: int) -> None:
+    from app.pipelines import clean, rank
+    from app.pipelines.scrape import extract_document
+    from app.utils.text import chunk_text
+
+    logging.getLogger().setLevel(logging.WARNING)
+    baseline = _max_rss_kb()
+    rng = random.Random(3)
+    documents = []
+    retained_html: List[str] = []
+    for idx in range(pages):
+        url = f"https://example.org/page-{idx}"
+        html = synthetic_page(idx, html_kb, rng)
+        doc = extract_document(url, html)
+        if doc is None:
+            continue
+        if variant == "legacy":
+            retained_html.append(html)
+        documents.append(doc)
+    ranked = rank.run(clean.run(documents))
+    chunks = sum(len(chunk_text(item.document.text)) for item in ranked)
+    print(
+        json.dumps(
+            {
+                "documents": len(ranked),
+                "chunks": chunks,
+                "peak_mb": (_max_rss_kb() - baseline) / 1024,
+                "html_mb": sum(map(len, retained_html)) / 1024 / 1024,
+            }
+        )
+    )
+
+
+def _run_variant(variant: str, pages: int, html_kb: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_memory", "--child", variant, "--pages", str(pages), "--html-kb", str(html_kb)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--html-kb", type=int, default=250, help="approximate size of each synthetic page")
+    parser.add_argument("--child", choices=["legacy", "compact"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.pages[0], args.html_kb)
+        return
+
+    print(f"{'pages':>6} {'variant':>8} {'docs':>6} {'chunks':>7} {'html MB':>8} {'peak MB':>8}")
+    for pages in args.pages:
+        for variant in ("legacy", "compact"):
+            result = _run_variant(variant, pages, args.html_kb)
+            print(
+                f"{pages:>6} {variant:>8} {result['documents']:>6} {result['chunks']:>7} "
+                f"{result['html_mb']:>8.1f} {result['peak_mb']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark repeated scrapes of the same pages with and without the conditional-GET page cache.
+
+Usage: python -m benchmarks.bench_page_cache [--pages 50] [--page-kb 200] [--rounds 3]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.fake_site import FakeSite
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-kb", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    site = FakeSite(pages=args.pages, page_kb=args.page_kb).start()
+    workdir = tempfile.mkdtemp(prefix="skp-bench-")
+    os.environ["ROBOTS_CACHE_PATH"] = os.path.join(workdir, "robots")
+    os.environ["PAGE_CACHE_PATH"] = os.path.join(workdir, "pages")
+    os.environ["CRAWL_HOST_RPS"] = "1000000"
+    os.environ["CRAWL_HOST_BURST"] = "1000000"
+    os.environ["CRAWL_PER_HOST_CONNECTIONS"] = "16"
+
+    from app.crawler import crawler, page_cache
+    from app.pipelines import scrape
+
+    logging.getLogger().setLevel(logging.WARNING)
+    urls = [f"{site.base_url}/page/{idx}" for idx in range(args.pages)]
+    print(f"{'variant':>9} {'round':>5} {'docs':>5} {'full':>5} {'304':>5} {'MB':>7} {'seconds':>8}")
+    try:
+        for variant in ("no-cache", "cache"):
+            scrape.page_cache = page_cache if variant == "cache" else None
+            for round_idx in range(args.rounds):
+                site.reset_counters()
+                start = time.perf_counter()
+                documents = list(scrape._stream_live(urls))
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{variant:>9} {round_idx + 1:>5} {len(documents):>5} {site.full_responses:>5} "
+                    f"{site.not_modified:>5} {site.bytes_sent / 1024 / 1024:>7.1f} {elapsed:>8.2f}"
+                )
+    finally:
+        crawler.shutdown()
+        scrape.shutdown_extract_pool()
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
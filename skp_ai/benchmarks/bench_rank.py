@@ -0,0 +1,73 @@
+"""Benchmark the rank stage: per-call BM25 + TF-IDF vs. the shared hashed term matrix.
+
+``legacy`` is the previous implementation: rank_bm25 over whitespace tokens
+with the first document's text as the query, plus a separate TF-IDF
+vectorizer for clustering. ``shared`` ranks against the topic from one
+hashed term matrix. ``incremental`` reruns ``shared`` for the same session
+after 10% of the documents changed, reusing the persisted matrix rows.
+
+Usage: python -m benchmarks.bench_rank [--docs 1000 10000] [--words 800]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+
+def _legacy(documents: List) -> None:
+    from rank_bm25 import BM25Okapi
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    bm25 = BM25Okapi([doc.text.split() for doc in documents])
+    bm25.get_scores(documents[0].text.split())
+    matrix = TfidfVectorizer(max_features=5000).fit_transform([doc.text for doc in documents])
+    MiniBatchKMeans(n_clusters=min(5, len(documents)), random_state=42).fit_predict(matrix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--words", type=int, default=800, help="words per document")
+    parser.add_argument("--skip-legacy", action="store_true", help="legacy needs rank_bm25 and is slow at 10k")
+    args = parser.parse_args()
+    os.environ["SKP_CACHE_PATH"] = tempfile.mkdtemp(prefix="skp-bench-")
+
+    # imported late so configuration picks up the environment above
+    from app.pipelines import rank
+    from app.pipelines.scrape import RawDocument
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = random.Random(9)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    topic = "term1 term2 term3 term4"
+    print(f"{'docs':>6} {'variant':>12} {'seconds':>8} {'docs/s':>9}")
+    for count in args.docs:
+        documents = [
+            RawDocument(url=url, title=url, text=" ".join(rng.choices(vocabulary, k=args.words)), source=url)
+            for url in (f"https://example.org/{count}/{idx}" for idx in range(count))
+        ]
+        changed = list(documents)
+        for idx in rng.sample(range(count), count // 10):
+            doc = changed[idx]
+            changed[idx] = RawDocument(url=doc.url, title=doc.title, text=doc.text + " revised", source=doc.source)
+        variants = [
+            ("shared", lambda: rank.run(documents, topic=topic, session_id=f"bench-{count}")),
+            ("incremental", lambda: rank.run(changed, topic=topic, session_id=f"bench-{count}")),
+        ]
+        if not args.skip_legacy:
+            variants.insert(0, ("legacy", lambda: _legacy(documents)))
+        for name, fn in variants:
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            print(f"{count:>6} {name:>12} {elapsed:>8.2f} {count / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
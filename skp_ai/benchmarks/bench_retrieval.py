@@ -0,0 +1,98 @@
+"""Benchmark vector, BM25 and hybrid retrieval on a synthetic labelled corpus.
+
+Each document mixes common filler, a handful of topic words and one product
+code (``zx4471``-style). Half the queries ask for a product code, half for a
+document's topic words; a query is answered when a passage of its document
+is in the top k. Embeddings come from the local fake OpenAI server (hashed
+bag of words), and question embeddings are warmed up first, so latency is
+search and fusion only.
+
+Usage: python -m benchmarks.bench_retrieval [--docs 500] [--queries 200]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fixtures import configure_environment
+
+KS = (1, 5, 10)
+
+
+def synthetic_corpus(docs: int, words: int, rng: random.Random) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """``(url, text)`` documents and ``(query, relevant url)`` labels."""
+    common = [f"word{i}" for i in range(300)]
+    topics = [f"topic{i}" for i in range(docs * 4)]
+    documents: List[Tuple[str, str]] = []
+    labels: List[Tuple[str, str]] = []
+    for idx in range(docs):
+        url = f"https://example.org/doc-{idx}"
+        own_topics = rng.sample(topics, 6)
+        code = f"zx{rng.randrange(10_000, 99_999)}"
+        body = [rng.choice(common) for _ in range(words)]
+        for position in rng.sample(range(words), words // 4):
+            body[position] = rng.choice(own_topics)
+        for position in rng.sample(range(words), 2):
+            body[position] = code
+        documents.append((url, " ".join(body)))
+        labels.append((f"specifications of model {code}", url))
+        labels.append((" ".join(rng.sample(own_topics, 3)), url))
+    return documents, labels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--words", type=int, default=1500, help="words per document")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    server = FakeOpenAI(latency=0.0).start()
+    configure_environment(server)
+
+    # imported late so configuration picks up the environment above
+    from app.embedding import embed_query
+    from app.pipelines import embed
+    from app.pipelines.rank import RankedDocument
+    from app.pipelines.scrape import RawDocument
+    from app.retriever.search import RETRIEVAL_MODES, retrieve
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = random.Random(5)
+    documents, labels = synthetic_corpus(args.docs, args.words, rng)
+    queries = rng.sample(labels, min(args.queries, len(labels)))
+    ranked = [
+        RankedDocument(document=RawDocument(url=url, title=url, text=text, source=url), score=1.0, cluster=0)
+        for url, text in documents
+    ]
+    started = time.perf_counter()
+    chunks, _ = embed.run("bench-retrieval", ranked)
+    print(f"indexed {len(documents)} documents / {len(chunks)} chunks in {time.perf_counter() - started:.1f}s")
+    for query, _ in queries:
+        embed_query(query)
+
+    header = " ".join(f"{f'recall@{k}':>9}" for k in KS)
+    print(f"{'mode':>8} {header} {'mean ms':>8} {'p95 ms':>7}")
+    for mode in RETRIEVAL_MODES:
+        found = {k: 0 for k in KS}
+        latencies: List[float] = []
+        for query, relevant in queries:
+            started = time.perf_counter()
+            passages = retrieve("bench-retrieval", query, top_k=max(KS), mode=mode)
+            latencies.append((time.perf_counter() - started) * 1000)
+            urls = [meta.get("url") for _, meta in passages]
+            for k in KS:
+                found[k] += relevant in urls[:k]
+        recalls = " ".join(f"{found[k] / len(queries):>9.3f}" for k in KS)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{mode:>8} {recalls} {statistics.mean(latencies):>8.2f} {p95:>7.2f}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark session state updates: global lock + write-through vs. per-session locks + coalescing.
+
+Worker threads each own a slice of the sessions and push progress updates
+(detail and counters, as the build pipeline does) into them. ``legacy``
+serializes every update behind one lock and rewrites ``state.json`` with
+``indent=2`` each time, as ``JobRegistry`` used to; ``write-through`` uses
+per-session locks and compact JSON but still writes every update;
+``coalesced`` is the default store, writing each session at most every
+``STATE_FLUSH_SECONDS``.
+
+Usage: python -m benchmarks.bench_state [--sessions 64] [--updates 200] [--threads 8]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import warnings
+from typing import List
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--updates", type=int, default=200, help="progress updates per session")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    os.environ["SKP_CACHE_PATH"] = tempfile.mkdtemp(prefix="skp-bench-")
+
+    # imported late so configuration picks up the environment above
+    from app import state_store
+    from app.schema.models import SessionState
+    from app.state_store import SessionStateStore
+
+    class LegacyStore(SessionStateStore):
+        def __init__(self) -> None:
+            super().__init__(flush_seconds=0)
+            self._global = threading.RLock()
+
+        def _lock(self, session_id: str) -> threading.RLock:  # type: ignore[override]
+            return self._global
+
+        def _write(self, state: SessionState) -> None:
+            path = state_store.session_file(state.session_id, state_store.STATE_FILE)
+            state_store.atomic_write_text(path, json.dumps(state.dict(), default=str, indent=2))
+            self._mtimes[state.session_id] = path.stat().st_mtime_ns
+
+    writes = [0]
+    original_write = state_store.atomic_write_text
+
+    def counting_write(path, text, encoding="utf-8"):  # type: ignore[no-untyped-def]
+        writes[0] += 1
+        original_write(path, text, encoding)
+
+    state_store.atomic_write_text = counting_write
+    logging.getLogger().setLevel(logging.WARNING)
+    # SessionState.dict() as the app calls it; pydantic 2 flags it when run as __main__
+    warnings.simplefilter("ignore", DeprecationWarning)
+    ledger = [
+        {"id": f"S{idx:02d}", "title": f"Source {idx}", "url": f"https://example.org/{idx}", "source": "x"}
+        for idx in range(12)
+    ]
+    variants = {
+        "legacy": LegacyStore,
+        "write-through": lambda: SessionStateStore(flush_seconds=0),
+        "coalesced": SessionStateStore,
+    }
+    print(f"{'variant':>13} {'updates/s':>10} {'writes':>7} {'p99 ms':>7}")
+    for name, factory in variants.items():
+        store = factory()
+        sessions = [f"{name}-{idx}" for idx in range(args.sessions)]
+        for session_id in sessions:
+            store.create(SessionState(session_id=session_id, topic="bench", ledger=ledger))
+        writes[0] = 0
+        latencies: List[float] = []
+
+        def work(owned: List[str]) -> None:
+            for step in range(args.updates):
+                for session_id in owned:
+                    started = time.perf_counter()
+                    store.update(session_id, detail=f"step {step}", documents_discovered=step, chunks_embedded=step * 3)
+                    latencies.append(time.perf_counter() - started)
+
+        threads = [
+            threading.Thread(target=work, args=(sessions[idx :: args.threads],)) for idx in range(args.threads)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        total = args.sessions * args.updates
+        print(f"{name:>13} {total / elapsed:>10.0f} {writes[0]:>7} {p99:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Local stand-in for the OpenAI HTTP API used by benchmarks.
+
+Embeddings are hashed bag-of-words vectors, so texts sharing vocabulary land
+close together; every endpoint sleeps for a configurable latency. Streamed
+chat completions emit the answer in small chunks every ``token_interval``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+from aiohttp import web
+
+DIMENSIONS = 256
+_WORD = re.compile(r"\w+")
+
+
+def bow_embedding(text: str, dimensions: int = DIMENSIONS) -> List[float]:
+    vector = np.zeros(dimensions, dtype=float)
+    for word in _WORD.findall(text.lower()):
+        vector[zlib.crc32(word.encode("utf-8")) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+@dataclass
+class FakeOpenAI:
+    latency: float = 0.05
+    per_input_latency: float = 0.0
+    token_interval: float = 0.02
+    requests: int = 0
+    base_url: str = ""
+    _loop: asyncio.AbstractEventLoop = field(default=None, repr=False)  # type: ignore[assignment]
+    _runner: web.AppRunner = field(default=None, repr=False)  # type: ignore[assignment]
+
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        inputs = payload["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.requests += 1
+        await asyncio.sleep(self.latency + self.per_input_latency * len(inputs))
+        data = [{"object": "embedding", "index": idx, "embedding": bow_embedding(text)} for idx, text in enumerate(inputs)]
+        tokens = sum(len(text) // 4 for text in inputs)
+        return web.json_response(
+            {
+                "object": "list",
+                "data": data,
+                "model": payload.get("model", "fake"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+    @staticmethod
+    def answer_content() -> str:
+        return json.dumps(
+            {
+                "summary": "Electric vehicles convert a larger share of stored energy into motion than hybrids.",
+                "reasoning_points": ["Drivetrain efficiency differs", "Charging sources vary by region"],
+                "next_steps": ["Compare local electricity prices"],
+                "risks": ["Figures vary by model year"],
+                "citations": [],
+                "assumptions": ["Typical commuting patterns"],
+                "confidence": 0.7,
+            }
+        )
+
+    async def _stream_completion(self, request: web.Request, payload: dict, content: str) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(content), 8):
+            chunk = {
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": content[start : start + 8]}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await asyncio.sleep(self.token_interval)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        content = self.answer_content()
+        if payload.get("stream"):
+            return await self._stream_completion(request, payload, content)
+        # the non-streaming response only arrives once the whole answer would have been generated
+        await asyncio.sleep(self.token_interval * ((len(content) + 7) // 8))
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        )
+
+    def app(self) -> web.Application:
+        application = web.Application(client_max_size=256 * 1024 * 1024)
+        application.router.add_post("/v1/embeddings", self._embeddings)
+        application.router.add_post("/v1/chat/completions", self._chat_completions)
+        return application
+
+    def start(self) -> "FakeOpenAI":
+        """Serve on an ephemeral localhost port from a background thread."""
+        ready = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            self._loop.run_until_complete(site.start())
+            port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+            self.base_url = f"http://127.0.0.1:{port}/v1"
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, name="fake-openai", daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+__all__ = ["FakeOpenAI", "bow_embedding"]
@@ -0,0 +1,98 @@
+"""Local website used by the crawler benchmarks.
+
+Serves ``pages`` synthetic articles at ``/page/<n>`` with strong ETags and
+Last-Modified headers, answers conditional GETs with 304, and simulates a
+link with fixed per-request ``latency`` plus ``bytes_per_second`` throughput.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+
+from aiohttp import web
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@dataclass
+class FakeSite:
+    pages: int = 50
+    page_kb: int = 200
+    latency: float = 0.02
+    bytes_per_second: float = 20 * 1024 * 1024
+    base_url: str = ""
+    full_responses: int = 0
+    not_modified: int = 0
+    bytes_sent: int = 0
+    _bodies: Dict[int, str] = field(default_factory=dict, repr=False)
+    _loop: asyncio.AbstractEventLoop = field(default=None, repr=False)  # type: ignore[assignment]
+    _runner: web.AppRunner = field(default=None, repr=False)  # type: ignore[assignment]
+
+    def body(self, idx: int) -> str:
+        if idx not in self._bodies:
+            rng = random.Random(idx)
+            words = [f"term{rng.randrange(5000)}" for _ in range(600)]
+            links = "".join(f'<a href="/page/{rng.randrange(self.pages)}">related {n}</a>' for n in range(10))
+            padding = "<div class=\"nav\">" + "<span>menu</span>" * max(0, self.page_kb * 1024 // 17) + "</div>"
+            self._bodies[idx] = (
+                f"<html><head><title>Page {idx}</title></head><body>{padding}"
+                f"<article><h1>Page {idx}</h1><p>{' '.join(words)}</p></article>{links}</body></html>"
+            )
+        return self._bodies[idx]
+
+    def reset_counters(self) -> None:
+        self.full_responses = self.not_modified = self.bytes_sent = 0
+
+    async def _page(self, request: web.Request) -> web.Response:
+        idx = int(request.match_info["idx"])
+        body = self.body(idx)
+        etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+        await asyncio.sleep(self.latency)
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.full_responses += 1
+        self.bytes_sent += len(body)
+        await asyncio.sleep(len(body) / self.bytes_per_second)
+        return web.Response(
+            text=body, content_type="text/html", headers={"ETag": etag, "Last-Modified": LAST_MODIFIED}
+        )
+
+    async def _robots(self, request: web.Request) -> web.Response:
+        return web.Response(text="User-agent: *\nAllow: /\n")
+
+    def start(self) -> "FakeSite":
+        """Serve on an ephemeral localhost port from a background thread."""
+        ready = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            application = web.Application()
+            application.router.add_get("/robots.txt", self._robots)
+            application.router.add_get("/page/{idx}", self._page)
+            self._runner = web.AppRunner(application, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            self._loop.run_until_complete(site.start())
+            port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+            self.base_url = f"http://127.0.0.1:{port}"
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, name="fake-site", daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+__all__ = ["FakeSite"]
@@ -0,0 +1,50 @@
+"""Shared setup for benchmarks that exercise the API against the fake OpenAI server."""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import tempfile
+
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def configure_environment(server: FakeOpenAI) -> str:
+    """Point SKP-AI at ``server`` and a scratch data directory; call before importing ``app``."""
+    workdir = tempfile.mkdtemp(prefix="skp-bench-")
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["SKP_CACHE_PATH"] = workdir
+    os.environ["EMBED_CACHE_PATH"] = os.path.join(workdir, "embed_cache.sqlite3")
+    os.environ["RATE_LIMIT_RPS"] = "1000000"
+    return workdir
+
+
+def ready_session(topic: str = "electric cars vs hybrids", documents: int = 20, words: int = 1500) -> str:
+    """Build a READY session from synthetic documents and return its id."""
+    from app.background import job_registry
+    from app.pipelines import embed
+    from app.pipelines.rank import RankedDocument
+    from app.pipelines.scrape import RawDocument
+    from app.schema.models import Citation, SessionStage
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = random.Random(11)
+    vocabulary = "battery charging range hybrid engine efficiency emissions grid motor fuel cost".split()
+    ranked = []
+    for idx in range(documents):
+        text = " ".join(rng.choice(vocabulary) for _ in range(words))
+        url = f"https://www.energy.gov/doc-{idx}"
+        doc = RawDocument(url=url, title=f"Document {idx}", text=text, source=url)
+        ranked.append(RankedDocument(document=doc, score=1.0 - idx / documents, cluster=idx % 3))
+    state = job_registry.create_session(topic)
+    embed.run(state.session_id, ranked)
+    ledger = [
+        Citation(id=f"S{idx + 1:02d}", title=item.document.title, url=item.document.url, source=item.document.source).dict()
+        for idx, item in enumerate(ranked[:12])
+    ]
+    job_registry.update_state(state.session_id, stage=SessionStage.READY, ledger=ledger, evidence_count=len(ledger))
+    return state.session_id
+
+
+__all__ = ["configure_environment", "ready_session"]
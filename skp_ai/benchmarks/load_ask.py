@@ -0,0 +1,82 @@
+"""Load test concurrent ``/ask`` requests against the fake model server.
+
+Each concurrency level fires ``--requests`` questions while a probe polls
+``/health``; with a non-blocking ask path throughput grows with concurrency and
+health latency stays flat.
+
+Usage: python -m benchmarks.load_ask [--latency 0.5] [--concurrency 1 8 32]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fixtures import configure_environment, ready_session
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def _run_level(client: httpx.AsyncClient, session_id: str, concurrency: int, requests: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+
+    async def ask(idx: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"/ask/{session_id}", json={"question": f"Compare efficiency factors #{idx}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    health: list = []
+    probe = asyncio.create_task(_probe_health(client, stop, health))
+    started = time.perf_counter()
+    await asyncio.gather(*(ask(idx) for idx in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    print(
+        f"{concurrency:>11} {requests:>8} {elapsed:>8.2f} {requests / elapsed:>8.1f} "
+        f"{statistics.median(latencies):>10.3f} {max(health) if health else 0:>12.3f}"
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.main import app
+
+    session_id = ready_session()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{'concurrency':>11} {'requests':>8} {'seconds':>8} {'req/s':>8} {'p50 (s)':>10} {'health max':>12}")
+        for level in args.concurrency:
+            await _run_level(client, session_id, level, args.requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency per completion (s)")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    server = FakeOpenAI(latency=args.latency).start()
+    configure_environment(server)
+    try:
+        asyncio.run(_main(args))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare time-to-first-byte of ``/ask`` and the SSE ``/ask/{id}/stream`` endpoint.
+
+Serves the app with uvicorn on a local port so streamed bytes are observed as
+they are sent, against the fake model server's streaming completions.
+
+Usage: python -m benchmarks.stream_ask [--latency 1.0] [--token-interval 0.02] [--runs 5]
+"""
+from __future__ import annotations
+
+import argparse
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fixtures import configure_environment, ready_session
+
+
+def _serve(app) -> str:
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _measure(client: httpx.Client, path: str, question: str) -> dict:
+    timings = {}
+    started = time.perf_counter()
+    with client.stream("POST", path, json={"question": question}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            now = time.perf_counter() - started
+            timings.setdefault("first_byte", now)
+            if line.startswith("event: "):
+                timings.setdefault(line[len("event: "):], now)
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake model time to first token (s)")
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = FakeOpenAI(latency=args.latency, token_interval=args.token_interval).start()
+    configure_environment(server)
+    from app.main import app
+
+    session_id = ready_session()
+    base_url = _serve(app)
+    rows = {"ask": [], "stream": []}
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        for run in range(args.runs):
+            question = f"How do efficiency factors compare? ({run})"
+            rows["ask"].append(_measure(client, f"/ask/{session_id}", question))
+            rows["stream"].append(_measure(client, f"/ask/{session_id}/stream", question + " [stream]"))
+
+    def median(samples: list, key: str) -> str:
+        values = [sample[key] for sample in samples if key in sample]
+        return f"{statistics.median(values):.3f}" if values else "-"
+
+    print(f"{'endpoint':>8} {'first byte':>11} {'citations':>10} {'first token':>12} {'total':>8}")
+    for name, samples in rows.items():
+        print(
+            f"{name:>8} {median(samples, 'first_byte'):>11} {median(samples, 'citations'):>10} "
+            f"{median(samples, 'token'):>12} {median(samples, 'total'):>8}"
+        )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()